@@ -7,7 +7,8 @@ import threading
 from typing import Type
 
 from enki import settings
-from enki.misc import devonly, log
+from enki.misc import devonly, evloop, log
+from enki.net import metricsexport
 
 from enki.core.enkitype import NoValue, AppAddr
 from enki.core.gedescr import EntityDesc
@@ -42,16 +43,22 @@ def start(login_app_addr: AppAddr,
           ):
     """Start a network thread with the application and connect it to the game thread."""
     logger.info('[enki] Spawning Enki in the net thread')
+    # Цикл событий нужен до создания приложения (оно создаёт future)
+    loop = evloop.get_event_loop()
     entity_serializer_by_uid = {
         cls.ENTITY_CLS_ID: cls for cls in entity_serializers.values()
     }
     app = App(login_app_addr, entity_descriptions, entity_serializer_by_uid,
               kbenginexml_root, server_tick_period)
 
-    loop = asyncio.get_event_loop()
     thread = threading.Thread(target=loop.run_forever, daemon=True)
     thread.start()
 
+    exporter = metricsexport.exporter_from_settings()
+    if exporter is not None:
+        # Метрики отдаются из сетевого потока
+        asyncio.run_coroutine_threadsafe(exporter.start(), loop)
+
     qame_queue = queue.Queue()
 
     net_layer = ThreadedNetLayer(entity_serializers, app, loop, qame_queue)
@@ -7,11 +7,13 @@ import collections
 import datetime
 import enum
 import logging
+import time
 from dataclasses import dataclass
 from typing import Callable, Optional, Any, Type
 
-from enki.misc import devonly
-from enki.core import kbeenum
+from enki import settings
+from enki.misc import devonly, log
+from enki.core import kbeenum, metrics
 from enki.core.kbeenum import ServerError
 from enki.core.gedescr import EntityDesc
 from enki.core.enkitype import Result, AppAddr, NoValue
@@ -41,6 +43,8 @@ from .iapp import IApp
 
 
 logger = logging.getLogger(__name__)
+# Записи на каждое сообщение (см. misc.log.msg_logger)
+msg_logger = log.msg_logger(__name__)
 
 
 class _ClientAppHandler(Handler):
@@ -56,10 +60,10 @@ class OnUpdatePropertysClientAppHandler(_ClientAppHandler):
     _SAVE_MSG_TEMPL = 'There is NO entity "{entity_id}". Save the message to handle it in the future.'
 
     def handle(self, msg: Message) -> OnUpdatePropertysHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        msg_logger.debug('[%s] (%s)', self, devonly.func_args_values())
         handler = OnUpdatePropertysHandler(self._entity_helper)
         data: memoryview = msg.get_values()[0]
-        entity_id, data = handler.get_entity_id(data)
+        entity_id, _ = handler.get_entity_id(data)
 
         if not self._entity_helper.get_entity_cls_name_by_eid(entity_id):
             self._app.add_pending_msg(entity_id, msg)
@@ -75,10 +79,10 @@ class OnUpdatePropertysClientAppHandler(_ClientAppHandler):
 class OnUpdatePropertysOptimizedClientAppHandler(_ClientAppHandler):
 
     def handle(self, msg: Message) -> OnUpdatePropertysHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        msg_logger.debug('[%s] (%s)', self, devonly.func_args_values())
         handler = OnUpdatePropertysOptimizedHandler(self._entity_helper)
         data: memoryview = msg.get_values()[0]
-        entity_id, data = handler.get_entity_id(data)
+        entity_id, _ = handler.get_entity_id(data)
 
         if not self._entity_helper.get_entity_cls_name_by_eid(entity_id):
             self._app.add_pending_msg(entity_id, msg)
@@ -94,7 +98,7 @@ class OnUpdatePropertysOptimizedClientAppHandler(_ClientAppHandler):
 class OnCreatedProxiesClientAppHandler(_ClientAppHandler):
 
     def handle(self, msg: Message) -> OnCreatedProxiesHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        msg_logger.debug('[%s] (%s)', self, devonly.func_args_values())
         res = OnCreatedProxiesHandler(self._entity_helper).handle(msg)
         self._app.resend_pending_msgs(res.result.entity_id)
         self._app.set_relogin_data(res.result.rnd_uuid, res.result.entity_id)
@@ -104,10 +108,10 @@ class OnCreatedProxiesClientAppHandler(_ClientAppHandler):
 class OnEntityEnterWorldClientAppHandler(_ClientAppHandler):
 
     def handle(self, msg: Message) -> OnEntityEnterWorldHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         handler = OnEntityEnterWorldHandler(self._entity_helper)
         data = msg.get_values()[0]
-        entity_id, data = handler.get_entity_id(data)
+        entity_id, _ = handler.get_entity_id(data)
 
         if not self._entity_helper.is_player(entity_id):
             # The proxy entity (aka player) is initialized in the onCreatedProxies
@@ -191,7 +195,7 @@ class ClientStub(MsgTCPClient):
     def set_msg_receiver(self, receiver: IClientMsgReceiver) -> None:
         logger.info("The function does nothing (It'a client stub)")
 
-    async def send(self, msg: Message) -> None:
+    async def send(self, msg: Message, key: Any = None) -> None:
         logger.info("The function does nothing (It'a client stub)")
 
     def start(self) -> Result:
@@ -381,7 +385,8 @@ class App(IApp):
             host=login_res.result.host,
             port=login_res.result.tcp_port
         )
-        client = MsgTCPClient(baseapp_addr, msgspec.app.client.SPEC_BY_ID)
+        client = MsgTCPClient(baseapp_addr, msgspec.app.client.SPEC_BY_ID,
+                              corked=settings.TCP_CORK)
         res = await client.start()
         if not res.success:
             text: str = f'The client cannot connect to the "{baseapp_addr}"'
@@ -437,7 +442,7 @@ class App(IApp):
 
     @if_app_is_connected
     def on_receive_msg(self, msg: Message) -> bool:
-        logger.info('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         asyncio.create_task(self._on_receive_msg(msg))
         return True
 
@@ -455,7 +460,12 @@ class App(IApp):
                         f'"{msg.name}"')
             return False
 
+        registry = metrics.registry
+        if registry is None or not registry.time_next():
+            return handler.handle(msg).success
+        start = time.perf_counter_ns()
         result = handler.handle(msg)
+        registry.on_handled(msg.name, time.perf_counter_ns() - start)
         return result.success
 
     @if_app_is_connected
@@ -466,7 +476,7 @@ class App(IApp):
         asyncio.create_task(self.stop())
 
     async def send_command(self, cmd: TCPCommand) -> Result:
-        logger.info('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         # The command will handle a disconnected client.
         # That's why it doesn't need to know if the client is connected or not.
         for msg_id in cmd.waiting_for_ids:
@@ -485,7 +495,7 @@ class App(IApp):
     @if_app_is_connected
     def send_message(self, msg: Message):
         """Send the message to the server."""
-        logger.info('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         asyncio.create_task(self._client.send_msg(msg))
 
     def get_relogin_data(self) -> tuple[int, int]:
@@ -2,10 +2,11 @@
 
 import dataclasses
 import logging
+import struct
 from dataclasses import dataclass
 from typing import ClassVar, Dict, Any, Type
 
-from enki.misc import devonly
+from enki.misc import devonly, log
 from enki.core.enkitype import NoValue
 from enki.core import kbetype, kbemath
 
@@ -18,8 +19,46 @@ from ..clienthandler.ehelper import EntityHelper
 from ..layer import ilayer
 from ..layer.thlayer import IGameLayer
 
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
 
 logger = logging.getLogger(__name__)
+# Записи на каждое сообщение (см. misc.log.msg_logger)
+msg_logger = log.msg_logger(__name__)
+
+
+def _build_packed_table(shift: int, count: int) -> list[float]:
+    """Values of the packed coordinates (without the sign) by their bits.
+
+    The bits are placed to the mantissa (and the low bits of the exponent)
+    of 2.0, then 2.0 is subtracted in float32 (see the docstring of
+    _OptimizedXYZReader).
+    """
+    bits = [0x40000000 | (i << shift) for i in range(count)]
+    values = struct.unpack(f'={count}f', struct.pack(f'={count}I', *bits))
+    # Вычитание в float32, как на сервере
+    return list(struct.unpack(f'={count}f',
+                              struct.pack(f'={count}f', *(v - 2.0 for v in values))))
+
+
+_BITS = struct.Struct('=I')
+_INT32_BY_BITS = struct.Struct('=i')
+_FLOAT32_BY_BITS = struct.Struct('=f')
+_PACKED_XZ = struct.Struct('>BH')
+_PACKED_Y = struct.Struct('=H')
+
+# 12 бит на координату: 11 бит значения и бит знака
+_XZ_BY_HALF = _build_packed_table(15, 0x800)
+_XZ_BY_HALF += [-v for v in _XZ_BY_HALF]
+# 16 бит: 15 бит значения и бит знака (знак применяется при чтении)
+_Y_BY_BITS = _build_packed_table(12, 0x8000)
+
+if np is not None:
+    _XZ_BY_HALF_ARRAY = np.array(_XZ_BY_HALF, np.float32)
+    _Y_BY_BITS_ARRAY = np.array(_Y_BY_BITS + [-v for v in _Y_BY_BITS], np.float32)
 
 
 class _OptimizedXYZReader:
@@ -44,78 +83,57 @@ class _OptimizedXYZReader:
     А дальше магия ...
     См. kbe/src/lib/common/memorystream.h:453 (readPackXZ)
     и kbe/src/lib/network/bundle.h:381 (appendPackXZ)
+
+    Магия выполняется один раз при импорте модуля: значения для всех 12-битных
+    половин XZ и для 15 бит Y лежат в таблицах, чтение это поиск по таблице.
+    Бит знака float32 означает отрицательное значение.
     """
 
     @staticmethod
     def int32_to_float32(value: int) -> float:
-        return kbetype.FLOAT.decode(
-            memoryview(kbetype.INT32.encode(value))
-        )[0]
+        return _FLOAT32_BY_BITS.unpack(_BITS.pack(value & 0xFFFFFFFF))[0]
 
     @staticmethod
     def float32_to_int32(value: float) -> int:
-        return kbetype.INT32.decode(
-            memoryview(kbetype.FLOAT.encode(value))
-        )[0]
+        return _INT32_BY_BITS.unpack(_FLOAT32_BY_BITS.pack(value))[0]
 
     @staticmethod
-    def read_packed_xz(data: memoryview) -> tuple[kbetype.Vector2, memoryview]:
-        # 0x40000000 is 0b1000000000000000000000000000000
-        x = 0x40000000
-        z = 0x40000000
-
-        data_: int = 0
-
-        value_1, offset = kbetype.UINT8.decode(data)
-        data = data[offset:]
-        value_2, offset = kbetype.UINT8.decode(data)
-        data = data[offset:]
-        value_3, offset = kbetype.UINT8.decode(data)
-        data = data[offset:]
-
-        # There were 3 bytes ...
-        data_ |= (value_1 << 16)
-        data_ |= (value_2 << 8)
-        data_ |= value_3
-        # ... and now there is one 24 bit value. This value contains two float
-        # numbers by 12 bit per a value.
-
-        # 0x7ff000 is 0b11111111111000000000000
-        # The half of the value is cut off and then left shifts three bits
-        x |= (data_ & 0x7ff000) << 3
-        z |= (data_ & 0x0007ff) << 15
-
-        x = _OptimizedXYZReader.float32_to_int32(
-            _OptimizedXYZReader.int32_to_float32(x) - 2.0
-        )
-        z = _OptimizedXYZReader.float32_to_int32(
-            _OptimizedXYZReader.int32_to_float32(z) - 2.0
-        )
-
-        # 0x800000 is 0b100000000000000000000000
-        # TODO: [2022-08-31 15:29 burov_alexey@mail.ru]:
-        # Знак определяется?
-        x |= (data_ & 0x800000) << 8
-        z |= (data_ & 0x000800) << 20
-
+    def read_packed_xz(data: memoryview, offset: int = 0) -> tuple[kbetype.Vector2, int]:
+        # There were 3 bytes (big-endian) and now there is one 24 bit value.
+        # This value contains two float numbers by 12 bit per a value.
+        high, low = _PACKED_XZ.unpack_from(data, offset)
+        data_ = (high << 16) | low
         return kbetype.Vector2(
-            _OptimizedXYZReader.int32_to_float32(x),
-            _OptimizedXYZReader.int32_to_float32(z)
-        ), data
+            _XZ_BY_HALF[data_ >> 12], _XZ_BY_HALF[data_ & 0xfff]
+        ), offset + 3
 
     @staticmethod
-    def read_packed_y(data: memoryview) -> tuple[float, memoryview]:
-        data_, offset = kbetype.UINT16.decode(data)
-        data = data[offset:]
-
-        y = 0x40000000
-        y |= (data_ & 0x7fff) << 12
-        y = _OptimizedXYZReader.float32_to_int32(
-            _OptimizedXYZReader.int32_to_float32(y) - 2.0
-        )
-        y |= (data_ & 0x8000) << 16
+    def read_packed_y(data: memoryview, offset: int = 0) -> tuple[float, int]:
+        data_, = _PACKED_Y.unpack_from(data, offset)
+        y = _Y_BY_BITS[data_ & 0x7fff]
+        # The sign bit of float32 is set, it's the same as the negation
+        return (-y if data_ & 0x8000 else y), offset + 2
 
-        return _OptimizedXYZReader.int32_to_float32(y), data
+    @staticmethod
+    def read_packed_xyz_batch(data: memoryview, offset: int, count: int
+                              ) -> tuple[Any, int]:
+        """Decode "count" packed XZ + Y values (5 bytes each) by one call.
+
+        Returns numpy.ndarray of float32 with the shape (count, 3), the
+        columns are x, y, z. NumPy is required.
+        """
+        if np is None:
+            raise ImportError('NumPy is required for the batch decoding')
+        end = offset + count * 5
+        raw = np.frombuffer(data, np.uint8, count * 5, offset).reshape(count, 5)
+        xz = (raw[:, 0].astype(np.uint32) << 16) \
+            | (raw[:, 1].astype(np.uint32) << 8) | raw[:, 2]
+        y = raw[:, 3:5].copy().view('=u2')[:, 0]
+        result = np.empty((count, 3), np.float32)
+        result[:, 0] = _XZ_BY_HALF_ARRAY[xz >> 12]
+        result[:, 1] = _Y_BY_BITS_ARRAY[y]
+        result[:, 2] = _XZ_BY_HALF_ARRAY[xz & 0xfff]
+        return result, end
 
 
 class _OnEntityCreatedMixin:
@@ -180,22 +198,22 @@ class EntityHandler(Handler):
     def _game(self) -> IGameLayer:
         return ilayer.get_game_layer()
 
-    def get_entity_id(self, data: memoryview) -> tuple[int, memoryview]:
-        entity_id, offset = kbetype.ENTITY_ID.decode(data)
-        data = data[offset:]
-        return entity_id, data
+    def get_entity_id(self, data: memoryview, offset: int = 0) -> tuple[int, int]:
+        """Read the entity id. Returns the id and the offset after it."""
+        return kbetype.ENTITY_ID.decode_from(data, offset)
 
-    def parse_data(self, data: memoryview, entity_id: int) -> tuple[EntityParsedData, memoryview]:
-        return EntityParsedData(), data[:]
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[EntityParsedData, int]:
+        return EntityParsedData(), offset
 
     def process_parsed_data(self, pd: EntityParsedData, entity_id: int) -> EntityHandlerResult:
         return EntityHandlerResult(False, pd)
 
     def handle(self, msg: Message) -> EntityHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         data = msg.get_values()[0]
-        entity_id, data = self.get_entity_id(data)
-        pd, data = self.parse_data(data, entity_id)
+        entity_id, offset = self.get_entity_id(data)
+        pd, offset = self.parse_data(data, offset, entity_id)
         return self.process_parsed_data(pd, entity_id)
 
     def set_pose(self, entity_id: int, pose_data: PoseData):
@@ -212,20 +230,17 @@ class _OptimizedHandlerMixin:
     """С оптимизациями заложенными серверным движком вычисляются entity_id."""
     _entity_helper: EntityHelper
 
-    def get_entity_id(self, data: memoryview) -> tuple[int, memoryview]:
-        return self.get_optimized_entity_id(data)
+    def get_entity_id(self, data: memoryview, offset: int = 0) -> tuple[int, int]:
+        return self.get_optimized_entity_id(data, offset)
 
-    def get_optimized_entity_id(self, data: memoryview) -> tuple[int, memoryview]:
+    def get_optimized_entity_id(self, data: memoryview, offset: int = 0) -> tuple[int, int]:
         if not self._entity_helper.is_aliasEntityID:
-            entity_id, offset = kbetype.INT32.decode(data)
-            data = data[offset:]
-            return entity_id, data
+            return kbetype.INT32.decode_from(data, offset)
 
-        alias_id, offset = kbetype.UINT8.decode(data)
-        data = data[offset:]
+        alias_id, offset = kbetype.UINT8.decode_from(data, offset)
         entity_id = self._entity_helper.get_entity_id_by(alias_id)
 
-        return entity_id, data
+        return entity_id, offset
 
 
 @dataclass
@@ -243,18 +258,17 @@ class _OnUpdateData_XYZ_YPR_BaseHandler(EntityHandler, _OptimizedHandlerMixin):
     _parsed_data_cls: ClassVar[Type[_OnUpdateData_XYZ_YPR_BaseParsedData]]
     _handler_result_cls: ClassVar[Type[_OnUpdateData_XYZ_YPR_BaseHandlerResult]]
 
-    def get_entity_id(self, data: memoryview) -> tuple[int, memoryview]:
-        return self.get_optimized_entity_id(data)
+    def get_entity_id(self, data: memoryview, offset: int = 0) -> tuple[int, int]:
+        return self.get_optimized_entity_id(data, offset)
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[_OnUpdateData_XYZ_YPR_BaseParsedData, memoryview]:
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[_OnUpdateData_XYZ_YPR_BaseParsedData, int]:
         values = []
         for _ in range(len(dataclasses.fields(self._parsed_data_cls))):
-            value, offset = kbetype.FLOAT.decode(data)
-            data = data[offset:]
+            value, offset = kbetype.FLOAT.decode_from(data, offset)
             values.append(value)
         pd = self._parsed_data_cls(*values)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: _OnUpdateData_XYZ_YPR_BaseParsedData,
                             entity_id: int) -> _OnUpdateData_XYZ_YPR_BaseHandlerResult:
@@ -284,9 +298,9 @@ class OnUpdatePropertysHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnUpdatePropertysHandlerResult:
         """Handler of `onUpdatePropertys`."""
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        msg_logger.debug('[%s] (%s)', self, devonly.func_args_values())
         data: memoryview = msg.get_values()[0]
-        entity_id, data = self.get_entity_id(data)
+        entity_id, offset = self.get_entity_id(data)
         parsed_data = OnUpdatePropertysParsedData(
             entity_id=entity_id,
             e_properties={}
@@ -295,25 +309,20 @@ class OnUpdatePropertysHandler(EntityHandler):
         cls_name = self._entity_helper.get_entity_cls_name_by_eid(entity_id)
         assert cls_name is not None
         desc = self._entity_helper.get_entity_descr_by_cls_name(cls_name)
-        while data:
+        while offset < len(data):
             if self._entity_helper.get_kbenginexml().cellapp.entitydefAliasID \
                     and len(desc.property_desc_by_id) <= 255:
-                component_uid, shift = kbetype.UINT8.decode(data)
-                data = data[shift:]
-                property_uid, shift = kbetype.UINT8.decode(data)
-                data = data[shift:]
+                component_uid, offset = kbetype.UINT8.decode_from(data, offset)
+                property_uid, offset = kbetype.UINT8.decode_from(data, offset)
             else:
-                component_uid, shift = kbetype.UINT16.decode(data)
-                data = data[shift:]
-                property_uid, shift = kbetype.UINT16.decode(data)
-                data = data[shift:]
+                component_uid, offset = kbetype.UINT16.decode_from(data, offset)
+                property_uid, offset = kbetype.UINT16.decode_from(data, offset)
 
             prop_id = component_uid or property_uid
             assert prop_id != 0, 'There is NO id of the property'
 
             type_spec = desc.property_desc_by_id[prop_id]
-            value, shift = type_spec.kbetype.decode(data)
-            data = data[shift:]
+            value, offset = type_spec.kbetype.decode_from(data, offset)
 
             if type_spec.name in desc.component_names:
                 component_name = type_spec.name
@@ -324,18 +333,13 @@ class OnUpdatePropertysHandler(EntityHandler):
                 while ec_data.count > 0:
                     if self._entity_helper.get_kbenginexml().cellapp.entitydefAliasID \
                             and len(comp_desc.property_desc_by_id) <= 255:
-                        _component_uid, shift = kbetype.UINT8.decode(data)
-                        data = data[shift:]
-                        property_uid, shift = kbetype.UINT8.decode(data)
-                        data = data[shift:]
+                        _component_uid, offset = kbetype.UINT8.decode_from(data, offset)
+                        property_uid, offset = kbetype.UINT8.decode_from(data, offset)
                     else:
-                        _component_uid, shift = kbetype.UINT16.decode(data)
-                        data = data[shift:]
-                        property_uid, shift = kbetype.UINT16.decode(data)
-                        data = data[shift:]
+                        _component_uid, offset = kbetype.UINT16.decode_from(data, offset)
+                        property_uid, offset = kbetype.UINT16.decode_from(data, offset)
                     type_spec = comp_desc.property_desc_by_id[property_uid]
-                    v, shift = type_spec.kbetype.decode(data)
-                    data = data[shift:]
+                    v, offset = type_spec.kbetype.decode_from(data, offset)
                     ec_data.properties[type_spec.name] = v
                     ec_data.count -= 1
 
@@ -415,10 +419,9 @@ class OnRemoteMethodCallHandlerResult(HandlerResult):
 class OnRemoteMethodCallHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnRemoteMethodCallHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         data: memoryview = msg.get_values()[0]
-        entity_id, offset = kbetype.ENTITY_ID.decode(data)
-        data = data[offset:]
+        entity_id, offset = kbetype.ENTITY_ID.decode_from(data, 0)
 
         cls_name = self._entity_helper.get_entity_cls_name_by_eid(entity_id)
         assert cls_name is not None
@@ -426,11 +429,9 @@ class OnRemoteMethodCallHandler(EntityHandler):
 
         if entity_desc.is_optimized_cl_method_uid:
             # componentPropertyAliasID
-            component_prop_id, offset = kbetype.UINT8.decode(data)
-            data = data[offset:]
+            component_prop_id, offset = kbetype.UINT8.decode_from(data, offset)
         else:
-            component_prop_id, offset = kbetype.UINT16.decode(data)
-            data = data[offset:]
+            component_prop_id, offset = kbetype.UINT16.decode_from(data, offset)
 
         comp_prop_desc = None
         if component_prop_id != NoValue.NO_ID:
@@ -442,18 +443,15 @@ class OnRemoteMethodCallHandler(EntityHandler):
                 comp_prop_desc.component_type_name)
 
         if entity_desc.is_optimized_cl_method_uid:
-            method_id, offset = kbetype.UINT8.decode(data)
-            data = data[offset:]
+            method_id, offset = kbetype.UINT8.decode_from(data, offset)
         else:
-            method_id, offset = kbetype.UINT16.decode(data)
-            data = data[offset:]
+            method_id, offset = kbetype.UINT16.decode_from(data, offset)
 
         method_desc = entity_desc.client_methods[method_id]
 
         arguments = []
         for kbe_type in method_desc.kbetypes:
-            value, offset = kbe_type.decode(data)
-            data = data[offset:]
+            value, offset = kbe_type.decode_from(data, offset)
             arguments.append(value)
 
         if comp_prop_desc is None:
@@ -491,7 +489,7 @@ class OnRemoteMethodCallOptimizedHandlerResult(HandlerResult):
 class OnRemoteMethodCallOptimizedHandler(OnRemoteMethodCallHandler, _OptimizedHandlerMixin):
 
     def handle(self, msg: Message) -> OnRemoteMethodCallOptimizedHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         res = super().handle(msg)
         pd = OnRemoteMethodCallOptimizedParsedData(
             entity_id=res.result.entity_id,
@@ -515,7 +513,7 @@ class OnEntityDestroyedHandlerResult(HandlerResult):
 class OnEntityDestroyedHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnEntityDestroyedHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         entity_id = msg.get_values()[0]
 
         desc = self._entity_helper.get_entity_descr_by_eid(entity_id)
@@ -548,21 +546,18 @@ class OnEntityEnterWorldHandlerResult(HandlerResult):
 class OnEntityEnterWorldHandler(EntityHandler, _OnEntityCreatedMixin):
 
     def handle(self, msg: Message) -> OnEntityEnterWorldHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         data = msg.get_values()[0]
-        entity_id, data = self.get_entity_id(data)
+        entity_id, offset = self.get_entity_id(data)
 
         if self._entity_helper.is_entitydefAliasID:
-            entity_type_id, offset = kbetype.UINT8.decode(data)
-            data = data[offset:]
+            entity_type_id, offset = kbetype.UINT8.decode_from(data, offset)
         else:
-            entity_type_id, offset = kbetype.UINT16.decode(data)
-            data = data[offset:]
+            entity_type_id, offset = kbetype.UINT16.decode_from(data, offset)
 
         is_on_ground = False  # noqa
-        if data:
-            is_on_ground, offset = kbetype.BOOL.decode(data)
-            data = data[offset:]
+        if offset < len(data):
+            is_on_ground, offset = kbetype.BOOL.decode_from(data, offset)
 
         pd = OnEntityEnterWorldParsedData(entity_id, entity_type_id, is_on_ground)
 
@@ -601,9 +596,9 @@ class OnEntityLeaveWorldHandlerResult(HandlerResult):
 class OnEntityLeaveWorldHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnEntityLeaveWorldHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         data = msg.get_values()[0]
-        entity_id, data = self.get_entity_id(data)
+        entity_id, offset = self.get_entity_id(data)
 
         desc = self._entity_helper.get_entity_descr_by_eid(entity_id)
         self._entity_helper.on_entity_leave_world(entity_id)
@@ -631,11 +626,11 @@ class OnEntityLeaveWorldOptimizedHandlerResult(HandlerResult):
 
 class OnEntityLeaveWorldOptimizedHandler(OnEntityLeaveWorldHandler, _OptimizedHandlerMixin):
 
-    def get_entity_id(self, data: memoryview) -> tuple[int, memoryview]:
-        return self.get_optimized_entity_id(data)
+    def get_entity_id(self, data: memoryview, offset: int = 0) -> tuple[int, int]:
+        return self.get_optimized_entity_id(data, offset)
 
     def handle(self, msg: Message) -> OnEntityLeaveWorldOptimizedHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         res: OnEntityLeaveWorldHandlerResult = super().handle(msg)
         return OnEntityLeaveWorldOptimizedHandlerResult(
             success=res.success,
@@ -659,24 +654,18 @@ class OnSetEntityPosAndDirHandlerResult(HandlerResult):
 class OnSetEntityPosAndDirHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnSetEntityPosAndDirHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         data: memoryview = msg.get_values()[0]
-        entity_id, data = self.get_entity_id(data)
-
-        x, offset = kbetype.FLOAT.decode(data)
-        data = data[offset:]
-        y, offset = kbetype.FLOAT.decode(data)
-        data = data[offset:]
-        z, offset = kbetype.FLOAT.decode(data)
-        data = data[offset:]
+        entity_id, offset = self.get_entity_id(data)
+
+        x, offset = kbetype.FLOAT.decode_from(data, offset)
+        y, offset = kbetype.FLOAT.decode_from(data, offset)
+        z, offset = kbetype.FLOAT.decode_from(data, offset)
         position = Position(x, y, z)
 
-        x, offset = kbetype.FLOAT.decode(data)
-        data = data[offset:]
-        y, offset = kbetype.FLOAT.decode(data)
-        data = data[offset:]
-        z, offset = kbetype.FLOAT.decode(data)
-        data = data[offset:]
+        x, offset = kbetype.FLOAT.decode_from(data, offset)
+        y, offset = kbetype.FLOAT.decode_from(data, offset)
+        z, offset = kbetype.FLOAT.decode_from(data, offset)
         direction = Direction(x, y, z)
 
         pd = OnSetEntityPosAndDirParsedData(
@@ -711,18 +700,15 @@ class OnEntityEnterSpaceHandlerResult(HandlerResult):
 class OnEntityEnterSpaceHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnEntityEnterSpaceHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         data: memoryview = msg.get_values()[0]
-        entity_id, offset = kbetype.ENTITY_ID.decode(data)
-        data = data[offset:]
+        entity_id, offset = kbetype.ENTITY_ID.decode_from(data, 0)
 
-        space_id, offset = kbetype.SPACE_ID.decode(data)
-        data = data[offset:]
+        space_id, offset = kbetype.SPACE_ID.decode_from(data, offset)
 
         is_on_ground = False
-        if data:
-            is_on_ground, offset = kbetype.BOOL.decode(data)
-            data = data[offset:]
+        if offset < len(data):
+            is_on_ground, offset = kbetype.BOOL.decode_from(data, offset)
 
         pd = OnEntityEnterSpaceParsedData(entity_id, space_id, is_on_ground)
 
@@ -754,10 +740,9 @@ class OnEntityLeaveSpaceHandlerResult(HandlerResult):
 class OnEntityLeaveSpaceHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnEntityLeaveSpaceHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         data: memoryview = msg.get_values()[0]
-        entity_id, offset = kbetype.ENTITY_ID.decode(data)
-        data = data[offset:]
+        entity_id, offset = kbetype.ENTITY_ID.decode_from(data, 0)
 
         pd = OnEntityLeaveSpaceParsedData(entity_id)
 
@@ -784,7 +769,7 @@ class OnUpdateBasePosHandlerResult(HandlerResult):
 class OnUpdateBasePosHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnUpdateBasePosHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         entity_id = self._entity_helper.get_player_id()
 
         pose_data = PoseData(*msg.get_values())
@@ -810,7 +795,7 @@ class OnUpdateBaseDirHandlerResult(HandlerResult):
 class OnUpdateBaseDirHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnUpdateBaseDirHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         entity_id = self._entity_helper.get_player_id()
         pd: OnUpdateBaseDirParsedData = OnUpdateBaseDirParsedData(
             Direction(*msg.get_values())
@@ -836,7 +821,7 @@ class OnUpdateBasePosXZHandlerResult(HandlerResult):
 class OnUpdateBasePosXZHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnUpdateBasePosXZHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         entity_id = self._entity_helper.get_player_id()
         pd = OnUpdateBasePosXZParsedData(*msg.get_values())
 
@@ -860,7 +845,7 @@ class OnUpdateDataHandlerResult(HandlerResult):
 class OnUpdateDataHandler(EntityHandler, _OptimizedHandlerMixin):
 
     def handle(self, msg: Message) -> OnUpdateDataHandlerResult:
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
         res = super().handle(msg)
         return OnUpdateDataHandlerResult(
             res.success, OnUpdateDataParsedData(), text=res.text
@@ -1302,13 +1287,12 @@ class OnUpdateData_Y_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_Y_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_Y_OptimizedParsedData, memoryview]:
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_Y_OptimizedParsedData, int]:
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle = kbemath.int82angle(value)
         pd = OnUpdateData_Y_OptimizedParsedData(angle)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_Y_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_Y_OptimizedHandlerResult:
@@ -1333,13 +1317,12 @@ class OnUpdateData_R_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_R_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_R_OptimizedParsedData, memoryview]:
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_R_OptimizedParsedData, int]:
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle = kbemath.int82angle(value)
         pd = OnUpdateData_R_OptimizedParsedData(angle)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_R_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_R_OptimizedHandlerResult:
@@ -1364,13 +1347,12 @@ class OnUpdateData_P_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_P_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_P_OptimizedParsedData, memoryview]:
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_P_OptimizedParsedData, int]:
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle = kbemath.int82angle(value)
         pd = OnUpdateData_P_OptimizedParsedData(angle)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_P_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_P_OptimizedHandlerResult:
@@ -1396,16 +1378,14 @@ class OnUpdateData_YP_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_YP_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_YP_OptimizedParsedData, memoryview]:
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_YP_OptimizedParsedData, int]:
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_2 = kbemath.int82angle(value)
         pd = OnUpdateData_YP_OptimizedParsedData(angle_1, angle_2)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_YP_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_YP_OptimizedHandlerResult:
@@ -1432,16 +1412,14 @@ class OnUpdateData_YR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_YR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_YR_OptimizedParsedData, memoryview]:
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_YR_OptimizedParsedData, int]:
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_2 = kbemath.int82angle(value)
         pd = OnUpdateData_YR_OptimizedParsedData(angle_1, angle_2)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_YR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_YR_OptimizedHandlerResult:
@@ -1468,18 +1446,16 @@ class OnUpdateData_PR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_PR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_PR_OptimizedParsedData, memoryview]:
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_PR_OptimizedParsedData, int]:
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_2 = kbemath.int82angle(value)
 
         pd = OnUpdateData_PR_OptimizedParsedData(angle_1, angle_2)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_PR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_PR_OptimizedHandlerResult:
@@ -1507,22 +1483,19 @@ class OnUpdateData_YPR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_YPR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_YPR_OptimizedParsedData, memoryview]:
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_YPR_OptimizedParsedData, int]:
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_2 = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_3 = kbemath.int82angle(value)
 
         pd = OnUpdateData_YPR_OptimizedParsedData(angle_1, angle_2, angle_3)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_YPR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_YPR_OptimizedHandlerResult:
@@ -1550,11 +1523,11 @@ class OnUpdateData_XZ_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XZ_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XZ_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XZ_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
         pd = OnUpdateData_XZ_OptimizedParsedData(v2.x, v2.y)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XZ_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XZ_OptimizedHandlerResult:
@@ -1583,26 +1556,23 @@ class OnUpdateData_XZ_YPR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XZ_YPR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XZ_YPR_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XZ_YPR_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         yaw = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         pitch = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         roll = kbemath.int82angle(value)
 
         pd = OnUpdateData_XZ_YPR_OptimizedParsedData(
             v2.x, v2.y, yaw, pitch, roll
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XZ_YPR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XZ_YPR_OptimizedHandlerResult:
@@ -1629,22 +1599,20 @@ class OnUpdateData_XZ_YP_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XZ_YP_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XZ_YP_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XZ_YP_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         yaw = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         pitch = kbemath.int82angle(value)
 
         pd = OnUpdateData_XZ_YP_OptimizedParsedData(
             v2.x, v2.y, yaw, pitch
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XZ_YP_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XZ_YP_OptimizedHandlerResult:
@@ -1671,22 +1639,20 @@ class OnUpdateData_XZ_YR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XZ_YR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XZ_YR_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XZ_YR_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         yaw = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         roll = kbemath.int82angle(value)
 
         pd = OnUpdateData_XZ_YR_OptimizedParsedData(
             v2.x, v2.y, yaw, roll
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XZ_YR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XZ_YR_OptimizedHandlerResult:
@@ -1713,22 +1679,20 @@ class OnUpdateData_XZ_PR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XZ_PR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XZ_PR_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XZ_PR_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         pitch = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         roll = kbemath.int82angle(value)
 
         pd = OnUpdateData_XZ_PR_OptimizedParsedData(
             v2.x, v2.y, pitch, roll
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XZ_PR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XZ_PR_OptimizedHandlerResult:
@@ -1754,18 +1718,17 @@ class OnUpdateData_XZ_Y_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XZ_Y_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XZ_Y_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XZ_Y_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         yaw = kbemath.int82angle(value)
 
         pd = OnUpdateData_XZ_Y_OptimizedParsedData(
             v2.x, v2.y, yaw
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XZ_Y_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XZ_Y_OptimizedHandlerResult:
@@ -1791,18 +1754,17 @@ class OnUpdateData_XZ_P_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XZ_P_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XZ_P_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XZ_P_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         pitch = kbemath.int82angle(value)
 
         pd = OnUpdateData_XZ_P_OptimizedParsedData(
             v2.x, v2.y, pitch
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XZ_P_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XZ_P_OptimizedHandlerResult:
@@ -1828,18 +1790,17 @@ class OnUpdateData_XZ_R_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XZ_R_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XZ_R_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XZ_R_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         roll = kbemath.int82angle(value)
 
         pd: OnUpdateData_XZ_R_OptimizedParsedData = OnUpdateData_XZ_R_OptimizedParsedData(
             v2.x, v2.y, roll
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XZ_R_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XZ_R_OptimizedHandlerResult:
@@ -1865,12 +1826,12 @@ class OnUpdateData_XYZ_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XYZ_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XYZ_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
-        y, data = _OptimizedXYZReader.read_packed_y(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XYZ_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
+        y, offset = _OptimizedXYZReader.read_packed_y(data, offset)
         pd = OnUpdateData_XYZ_OptimizedParsedData(v2.x, y, v2.y)
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XYZ_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XYZ_OptimizedHandlerResult:
@@ -1901,27 +1862,24 @@ class OnUpdateData_XYZ_YPR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XYZ_YPR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XYZ_YPR_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
-        y, data = _OptimizedXYZReader.read_packed_y(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XYZ_YPR_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
+        y, offset = _OptimizedXYZReader.read_packed_y(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_2 = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_3 = kbemath.int82angle(value)
 
         pd = OnUpdateData_XYZ_YPR_OptimizedParsedData(
             v2.x, y, v2.y, angle_1, angle_2, angle_3
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XYZ_YPR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XYZ_YPR_OptimizedHandlerResult:
@@ -1949,23 +1907,21 @@ class OnUpdateData_XYZ_YP_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XYZ_YP_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XYZ_YP_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
-        y, data = _OptimizedXYZReader.read_packed_y(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XYZ_YP_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
+        y, offset = _OptimizedXYZReader.read_packed_y(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_2 = kbemath.int82angle(value)
 
         pd = OnUpdateData_XYZ_YP_OptimizedParsedData(
             v2.x, y, v2.y, angle_1, angle_2
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XYZ_YP_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XYZ_YP_OptimizedHandlerResult:
@@ -1993,23 +1949,21 @@ class OnUpdateData_XYZ_YR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XYZ_YR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XYZ_YR_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
-        y, data = _OptimizedXYZReader.read_packed_y(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XYZ_YR_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
+        y, offset = _OptimizedXYZReader.read_packed_y(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_2 = kbemath.int82angle(value)
 
         pd = OnUpdateData_XYZ_YR_OptimizedParsedData(
             v2.x, y, v2.y, angle_1, angle_2
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XYZ_YR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XYZ_YR_OptimizedHandlerResult:
@@ -2037,23 +1991,21 @@ class OnUpdateData_XYZ_PR_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XYZ_PR_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XYZ_PR_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
-        y, data = _OptimizedXYZReader.read_packed_y(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XYZ_PR_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
+        y, offset = _OptimizedXYZReader.read_packed_y(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_2 = kbemath.int82angle(value)
 
         pd = OnUpdateData_XYZ_PR_OptimizedParsedData(
             v2.x, y, v2.y, angle_1, angle_2
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XYZ_PR_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XYZ_PR_OptimizedHandlerResult:
@@ -2080,19 +2032,18 @@ class OnUpdateData_XYZ_Y_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XYZ_Y_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XYZ_Y_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
-        y, data = _OptimizedXYZReader.read_packed_y(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XYZ_Y_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
+        y, offset = _OptimizedXYZReader.read_packed_y(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
         pd = OnUpdateData_XYZ_Y_OptimizedParsedData(
             v2.x, y, v2.y, angle_1
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XYZ_Y_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XYZ_Y_OptimizedHandlerResult:
@@ -2119,19 +2070,18 @@ class OnUpdateData_XYZ_P_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XYZ_P_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XYZ_P_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
-        y, data = _OptimizedXYZReader.read_packed_y(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XYZ_P_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
+        y, offset = _OptimizedXYZReader.read_packed_y(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
         pd = OnUpdateData_XYZ_P_OptimizedParsedData(
             v2.x, y, v2.y, angle_1
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XYZ_P_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XYZ_P_OptimizedHandlerResult:
@@ -2158,19 +2108,18 @@ class OnUpdateData_XYZ_R_OptimizedHandlerResult(EntityHandlerResult):
 
 class OnUpdateData_XYZ_R_OptimizedHandler(EntityHandler, _OptimizedHandlerMixin):
 
-    def parse_data(self, data: memoryview, entity_id: int
-                   ) -> tuple[OnUpdateData_XYZ_R_OptimizedParsedData, memoryview]:
-        v2, data = _OptimizedXYZReader.read_packed_xz(data)
-        y, data = _OptimizedXYZReader.read_packed_y(data)
+    def parse_data(self, data: memoryview, offset: int, entity_id: int
+                   ) -> tuple[OnUpdateData_XYZ_R_OptimizedParsedData, int]:
+        v2, offset = _OptimizedXYZReader.read_packed_xz(data, offset)
+        y, offset = _OptimizedXYZReader.read_packed_y(data, offset)
 
-        value, offset = kbetype.INT8.decode(data)
-        data = data[offset:]
+        value, offset = kbetype.INT8.decode_from(data, offset)
         angle_1 = kbemath.int82angle(value)
 
         pd = OnUpdateData_XYZ_R_OptimizedParsedData(
             v2.x, y, v2.y, angle_1
         )
-        return pd, data
+        return pd, offset
 
     def process_parsed_data(self, pd: OnUpdateData_XYZ_R_OptimizedParsedData,
                             entity_id: int) -> OnUpdateData_XYZ_R_OptimizedHandlerResult:
@@ -2198,9 +2147,8 @@ class OnControlEntityHandler(EntityHandler):
 
     def handle(self, msg: Message) -> OnControlEntityHandlerResult:
         data: memoryview = msg.get_values()[0]
-        entity_id, data = self.get_entity_id(data)
-        is_controlled, offset = kbetype.BOOL.decode(data)
-        data = data[offset:]
+        entity_id, offset = self.get_entity_id(data)
+        is_controlled, offset = kbetype.BOOL.decode_from(data, offset)
         # TODO: [2022-09-07 13:44 burov_alexey@mail.ru]:
         # I cannot find the server code that sends the "onControlEntity" message.
         # I think it's legacy code thats why I do nothin in this handler.
@@ -6,9 +6,10 @@ import collections
 import logging
 from typing import Optional, Type
 
+from enki import settings
 from enki.misc import devonly
 from enki.core.enkitype import NoValue
-from enki.core import gedescr
+from enki.core import gedescr, kbetype
 from enki.core.gedescr import EntityDesc
 from enki.core.message import Message
 from enki.core.msgspec import default_kbenginexml
@@ -72,6 +73,24 @@ class EntityHelper:
 
         self._kbenginexml = kbenginexml
 
+        # The numeric mode is installed before the compilation, because
+        # the compiled code doesn't inline the numeric arrays.
+        if settings.NUMERIC_ARRAYS:
+            count = kbetype.numarray.install_all(self._iter_kbetypes())
+            logger.info('[%s] %s arrays are numeric', self, count)
+        if settings.COMPILE_KBE_TYPES:
+            count = kbetype.typecompiler.install_all(self._iter_kbetypes())
+            logger.info('[%s] Decoders of %s types are compiled', self, count)
+
+    def _iter_kbetypes(self):
+        """All types of properties and methods of the entities."""
+        for desc in self._entity_desc_by_uid.values():
+            for prop_desc in desc.property_desc_by_id.values():
+                yield prop_desc.kbetype
+            for methods in (desc.client_methods, desc.base_methods, desc.cell_methods):
+                for method_desc in methods.values():
+                    yield from method_desc.kbetypes
+
     @property
     def is_entitydefAliasID(self) -> bool:
         return self.get_kbenginexml().cellapp.entitydefAliasID \
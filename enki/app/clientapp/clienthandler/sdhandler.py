@@ -53,7 +53,7 @@ class InitSpaceDataHandlerResult(HandlerResult):
 class InitSpaceDataHandler(SpaceDataHandler):
 
     def handle(self, msg: Message) -> InitSpaceDataHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        logger.debug('[%s] (%s)', self, devonly.func_args_values())
         data: memoryview = msg.get_values()[0]
         space_id, offset = kbetype.SPACE_ID.decode(data)
         data = data[offset:]
@@ -92,7 +92,7 @@ class SetSpaceDataHandlerResult(HandlerResult):
 class SetSpaceDataHandler(SpaceDataHandler):
 
     def handle(self, msg: Message) -> SetSpaceDataHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        logger.debug('[%s] (%s)', self, devonly.func_args_values())
         pd = SetSpaceDataParsedData(*msg.get_values())
         self._space_data_mgr.set_data(pd.space_id, pd.key, pd.value)
         return SetSpaceDataHandlerResult(True, pd)
@@ -113,7 +113,7 @@ class DelSpaceDataHandlerResult(HandlerResult):
 class DelSpaceDataHandler(SpaceDataHandler):
 
     def handle(self, msg: Message) -> DelSpaceDataHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        logger.debug('[%s] (%s)', self, devonly.func_args_values())
         pd = DelSpaceDataParsedData(*msg.get_values())
         self._space_data_mgr.del_data(pd.space_id, pd.key)
         return DelSpaceDataHandlerResult(True, pd)
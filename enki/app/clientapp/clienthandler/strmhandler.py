@@ -88,7 +88,7 @@ class OnStreamDataStartedHandlerResult(HandlerResult):
 class OnStreamDataStartedHandler(StreamDataHandler):
 
     def handle(self, msg: Message) -> OnStreamDataStartedHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        logger.debug('[%s] (%s)', self, devonly.func_args_values())
         stream_id, datasize, descr, type_code = msg.get_values()
         stream_type = kbeenum.DataDownloadType(type_code)
 
@@ -118,7 +118,7 @@ class OnStreamDataRecvHandlerResult(HandlerResult):
 class OnStreamDataRecvHandler(StreamDataHandler):
 
     def handle(self, msg: Message) -> OnStreamDataRecvHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        logger.debug('[%s] (%s)', self, devonly.func_args_values())
         data: memoryview = msg.get_values()[0]
         stream_id, offset = kbetype.INT16.decode(data)
         data = data[offset:]
@@ -149,7 +149,7 @@ class OnStreamDataCompletedHandlerResult(HandlerResult):
 class OnStreamDataCompletedHandler(StreamDataHandler):
 
     def handle(self, msg: Message) -> OnStreamDataCompletedHandlerResult:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        logger.debug('[%s] (%s)', self, devonly.func_args_values())
         stream_id = msg.get_values()[0]
 
         self._stream_data_mgr.on_stream_completed(stream_id)
@@ -14,6 +14,7 @@ from typing import Callable, Any, Type
 
 from enki.misc import devonly
 from enki import settings
+from enki.core import metrics
 from enki.core.enkitype import NoValue
 from enki.core.message import Message
 
@@ -32,6 +33,30 @@ logger = logging.getLogger(__name__)
 class QueueCallbackItem:
     callback: Callable
     args: tuple[Any, ...]
+    # Момент постановки в очередь (time.perf_counter_ns)
+    enqueued_ns: int = 0
+
+
+def _callback_name(callback: Callable) -> str:
+    return getattr(callback, '__name__', None) or type(callback).__name__
+
+
+def _put_in_game_queue(game_queue: queue.Queue[QueueCallbackItem],
+                      callback: Callable, args: tuple):
+    """Put the callback to the queue of the game thread (without blocking).
+
+    The item is stamped by the time of putting. If the metrics are on,
+    the depth of the queue is recorded per callback (only for the put items).
+    """
+    registry = metrics.registry
+    depth = game_queue.qsize() if registry is not None else 0
+    try:
+        game_queue.put_nowait(QueueCallbackItem(callback, args, time.perf_counter_ns()))
+    except queue.Full:
+        raise
+    else:
+        if registry is not None:
+            registry.on_enqueued(_callback_name(callback), depth)
 
 
 class GameState:
@@ -103,9 +128,8 @@ class ThreadedGameLayer(IGameLayer):
     # TODO: [2023-01-18 10:24 burov_alexey@mail.ru]:
     # Этот метод в каждом слое есть. Нужно разобраться и оставить только в одном.
     def call_in_game_thread(self, callback, args):
-        item = QueueCallbackItem(callback, args)
         try:
-            self._queue.put_nowait(item)
+            _put_in_game_queue(self._queue, callback, args)
         except queue.Full as err:
             logger.error('[%s] %s', self, devonly.func_args_values(), exc_info=True)
             # TODO: [2022-11-22 11:24 burov_alexey@mail.ru]:
@@ -144,7 +168,17 @@ class ThreadedGameLayer(IGameLayer):
                     item = self._queue.get(block=True, timeout=net_frame)
                 except queue.Empty:
                     continue
-                item.callback(*item.args)
+                registry = metrics.registry
+                if registry is None:
+                    item.callback(*item.args)
+                else:
+                    # Время в очереди показывает, успевает ли игровой трэд
+                    # за сетевым (см. GAME_TICK)
+                    started = time.perf_counter_ns()
+                    item.callback(*item.args)
+                    registry.on_dequeued(_callback_name(item.callback),
+                                         started - item.enqueued_ns,
+                                         time.perf_counter_ns() - started)
                 cntr += 1
             time.sleep(net_frame)
 
@@ -327,9 +361,8 @@ class ThreadedNetLayer(INetLayer):
         return ilayer.get_game_layer() # type: ignore
 
     def call_in_game_thread(self, callback, args):
-        item = QueueCallbackItem(callback, args)
         try:
-            self._queue.put_nowait(item)
+            _put_in_game_queue(self._queue, callback, args)
         except queue.Full as err:
             logger.error('[%s] %s', self, devonly.func_args_values())
             # TODO: [2022-11-22 11:24 burov_alexey@mail.ru]:
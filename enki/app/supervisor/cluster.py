@@ -0,0 +1,310 @@
+"""Supervisor из нескольких процессов.
+
+Процессы-обработчики (workers) слушают одни и те же UDP и TCP порты
+(SO_REUSEPORT), ядро распределяет между ними датаграммы и соединения.
+У каждого обработчика своя копия хранилища компонентов. Изменения хранилища
+(регистрация и отмена регистрации компонентов) обработчик применяет сразу
+и пересылает ведущему процессу (leader), а тот рассылает их всем
+обработчикам, отправителю тоже. Все копии получают изменения в одном
+порядке - порядке ведущего процесса, поэтому сходятся к одному состоянию.
+
+Идентификаторы компонентов обработчики генерируют без согласования:
+у каждого обработчика свой непересекающийся ряд значений.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import socket
+import sys
+from asyncio import StreamReader, StreamWriter
+from multiprocessing.process import BaseProcess
+
+from enki import settings
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.kbeenum import ComponentType
+from enki.core.message import Message, MessageSerializer
+from enki.handler.serverhandler.machinehandler import OnBroadcastInterfaceHandler
+from enki.handler.serverhandler.supervisorhandler import OnStopComponentHandler
+from enki.misc import evloop, log
+from enki.net import server
+from enki.net.framedecoder import FrameDecoder
+
+from .supervisorapp import ComponentInfo, ComponentStorage, Supervisor
+
+logger = logging.getLogger(__name__)
+
+# Изменения хранилища передаются сообщениями Supervisor: регистрация -
+# Machine::onBroadcastInterface, отмена регистрации - Supervisor::onStopComponent
+_SERIALIZER = MessageSerializer({
+    msgspec.app.machine.onBroadcastInterface.id: msgspec.app.machine.onBroadcastInterface,
+    msgspec.app.supervisor.onStopComponent.id: msgspec.app.supervisor.onStopComponent,
+})
+
+
+class _LeaderLink:
+    """Connection of the worker to the leader."""
+
+    def __init__(self, writer: StreamWriter):
+        self._writer = writer
+
+    def send(self, msg: Message):
+        if self._writer.is_closing():
+            logger.warning('[%s] The leader is unavailable, the change is not '
+                           'replicated (msg=%s)', self, msg)
+            return
+        self._writer.write(_SERIALIZER.serialize(msg))
+
+    def close(self):
+        self._writer.close()
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}()'
+
+
+class ReplicaComponentStorage(ComponentStorage):
+    """Копия хранилища компонентов в процессе-обработчике.
+
+    Изменения применяются сразу (обработчик видит свои изменения) и
+    отправляются ведущему процессу. Изменения от ведущего процесса
+    применяются методом apply.
+    """
+
+    def __init__(self, app: Supervisor, link: _LeaderLink) -> None:
+        super().__init__(app)
+        self._link = link
+
+    def register_component(self, comp_info: ComponentInfo):
+        super().register_component(comp_info)
+        self._link.send(Message(msgspec.app.machine.onBroadcastInterface,
+                                comp_info.values()))
+
+    def deregister_single_component(self, comp_type: ComponentType):
+        infos = self.get_component_info(comp_type)
+        super().deregister_single_component(comp_type)
+        if infos:
+            self._link.send(Message(msgspec.app.supervisor.onStopComponent,
+                                    (infos[0].componentID, )))
+
+    def deregister_multiple_component(self, comp_id: int):
+        registered = self.get_comp_info_by_comp_id(comp_id) is not None
+        super().deregister_multiple_component(comp_id)
+        if registered:
+            self._link.send(Message(msgspec.app.supervisor.onStopComponent,
+                                    (comp_id, )))
+
+    def apply(self, msg: Message):
+        """Apply the change sent by the leader."""
+        if msg.id == msgspec.app.machine.onBroadcastInterface.id:
+            pd = OnBroadcastInterfaceHandler().handle(msg).result
+            assert pd is not None
+            super().register_component(pd)
+            return
+
+        comp_id = OnStopComponentHandler().handle(msg).result.componentID
+        info = self.get_comp_info_by_comp_id(comp_id)
+        if info is None:
+            # Изменение уже применено (например, это изменение самого обработчика)
+            return
+        if info.component_type.is_multiple_type():
+            super().deregister_multiple_component(comp_id)
+        else:
+            super().deregister_single_component(info.component_type)
+        if info.component_type == ComponentType.MACHINE \
+                and not self._app.server_is_running.done():
+            # Supervisor остановили через другой обработчик
+            logger.info('[%s] Supervisor is stopping. Start finalization', self)
+            asyncio.create_task(self._app.stop())
+
+
+class WorkerSupervisor(Supervisor):
+    """Supervisor в процессе-обработчике кластера."""
+
+    def __init__(self, index: int, workers: int, link: _LeaderLink,
+                 udp_addr: AppAddr, tcp_addr: AppAddr,
+                 internal_tcp_addr: AppAddr) -> None:
+        self._index = index
+        self._link = link
+        super().__init__(udp_addr, tcp_addr, internal_tcp_addr, reuse_port=True)
+        # Первый идентификатор у всех обработчиков одинаковый (это сам
+        # Supervisor), дальше у каждого обработчика свой ряд значений
+        self._component_id_cntr += index
+        self._component_id_step = workers
+
+    @property
+    def comp_storage(self) -> ReplicaComponentStorage:
+        assert isinstance(self._comp_storage, ReplicaComponentStorage)
+        return self._comp_storage
+
+    def _create_comp_storage(self) -> ComponentStorage:
+        return ReplicaComponentStorage(self, self._link)
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}(index={self._index})'
+
+
+async def _serve_worker(index: int, workers: int, udp_addr: AppAddr,
+                        tcp_addr: AppAddr, internal_tcp_addr: AppAddr,
+                        sock: socket.socket) -> bool:
+    reader, writer = await asyncio.open_connection(sock=sock)
+    link = _LeaderLink(writer)
+    app = WorkerSupervisor(index, workers, link, udp_addr, tcp_addr, internal_tcp_addr)
+    res = await app.start()
+    if not res.success:
+        logger.error('[%s] Supervisor cannot start. Error %s', app, res.text)
+        link.close()
+        return False
+
+    async def read_changes():
+        decoder = FrameDecoder(_SERIALIZER)
+        while data := await reader.read(settings.TCP_CHUNK_SIZE):
+            for msg in decoder.feed(data):
+                app.comp_storage.apply(msg)
+
+    read_task = asyncio.create_task(read_changes())
+    await asyncio.wait({app.server_is_running, read_task},
+                       return_when=asyncio.FIRST_COMPLETED)
+    if not app.server_is_running.done():
+        logger.error('[%s] The leader is unavailable. Stop the worker', app)
+        await app.stop()
+    read_task.cancel()
+    link.close()
+    return True
+
+
+def _worker_main(index: int, workers: int, udp_addr: AppAddr, tcp_addr: AppAddr,
+                 internal_tcp_addr: AppAddr, sock: socket.socket,
+                 leader_socks: list[socket.socket]):
+    # Сокеты ведущего процесса, унаследованные через fork, не нужны.
+    # Иначе ведущий процесс не узнает о закрытии соединения обработчиком.
+    for leader_sock in leader_socks:
+        leader_sock.close()
+    try:
+        success = evloop.run(_serve_worker(
+            index, workers, udp_addr, tcp_addr, internal_tcp_addr, sock
+        ))
+    finally:
+        # Процесс multiprocessing завершается без atexit, записи из очереди
+        # журнала (LOG_QUEUE_SIZE) нужно дописать здесь
+        log.stop_listener()
+    sys.exit(0 if success else 1)
+
+
+class SupervisorCluster:
+    """Ведущий процесс Supervisor из нескольких процессов-обработчиков.
+
+    Ведущий процесс не обслуживает компоненты, он создаёт обработчики
+    (spawn) и пересылает им изменения хранилища компонентов (run).
+    Если один из обработчиков завершился с ошибкой, завершаются все.
+    """
+
+    def __init__(self, udp_addr: AppAddr, tcp_addr: AppAddr, workers: int):
+        assert workers > 0, 'At least one worker is needed'
+        self._udp_addr = AppAddr(server.get_real_host_ip(udp_addr.host), udp_addr.port)
+        self._tcp_addr = AppAddr(server.get_real_host_ip(tcp_addr.host), tcp_addr.port)
+        # Внутренний TCP порт тоже общий у всех обработчиков
+        self._internal_tcp_addr = AppAddr(self._tcp_addr.host, server.get_free_port())
+        self._workers = workers
+
+        self._processes: list[BaseProcess] = []
+        self._socks: list[socket.socket] = []
+        self._writers: list[StreamWriter] = []
+        self._stopping = False
+
+    @property
+    def internal_tcp_addr(self) -> AppAddr:
+        return self._internal_tcp_addr.copy()
+
+    @property
+    def processes(self) -> list[BaseProcess]:
+        return list(self._processes)
+
+    def spawn(self):
+        """Start the worker processes (fork).
+
+        It's called before the event loop of the leader runs: the forked
+        process would inherit the running loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError('The workers must be spawned before the event loop runs')
+        ctx = multiprocessing.get_context('fork')
+        for index in range(self._workers):
+            leader_sock, worker_sock = socket.socketpair()
+            process = ctx.Process(
+                target=_worker_main,
+                name=f'supervisor-worker-{index}',
+                args=(index, self._workers, self._udp_addr, self._tcp_addr,
+                      self._internal_tcp_addr, worker_sock,
+                      self._socks + [leader_sock]),
+                daemon=True
+            )
+            process.start()
+            worker_sock.close()
+            self._socks.append(leader_sock)
+            self._processes.append(process)
+        logger.info('[%s] %s workers have been started', self, self._workers)
+
+    async def run(self) -> bool:
+        """Relay the changes of the registry until the workers stop.
+
+        Returns False if a worker exited with an error.
+        """
+        loop = asyncio.get_running_loop()
+        streams = [await asyncio.open_connection(sock=sock) for sock in self._socks]
+        self._writers = [writer for _, writer in streams]
+        loop.add_signal_handler(signal.SIGTERM, self.stop)
+        try:
+            results = await asyncio.gather(*(
+                self._relay(index, reader) for index, (reader, _) in enumerate(streams)
+            ))
+        finally:
+            loop.remove_signal_handler(signal.SIGTERM)
+            for writer in self._writers:
+                writer.close()
+        return all(results)
+
+    def stop(self):
+        """Terminate the workers."""
+        self._stopping = True
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+
+    async def _relay(self, index: int, reader: StreamReader) -> bool:
+        decoder = FrameDecoder(_SERIALIZER)
+        try:
+            while data := await reader.read(settings.TCP_CHUNK_SIZE):
+                for msg in decoder.feed(data):
+                    self._broadcast(msg)
+        except ConnectionError as err:
+            # Запись в соединение уже завершившегося обработчика
+            logger.debug('[%s] %s', self, err)
+
+        # Обработчик закрыл соединение, значит он завершается
+        process = self._processes[index]
+        await asyncio.get_running_loop().run_in_executor(None, process.join)
+        if process.exitcode == 0:
+            return True
+        if self._stopping and process.exitcode == -signal.SIGTERM:
+            return True
+        logger.error('[%s] The worker "%s" exited with code %s. Stop all workers',
+                     self, process.name, process.exitcode)
+        self.stop()
+        return False
+
+    def _broadcast(self, msg: Message):
+        data = _SERIALIZER.serialize(msg)
+        for writer in self._writers:
+            if not writer.is_closing():
+                writer.write(data)
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}(workers={self._workers})'
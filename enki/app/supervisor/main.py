@@ -1,11 +1,12 @@
-import asyncio
 import logging
 import sys
 
-from enki.misc import log
+from enki.misc import evloop, log
 from enki.core.enkitype import AppAddr
+from enki.net import metricsexport
 
 from enki.app.supervisor.supervisorapp import Supervisor
+from enki.app.supervisor.cluster import SupervisorCluster
 from enki.app.supervisor import settings
 
 logger = logging.getLogger(__name__)
@@ -26,21 +27,51 @@ async def main():
         udp_addr=AppAddr(settings.KBE_MACHINE_HOST, UDP_PORT),
         tcp_addr=AppAddr(settings.KBE_MACHINE_HOST, settings.KBE_MACHINE_TCP_PORT),
     )
+    exporter = metricsexport.exporter_from_settings()
     try:
         res = await app.start()
         if not res.success:
             logger.error('UDP server cannot start. Error %s', res.text)
             sys.exit(1)
+        if exporter is not None:
+            res = await exporter.start()
+            if not res.success:
+                logger.error('Metrics cannot be exported. Error %s', res.text)
 
         await app.server_is_running
+        if exporter is not None:
+            await exporter.stop()
         logger.info('Supervisor stopped')
     except Exception as err:
         logger.error(err, exc_info=True)
         await app.stop()
 
 
+def main_cluster():
+    """Supervisor из нескольких процессов (SUPERVISOR_WORKERS > 1)."""
+    log.setup_root_logger(logging.getLevelName(settings.LOG_LEVEL), LOG_FORMAT)
+    cluster = SupervisorCluster(
+        udp_addr=AppAddr(settings.KBE_MACHINE_HOST, UDP_PORT),
+        tcp_addr=AppAddr(settings.KBE_MACHINE_HOST, settings.KBE_MACHINE_TCP_PORT),
+        workers=settings.SUPERVISOR_WORKERS
+    )
+    # Обработчики создаются до запуска цикла событий ведущего процесса
+    cluster.spawn()
+    try:
+        success = evloop.run(cluster.run())
+    except KeyboardInterrupt:
+        cluster.stop()
+        return
+    logger.info('Supervisor stopped')
+    if not success:
+        sys.exit(1)
+
+
 if __name__ == '__main__':
+    if settings.SUPERVISOR_WORKERS > 1:
+        main_cluster()
+        sys.exit(0)
     try:
-        asyncio.run(main())
+        evloop.run(main())
     except KeyboardInterrupt:
         pass
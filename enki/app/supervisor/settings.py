@@ -8,3 +8,6 @@ _env = environs.Env()
 
 KBE_MACHINE_TCP_PORT: int = _env.int('KBE_MACHINE_TCP_PORT')
 KBE_MACHINE_HOST: str = _env.str('KBE_MACHINE_HOST')
+# Число процессов Supervisor, слушающих одни и те же порты (SO_REUSEPORT).
+# При 1 Supervisor работает в одном процессе (см. supervisor.cluster)
+SUPERVISOR_WORKERS: int = _env.int('SUPERVISOR_WORKERS', 1)
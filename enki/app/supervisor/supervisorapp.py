@@ -3,11 +3,12 @@
 from __future__ import annotations
 import abc
 import logging
+import time
 from asyncio import Future
 from typing import Optional
 
 from enki.core import msgspec
-from enki.core import kbemath
+from enki.core import kbemath, metrics
 from enki.core.kbeenum import ComponentState, ComponentType
 from enki.core.message import Message, MessageSerializer
 from enki.handler.serverhandler.supervisorhandler import OnStopComponentHandler
@@ -16,7 +17,7 @@ from enki.misc import devonly
 from enki.core.enkitype import AppAddr, Result
 from enki.core import msgspec
 from enki.net.channel import TCPChannel, UDPChannel
-from enki.net import server
+from enki.net import server, sockopt
 from enki.net.server import TCPServer, UDPMsgServer
 from enki.net.inet import ChannelType, IChannel, IServerMsgReceiver, \
     ChannelType, IStartable
@@ -60,6 +61,10 @@ class ComponentStorage:
     def register_component(self, comp_info: ComponentInfo):
         comp_type = comp_info.component_type
         comp_id = comp_info.componentID
+        if self._comp_info_by_comp_id.get(comp_id) == comp_info:
+            # Повторная регистрация с теми же данными (KBEngine отправляет
+            # сообщение регистрации дважды, реплики получают свои же изменения)
+            return
         if comp_type in self._single_comp_info_by_type:
             old_pd = self._single_comp_info_by_type.get(comp_type)
             # При запуске компонентов KBEngine отправляется два сообщения
@@ -142,8 +147,15 @@ class ComponentStorage:
 
 
 class Supervisor(IStartable, IServerMsgReceiver):
+    """Supervisor.
+
+    По умолчанию внутренний TCP сервер слушает свободный порт. С reuse_port
+    порты могут слушать несколько процессов Supervisor (см. supervisor.cluster).
+    """
 
-    def __init__(self, udp_addr: AppAddr, tcp_addr: AppAddr) -> None:
+    def __init__(self, udp_addr: AppAddr, tcp_addr: AppAddr,
+                 internal_tcp_addr: Optional[AppAddr] = None,
+                 reuse_port: bool = False) -> None:
         logger.debug('[%s] %s', self, devonly.func_args_values())
         self._server_is_running = Future()
 
@@ -155,21 +167,27 @@ class Supervisor(IStartable, IServerMsgReceiver):
 
         self._udp_addr = udp_addr
         self._tcp_addr = tcp_addr
-        self._internal_tcp_addr = AppAddr(tcp_addr.host, server.get_free_port())
+        if internal_tcp_addr is None:
+            internal_tcp_addr = AppAddr(tcp_addr.host, server.get_free_port())
+        self._internal_tcp_addr = internal_tcp_addr
 
         # Сервера для обслуживания соединений.
         # Добавим к сообщениям Machine расширение от Supervisor
         spec_by_id = msgspec.app.machine.SPEC_BY_ID.copy()
         spec_by_id.update(msgspec.app.supervisor.SPEC_BY_ID)
-        self._udp_server = UDPMsgServer(udp_addr, spec_by_id, self)
-        self._tcp_server = TCPServer(tcp_addr, spec_by_id, self)
-        self._internal_tcp_server = TCPServer(self._internal_tcp_addr, msgspec.app.machine.SPEC_BY_ID, self)
+        udp_options = sockopt.udp_options(reuse_port=reuse_port)
+        tcp_options = sockopt.tcp_options(reuse_port=reuse_port)
+        self._udp_server = UDPMsgServer(udp_addr, spec_by_id, self, socket_options=udp_options)
+        self._tcp_server = TCPServer(tcp_addr, spec_by_id, self, socket_options=tcp_options)
+        self._internal_tcp_server = TCPServer(self._internal_tcp_addr, msgspec.app.machine.SPEC_BY_ID,
+                                              self, socket_options=tcp_options)
 
         # Уникальный идентификатор компонента, генерируемый Машиной
         self._component_id_cntr = 0
+        self._component_id_step = 1
 
         # Хранилище данных о компонентах
-        self._comp_storage = ComponentStorage(self)
+        self._comp_storage = self._create_comp_storage()
 
         # Обработчики сообщений
         self._handlers = {
@@ -222,9 +240,12 @@ class Supervisor(IStartable, IServerMsgReceiver):
     def server_is_running(self) -> Future:
         return self._server_is_running
 
+    def _create_comp_storage(self) -> ComponentStorage:
+        return ComponentStorage(self)
+
     def generate_component_id(self) -> int:
         while True:
-            self._component_id_cntr += 1
+            self._component_id_cntr += self._component_id_step
             comp_id = self._component_id_cntr
             if self._comp_storage.get_comp_info_by_comp_id(comp_id) is None:
                 break
@@ -261,6 +282,9 @@ class Supervisor(IStartable, IServerMsgReceiver):
         return Result(True, None)
 
     async def stop(self):
+        if self._server_is_running.done():
+            logger.warning('[%s] Supervisor has been already stopped', self)
+            return
         self._udp_server.stop()
         await self._tcp_server.stop()
 
@@ -276,7 +300,14 @@ class Supervisor(IStartable, IServerMsgReceiver):
         if handler is None:
             logger.warning('[%s] There is no handler for the message %s', self, msg.id)
             return
+        registry = metrics.registry
+        if registry is None or not registry.time_next():
+            await handler.handle(msg, channel)
+            return
+        # Время обработчика вместе с ожиданием (например, ответа компонента)
+        start = time.perf_counter_ns()
         await handler.handle(msg, channel)
+        registry.on_handled(msg.name, time.perf_counter_ns() - start)
 
     def __str__(self) -> str:
         return f'{self.__class__.__name__}()'
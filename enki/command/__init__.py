@@ -2,4 +2,4 @@
 
 from . import loginapp, baseapp
 from ._base import TCPCommand, CommandResult, ICommand
-from .common import RequestCommand
+from .common import ConnectionPool, RequestCommand
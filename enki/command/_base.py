@@ -102,7 +102,7 @@ class TCPCommand(IAwaitableCommand, IClientMsgReceiver):
         The method returns True if the command is waiting for the message.
         I.e. the message will be handled.
         """
-        logger.debug(f'[{self}]  ({devonly.func_args_values()})')
+        logger.debug('[%s]  (%s)', self, devonly.func_args_values())
         req_data = self._req_data_by_msg_id.get(msg.id, None)
         if req_data is None:
             logger.debug(
@@ -144,7 +144,7 @@ class TCPCommand(IAwaitableCommand, IClientMsgReceiver):
     def _waiting_for(self, timeout: float = settings.WAITING_FOR_SERVER_TIMEOUT
                     ) -> Coroutine[None, None, Optional[Message]]:
         """Waiting for a response on the sent message."""
-        logger.debug(f'[{self}]  ({devonly.func_args_values()})')
+        logger.debug('[%s]  (%s)', self, devonly.func_args_values())
         awaitable_data = _RequestData(
             sent_msg_spec=self._req_msg_spec,
             success_msg_spec=self._success_resp_msg_spec,
@@ -368,11 +368,13 @@ class ForwardEntityMessageToCellappFromClientCommand(_base.TCPCommand):
         self._error_resp_msg_specs = []
 
     async def execute(self):
-        data = kbetype.ENTITY_ID.encode(self._entity_id)
+        data = bytearray()
+        kbetype.ENTITY_ID.encode_into(data, self._entity_id)
+        serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
         for msg in self._msgs:
-            data += MessageSerializer(msgspec.app.client.SPEC_BY_ID).serialize(msg)
+            serializer.serialize_into(msg, data)
         envelope_msg = Message(
-            self._req_msg_spec, (data, )
+            self._req_msg_spec, (bytes(data), )
         )
         await self._client.send_msg(envelope_msg)
         return CommandResult(True, None, '')
@@ -2,8 +2,7 @@ import asyncio
 from asyncio import Future
 from dataclasses import dataclass
 import logging
-import time
-from typing import Any
+from typing import Optional
 
 from enki import settings
 from enki.core import utils
@@ -24,22 +23,76 @@ class RequestCommandResult:
     text: str = ''
 
 
+class ConnectionPool:
+    """Keep-alive TCP connections of RequestCommand by the address.
+
+    For components serving many requests in one connection. The connection
+    serves one request at a time, after the request it waits for the next
+    one (up to "max_idle" connections by the address).
+    """
+
+    def __init__(self, max_idle: int = 4):
+        self._max_idle = max_idle
+        self._idle_by_addr: dict[tuple[str, int], list[TCPClient]] = {}
+
+    async def acquire(self, addr: AppAddr) -> tuple[TCPClient, Result]:
+        """Get an idle connection or open a new one."""
+        idle = self._idle_by_addr.get(addr.to_tuple(), [])
+        while idle:
+            client = idle.pop()
+            # Сервер мог закрыть соединение, пока оно простаивало
+            if client.is_alive:
+                return client, Result(True, None)
+        client = TCPClient(addr)
+        return client, await client.start()
+
+    def release(self, client: TCPClient, addr: AppAddr):
+        """Return the connection to the pool after the request."""
+        client.set_on_receive_data(lambda data: None)
+        idle = self._idle_by_addr.setdefault(addr.to_tuple(), [])
+        if not client.is_alive or len(idle) >= self._max_idle:
+            client.stop()
+            return
+        idle.append(client)
+
+    def close(self):
+        for idle in self._idle_by_addr.values():
+            for client in idle:
+                client.stop()
+        self._idle_by_addr.clear()
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}()'
+
+
 class RequestCommand(ICommand):
     """Команда для одноразового запроса на сервер.
 
-    Запрос совершается через TCP соединение.
+    Запрос совершается через TCP соединение. Команда завершается, когда
+    получено ожидаемое число ответов (expected_count или первая часть данных
+    при stop_on_first_data_chunk), сервер закрыл соединение или истёк таймаут.
+    С пулом (pool) соединение после ответа не закрывается, а используется
+    следующими командами на тот же адрес.
     """
 
     def __init__(self, addr: AppAddr, req_msg: Message, resp_msg_spec: MsgDescr,
                  timeout=settings.WAITING_FOR_SERVER_TIMEOUT,
-                 stop_on_first_data_chunk=False):
-        self._client = TCPClient(addr, on_receive_data=self.on_receive_data)
+                 stop_on_first_data_chunk=False, expected_count: Optional[int] = None,
+                 pool: Optional[ConnectionPool] = None):
+        self._addr = addr
+        self._client: Optional[TCPClient] = None
         self._req_msg = req_msg
         self._resp_msg_spec = resp_msg_spec
         self._timeout = timeout
-        self._stop_on_first_data_chunk = stop_on_first_data_chunk
+        if stop_on_first_data_chunk:
+            expected_count = 1
+        self._expected_count = expected_count
+        # Без ожидаемого числа ответов конец ответа - закрытие соединения,
+        # такое соединение не переиспользуется
+        self._pool = pool if expected_count is not None else None
 
         self._response_msgs: list[Message] = []
+        self._received: Optional[Future] = None
 
     def on_receive_data(self, data: bytes):
         logger.debug('[%s] %s', self, devonly.func_args_values())
@@ -52,40 +105,57 @@ class RequestCommand(ICommand):
             logger.warning('[%s] Not all data has been deserialized (data_tail=%s)',
                            self, data_tail.tobytes())
         self._response_msgs.append(msg)
-        if self._stop_on_first_data_chunk:
-            self._client.stop()
+        if self._expected_count is not None and len(self._response_msgs) >= self._expected_count:
+            if self._received is not None and not self._received.done():
+                self._received.set_result(None)
+
+    async def _connect(self) -> tuple[TCPClient, Result]:
+        if self._pool is not None:
+            client, res = await self._pool.acquire(self._addr)
+        else:
+            client = TCPClient(self._addr)
+            res = await client.start()
+        client.set_on_receive_data(self.on_receive_data)
+        return client, res
 
     async def execute(self) -> RequestCommandResult:
         logger.debug('[%s] %s', self, devonly.func_args_values())
-        res = await self._client.start()
+        self._received = asyncio.get_running_loop().create_future()
+        client, res = await self._connect()
         if not res.success:
             return RequestCommandResult(False, [], res.text)
+        self._client = client
         serializer = utils.get_serializer_for(
             self._req_msg.spec.component_type)
         data = serializer.serialize(self._req_msg)
-        success = await self._client.send(data)
+        success = await client.send(data)
         if not success:
+            client.stop()
             return RequestCommandResult(False, [], 'The data hasn`t been sent (see log)')
 
-        timeout_time = time.time() + self._timeout
-        while timeout_time > time.time() and self._client.is_alive:
-            await asyncio.sleep(settings.GAME_TICK)
+        # Ждём ожидаемых ответов или закрытия соединения, без опроса
+        await asyncio.wait({self._received, client.closed}, timeout=self._timeout,
+                           return_when=asyncio.FIRST_COMPLETED)
+
+        if self._received.done():
+            if self._pool is not None:
+                self._pool.release(client, self._addr)
+            else:
+                client.stop()
+            return RequestCommandResult(True, self._response_msgs)
 
-        if not self._client.is_alive and not self._response_msgs:
+        if not client.is_alive and not self._response_msgs:
             # Соединение закрыто, ответа не было
             return RequestCommandResult(
                 False, [],
                 f'The server closed the connection (message = "{self._req_msg}")'
             )
 
+        # Соединение закрыто или истёк таймаут. Неполный ответ соединение
+        # не переиспользует.
+        client.stop()
         if not self._response_msgs:
-            # По таймауту цикл завершился. Ответ так и не прислали, состояние
-            # соединения не имеет значения.
-            self._client.stop()
             return RequestCommandResult(False, [], f'No response for the message "{self._req_msg}"')
 
         # Есть ответ от сервера
-        self._client.stop()
-        res = self._response_msgs
-
-        return RequestCommandResult(True, res)
+        return RequestCommandResult(True, self._response_msgs)
@@ -1,3 +1,7 @@
 from .plugintype import *
 from .typeserializers import *
 from .typeserializers import _EntityComponent
+from .fieldscodec import FieldsCodec
+from . import typecompiler
+from . import numarray
+from .numarray import NumericArray
@@ -0,0 +1,173 @@
+"""Compiled codec of a sequence of KBE types (e.g. fields of a message).
+
+Fields of the most of messages are fixed size primitive types (INT32, UINT16,
+FLOAT etc). Instead of decoding every field by its own type (a struct call and
+a slice of memoryview per field) the consecutive primitive fields are merged
+into one precomputed struct.Struct. So the message with only primitive fields
+is decoded / encoded by one struct call. BOOL (always one byte) joins the run
+too, its value is converted after unpacking. The fields of other types
+(STRING, BLOB etc) break the run and are decoded by their own types.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, Optional, Sequence, Tuple
+
+from .typeserializers import IKBEType, _BoolType, _PrimitiveKBEType
+
+
+class _Run:
+    """Consecutive fields decoded by one struct.Struct or one not primitive type."""
+
+    __slots__ = ('struct', 'kbe_type', 'count', 'normalizers', 'converters')
+
+    def __init__(self, struct_: Optional[struct.Struct],
+                 kbe_type: Optional[IKBEType], count: int,
+                 normalizers: tuple = tuple(), converters: tuple = tuple()):
+        self.struct = struct_
+        self.kbe_type = kbe_type
+        self.count = count
+        # Пары (индекс в прогоне, функция) для значений, которые нужно
+        # подготовить перед упаковкой (например, FLOAT).
+        self.normalizers = normalizers
+        # Пары (индекс в прогоне, функция) для значений, которые нужно
+        # преобразовать после распаковки (BOOL).
+        self.converters = converters
+
+
+def _has_own_normalize(kbe_type: _PrimitiveKBEType) -> bool:
+    return type(kbe_type).normalize is not _PrimitiveKBEType.normalize
+
+
+class FieldsCodec:
+    """Decoder / encoder of a sequence of KBE types compiled to struct runs."""
+
+    def __init__(self, field_types: Sequence[IKBEType]):
+        self._field_types = tuple(field_types)
+        self._runs: tuple[_Run, ...] = self._compile(self._field_types)
+        # If all fields are fixed size the whole sequence is one struct.
+        self._layout: Optional[struct.Struct] = None
+        if len(self._runs) == 1 and self._runs[0].struct is not None:
+            self._layout = self._runs[0].struct
+        # The struct decoding the fields without conversion of the values
+        self._struct: Optional[struct.Struct] = None
+        if self._layout is not None and not self._runs[0].converters:
+            self._struct = self._layout
+
+    @staticmethod
+    def _compile(field_types: tuple[IKBEType, ...]) -> tuple[_Run, ...]:
+        runs: list[_Run] = []
+        fmts: list[str] = []
+        normalizers: list[tuple[int, Any]] = []
+        converters: list[tuple[int, Any]] = []
+
+        def close_run():
+            if not fmts:
+                return
+            runs.append(_Run(struct.Struct('=' + ''.join(fmts)), None,
+                             len(fmts), tuple(normalizers), tuple(converters)))
+            fmts.clear()
+            normalizers.clear()
+            converters.clear()
+
+        for kbe_type in field_types:
+            if isinstance(kbe_type, _PrimitiveKBEType):
+                if _has_own_normalize(kbe_type):
+                    normalizers.append((len(fmts), kbe_type.normalize))
+                fmts.append(kbe_type.fmt.lstrip('=<>!@'))
+                continue
+            if isinstance(kbe_type, _BoolType):
+                # Один байт, как и у INT8; значение приводится к bool
+                normalizers.append((len(fmts), kbe_type.normalize))
+                converters.append((len(fmts), kbe_type.from_int8))
+                fmts.append(kbe_type.fmt.lstrip('=<>!@'))
+                continue
+            close_run()
+            runs.append(_Run(None, kbe_type, 1))
+        close_run()
+
+        return tuple(runs)
+
+    @property
+    def field_types(self) -> tuple[IKBEType, ...]:
+        return self._field_types
+
+    @property
+    def is_fixed(self) -> bool:
+        """All fields are fixed size and compiled to one struct."""
+        return self._layout is not None
+
+    @property
+    def size(self) -> int:
+        """Size of the fixed layout (-1 if the layout is not fixed)."""
+        if self._layout is None:
+            return -1
+        return self._layout.size
+
+    def decode(self, data: memoryview) -> Tuple[tuple, int]:
+        """Decode the fields from the data.
+
+        Returns the values of the fields and the size of decoded data.
+        """
+        return self.decode_from(data, 0)
+
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[tuple, int]:
+        """Decode the fields from the buffer starting at the offset.
+
+        Returns the values of the fields and the offset after the fields.
+        """
+        if self._struct is not None:
+            return self._struct.unpack_from(buf, offset), offset + self._struct.size
+
+        values: list = []
+        for run in self._runs:
+            if run.struct is not None:
+                run_values = run.struct.unpack_from(buf, offset)
+                if run.converters:
+                    run_values = list(run_values)
+                    for i, convert in run.converters:
+                        run_values[i] = convert(run_values[i])
+                values.extend(run_values)
+                offset += run.struct.size
+                continue
+            value, offset = run.kbe_type.decode_from(buf, offset)  # type: ignore
+            values.append(value)
+
+        return tuple(values), offset
+
+    def encode(self, values: Sequence[Any]) -> bytes:
+        """Encode the values of the fields to bytes."""
+        buf = bytearray()
+        self.encode_into(buf, values)
+        return bytes(buf)
+
+    def encode_into(self, buf: bytearray, values: Sequence[Any]) -> int:
+        """Encode the values of the fields to the end of the buffer.
+
+        Returns the number of written bytes.
+        """
+        start = len(buf)
+        index = 0
+        for run in self._runs:
+            if run.struct is not None:
+                run_values = values[index:index + run.count]
+                if run.normalizers:
+                    run_values = list(run_values)
+                    for i, normalize in run.normalizers:
+                        run_values[i] = normalize(run_values[i])
+                buf += run.struct.pack(*run_values)
+            else:
+                run.kbe_type.encode_into(buf, values[index])  # type: ignore
+            index += run.count
+
+        return len(buf) - start
+
+    def __str__(self) -> str:
+        runs = ', '.join(
+            r.struct.format if r.struct is not None else str(r.kbe_type)
+            for r in self._runs
+        )
+        return f'{self.__class__.__name__}({runs})'
+
+    __repr__ = __str__
@@ -0,0 +1,290 @@
+"""ARRAY of numeric items decoded by one call.
+
+An ARRAY of fixed size primitive items (INT8 ... UINT64, FLOAT, DOUBLE) or
+vectors (VECTOR2 / 3 / 4) is decoded without creating a Python object per
+item: the items are wrapped by one "numpy.frombuffer" call (or copied to
+"array.array" if NumPy is not installed). The result is NumericArray, it is
+compatible with Array. Python objects of the items are created only when
+the items are accessed. Encoding writes the typed buffer as is.
+
+The mode is opt-in (see settings.NUMERIC_ARRAYS):
+
+    numarray.install(kbe_type)  # arrays in the type tree are numeric now
+"""
+
+from __future__ import annotations
+
+import array
+import struct
+from typing import Any, Iterable, Optional, Tuple, Type
+
+from .plugintype import Array
+from .typeserializers import IKBEType, UINT32, _ArrayType, _FixedDictType, \
+    _PrimitiveKBEType, _VectorBaseType
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+
+class NumericCodec:
+    """Decoder / encoder of the items of an ARRAY of numeric type."""
+
+    def __init__(self, of: IKBEType):
+        assert can_be_numeric(of), f'The type "{of}" is not numeric'
+        self._of = of
+        self._vector_type: Optional[Type] = None
+        if isinstance(of, _VectorBaseType):
+            self._typecode = 'f'
+            self._dims = len(of._DIMENSIONS)
+            self._vector_type = of._VECTOR_TYPE
+        else:
+            self._typecode = of.fmt.lstrip('=<>!@')  # type: ignore
+            self._dims = 1
+        # Коды типов array.array совпадают с форматами struct для этих типов
+        self._scalar_size = struct.calcsize('=' + self._typecode)
+        self._dtype = np.dtype('=' + self._typecode) if np is not None else None
+        self._item_type = type(of.default)
+
+    @property
+    def dims(self) -> int:
+        """Number of scalars in one item (e.g. 3 for VECTOR3)."""
+        return self._dims
+
+    @property
+    def typecode(self) -> str:
+        return self._typecode
+
+    def new_store(self, scalars: Iterable = ()) -> array.array:
+        return array.array(self._typecode, scalars)
+
+    def to_mutable_store(self, store: Any) -> array.array:
+        if isinstance(store, array.array):
+            return store
+        return array.array(self._typecode, store.tobytes())
+
+    def copy_store(self, store: Any) -> Any:
+        if isinstance(store, array.array):
+            return array.array(self._typecode, store)
+        return store.copy()
+
+    def item_to_scalars(self, item: Any) -> tuple:
+        if self._vector_type is None:
+            return (item, )
+        return tuple(item)
+
+    def scalars_to_item(self, scalars: list) -> Any:
+        if self._vector_type is None:
+            return scalars[0]
+        return self._vector_type(*scalars)
+
+    def scalars_to_items(self, scalars: list) -> list:
+        if self._vector_type is None:
+            return scalars
+        dims, vector_type = self._dims, self._vector_type
+        return [vector_type(*scalars[i:i + dims]) for i in range(0, len(scalars), dims)]
+
+    def store_from_items(self, items: Iterable) -> array.array:
+        store = self.new_store()
+        for item in items:
+            store.extend(self.item_to_scalars(item))
+        return store
+
+    def decode_from(self, type_name: str, buf: memoryview, offset: int,
+                    length: int) -> Tuple[NumericArray, int]:
+        count = length * self._dims
+        end = offset + count * self._scalar_size
+        if len(buf) < end:
+            raise struct.error(f'The array "{type_name}" requires a buffer of '
+                               f'{end - offset} bytes')
+        if np is not None:
+            store = np.frombuffer(buf, self._dtype, count, offset)
+        else:
+            store = self.new_store()
+            store.frombytes(buf[offset:end])
+        return NumericArray(self._item_type, type_name, store, self), end
+
+    def encode_into(self, buf: bytearray, value: Array) -> int:
+        written = UINT32.encode_into(buf, len(value))
+        if isinstance(value, NumericArray) and value.typecode == self._typecode:
+            data = memoryview(value.store).cast('B')
+            buf += data
+            return written + len(data)
+        encode_into = self._of.encode_into
+        for item in value:
+            written += encode_into(buf, item)
+        return written
+
+
+class NumericArray(Array):
+    """Array of numeric items stored in one typed buffer.
+
+    The buffer is "numpy.ndarray" (a read-only view of the received data)
+    or "array.array". On the first modification the items are copied
+    to a new "array.array".
+    """
+
+    def __init__(self, of: Type, type_name: str, store: Any, codec: NumericCodec):
+        # Array.__init__ is not called, because it checks every item
+        self._of = of
+        self._type_name = type_name
+        self._store = store
+        self._codec = codec
+
+    @property
+    def store(self) -> Any:
+        """The typed buffer of the items (numpy.ndarray or array.array)."""
+        return self._store
+
+    @property
+    def typecode(self) -> str:
+        return self._codec.typecode
+
+    @property
+    def _data(self) -> list:
+        # The inherited read-only methods of Array use the list of the items
+        return self.tolist()
+
+    def tolist(self) -> list:
+        return self._codec.scalars_to_items(self._store.tolist())
+
+    def _new(self, store: Any) -> NumericArray:
+        return self.__class__(self._of, self._type_name, store, self._codec)
+
+    def _mutable_store(self) -> array.array:
+        self._store = self._codec.to_mutable_store(self._store)
+        return self._store
+
+    def _check_items(self, items: Iterable) -> list:
+        items = list(items)
+        for item in items:
+            if not isinstance(item, self._of):
+                raise TypeError(f'The item "{item}" has invalid type (should '
+                                f'be "{self._of.__name__}")')
+        return items
+
+    def _normalize_index(self, i: int) -> int:
+        return range(len(self))[i]
+
+    def __len__(self) -> int:
+        return len(self._store) // self._codec.dims
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._new(self._codec.store_from_items(self.tolist()[i]))
+        dims = self._codec.dims
+        if dims == 1:
+            value = self._store[i]
+            return value.item() if np is not None and isinstance(value, np.generic) else value
+        i = self._normalize_index(i)
+        return self._codec.scalars_to_item(self._store[i * dims:(i + 1) * dims].tolist())
+
+    def __setitem__(self, i, item):
+        if isinstance(i, slice):
+            items = self.tolist()
+            items[i] = self._check_items(item)
+            self._store = self._codec.store_from_items(items)
+            return
+        item, = self._check_items([item])
+        dims = self._codec.dims
+        i = self._normalize_index(i)
+        store = self._mutable_store()
+        store[i * dims:(i + 1) * dims] = self._codec.new_store(
+            self._codec.item_to_scalars(item))
+
+    def __delitem__(self, i):
+        if isinstance(i, slice):
+            items = self.tolist()
+            del items[i]
+            self._store = self._codec.store_from_items(items)
+            return
+        dims = self._codec.dims
+        i = self._normalize_index(i)
+        del self._mutable_store()[i * dims:(i + 1) * dims]
+
+    def insert(self, i, item):
+        item, = self._check_items([item])
+        dims = self._codec.dims
+        # The same index semantics as list.insert
+        i = max(0, min(len(self), i if i >= 0 else len(self) + i))
+        self._mutable_store()[i * dims:i * dims] = self._codec.new_store(
+            self._codec.item_to_scalars(item))
+
+    def append(self, item):
+        item, = self._check_items([item])
+        self._mutable_store().extend(self._codec.item_to_scalars(item))
+
+    def extend(self, other):
+        if isinstance(other, Array):
+            if other._of != self._of:
+                raise TypeError(f'Different types of items ("{self}" and {other}')
+        elif not isinstance(other, list):
+            raise TypeError(f'Use list or "{Array.__name__}"')
+        store = self._mutable_store()
+        for item in self._check_items(other):
+            store.extend(self._codec.item_to_scalars(item))
+
+    def pop(self, i=-1):
+        item = self[i]
+        del self[i]
+        return item
+
+    def remove(self, item):
+        del self[self.index(item)]
+
+    def clear(self):
+        self._store = self._codec.new_store()
+
+    def reverse(self):
+        self._store = self._codec.store_from_items(reversed(self.tolist()))
+
+    def sort(self, *args, **kwds):
+        items = self.tolist()
+        items.sort(*args, **kwds)
+        self._store = self._codec.store_from_items(items)
+
+    def __mul__(self, n):
+        return self._new(self._codec.to_mutable_store(self._store) * n)
+
+    __rmul__ = __mul__
+
+    def __imul__(self, n):
+        self._store = self._mutable_store() * n
+        return self
+
+    def copy(self):
+        return self._new(self._codec.copy_store(self._store))
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+
+def can_be_numeric(of: IKBEType) -> bool:
+    """The items of the type can be stored in one typed buffer."""
+    return isinstance(of, (_PrimitiveKBEType, _VectorBaseType))
+
+
+def install(kbe_type: IKBEType) -> int:
+    """Decode the numeric arrays in the tree of the type to NumericArray.
+
+    Returns the number of the arrays switched to the numeric mode.
+    """
+    if type(kbe_type) is _FixedDictType:
+        return sum(install(t) for t in kbe_type._pairs.values())  # type: ignore
+    if type(kbe_type) is not _ArrayType or kbe_type._of is None:  # type: ignore
+        return 0
+    if not can_be_numeric(kbe_type._of):  # type: ignore
+        return install(kbe_type._of)  # type: ignore
+    kbe_type._numeric = NumericCodec(kbe_type._of)  # type: ignore
+    return 1
+
+
+def install_all(kbe_types: Iterable[IKBEType]) -> int:
+    """Install the numeric mode to the types. Returns the number of arrays."""
+    return sum(install(t) for t in set(kbe_types))
@@ -0,0 +1,212 @@
+"""Compiler of FIXED_DICT / ARRAY decoders to straight-line Python code.
+
+The generic decoding of a FIXED_DICT walks the OrderedDict of the child types
+and calls "decode_from" of every child, the ARRAY calls "decode_from" of
+the element type per element and then "Array.__init__" checks the type of
+every element. For deeply nested user types (see deftype/_generated.py)
+this recursive dispatch is the main cost of decoding.
+
+The compiler generates the source code of "decode_from" for the whole tree
+of a built type: consecutive primitive fields of a FIXED_DICT are unpacked
+by one precomputed struct, nested FIXED_DICT / ARRAY are decoded inline,
+arrays of primitive types are unpacked by one call. The code is exec'd once
+and cached. The result is identical to the generic path.
+
+The compilation is opt-in (see settings.COMPILE_KBE_TYPES):
+
+    typecompiler.install(kbe_type)  # kbe_type.decode_from is compiled now
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import struct
+from typing import Any, Callable, Iterable, Tuple
+
+from .plugintype import Array, FixedDict
+from .typeserializers import IKBEType, _ArrayType, _BoolType, _FixedDictType, \
+    _PrimitiveKBEType
+
+logger = logging.getLogger(__name__)
+
+DecodeFrom = Callable[[memoryview, int], Tuple[Any, int]]
+
+_INDENT = '    '
+
+_compiled_by_type: dict[IKBEType, DecodeFrom] = {}
+_source_by_type: dict[IKBEType, str] = {}
+
+
+def _new_fixed_dict(type_name: str, data: collections.OrderedDict) -> FixedDict:
+    # FixedDict.__init__ делает deepcopy данных, а они и так только что созданы
+    inst = FixedDict.__new__(FixedDict)
+    inst._type_name = type_name
+    inst._data = data
+    return inst
+
+
+def _new_array(of: type, type_name: str, data: list) -> Array:
+    # Array.__init__ проверяет тип каждого элемента, а тип известен по спецификации
+    inst = Array.__new__(Array)
+    inst._of = of
+    inst._type_name = type_name
+    inst._data = data
+    return inst
+
+
+def _is_primitive(kbe_type: IKBEType) -> bool:
+    return isinstance(kbe_type, _PrimitiveKBEType)
+
+
+def _struct_char(kbe_type: _PrimitiveKBEType) -> str:
+    return kbe_type.fmt.lstrip('=<>!@')
+
+
+class _Emitter:
+    """Accumulates the lines and the namespace of the generated code."""
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self.namespace: dict[str, Any] = {
+            '_OrderedDict': collections.OrderedDict,
+            '_new_fixed_dict': _new_fixed_dict,
+            '_new_array': _new_array,
+            '_unpack_from': struct.unpack_from,
+            '_UINT32': struct.Struct('=I'),
+        }
+        self._counter = 0
+
+    def var(self, prefix: str = 'v') -> str:
+        self._counter += 1
+        return f'{prefix}{self._counter}'
+
+    def const(self, obj: Any, prefix: str = 'c') -> str:
+        name = self.var(f'_{prefix}')
+        self.namespace[name] = obj
+        return name
+
+    def line(self, level: int, code: str):
+        self.lines.append(_INDENT * level + code)
+
+    def decode(self, kbe_type: IKBEType, target: str, level: int):
+        """Emit the code decoding the type to the "target" variable."""
+        if type(kbe_type) is _FixedDictType:
+            self._fixed_dict(kbe_type, target, level)  # type: ignore
+        elif type(kbe_type) is _ArrayType and kbe_type._numeric is None:  # type: ignore
+            self._array(kbe_type, target, level)  # type: ignore
+        elif _is_primitive(kbe_type):
+            self._primitives([kbe_type], [target], level)  # type: ignore
+        elif isinstance(kbe_type, _BoolType):
+            struct_name = self.const(struct.Struct('=b'), 'S')
+            self.line(level, f'{target} = {struct_name}.unpack_from(buf, offset)[0] > 0')
+            self.line(level, 'offset += 1')
+        else:
+            type_name = self.const(kbe_type, 'T')
+            self.line(level, f'{target}, offset = {type_name}.decode_from(buf, offset)')
+
+    def _primitives(self, kbe_types: list[_PrimitiveKBEType], targets: list[str],
+                    level: int):
+        struct_ = struct.Struct('=' + ''.join(_struct_char(t) for t in kbe_types))
+        struct_name = self.const(struct_, 'S')
+        self.line(level, f'{", ".join(targets)}, = {struct_name}.unpack_from(buf, offset)')
+        self.line(level, f'offset += {struct_.size}')
+
+    def _fixed_dict(self, kbe_type: _FixedDictType, target: str, level: int):
+        pairs = list(kbe_type._pairs.items())
+        targets = [self.var() for _ in pairs]
+        # Consecutive primitive fields are unpacked by one struct
+        run_types: list[_PrimitiveKBEType] = []
+        run_targets: list[str] = []
+        for (_key, child), child_target in zip(pairs, targets):
+            if _is_primitive(child):
+                run_types.append(child)  # type: ignore
+                run_targets.append(child_target)
+                continue
+            if run_types:
+                self._primitives(run_types, run_targets, level)
+                run_types, run_targets = [], []
+            self.decode(child, child_target, level)
+        if run_types:
+            self._primitives(run_types, run_targets, level)
+
+        items = ', '.join(f'({key!r}, {t})' for (key, _), t in zip(pairs, targets))
+        type_name = self.const(kbe_type.name, 'name')
+        self.line(level, f'{target} = _new_fixed_dict({type_name}, _OrderedDict(({items},)))'
+                  if pairs else f'{target} = _new_fixed_dict({type_name}, _OrderedDict())')
+
+    def _array(self, kbe_type: _ArrayType, target: str, level: int):
+        of = kbe_type._of
+        length = self.var('n')
+        items = self.var('items')
+        of_name = self.const(type(of.default), 'of')
+        type_name = self.const(kbe_type.name, 'name')
+        self.line(level, f'{length}, = _UINT32.unpack_from(buf, offset)')
+        self.line(level, 'offset += 4')
+        if _is_primitive(of):
+            char = _struct_char(of)  # type: ignore
+            self.line(level, f"{items} = list(_unpack_from('=%d{char}' % {length}, buf, offset))")
+            self.line(level, f'offset += {length} * {of.size}')  # type: ignore
+        else:
+            item = self.var()
+            self.line(level, f'{items} = []')
+            self.line(level, f'for _ in range({length}):')
+            self.decode(of, item, level + 1)
+            self.line(level + 1, f'{items}.append({item})')
+        self.line(level, f'{target} = _new_array({of_name}, {type_name}, {items})')
+
+
+def _compile(kbe_type: IKBEType) -> Tuple[DecodeFrom, str]:
+    emitter = _Emitter()
+    emitter.line(0, 'def decode_from(buf, offset):')
+    emitter.decode(kbe_type, 'value', 1)
+    emitter.line(1, 'return value, offset')
+    source = '\n'.join(emitter.lines)
+    namespace = emitter.namespace
+    exec(compile(source, f'<kbetype {kbe_type.name}>', 'exec'), namespace)
+    return namespace['decode_from'], source
+
+
+def can_compile(kbe_type: IKBEType) -> bool:
+    """The type is FIXED_DICT or ARRAY (other types are decoded by one call).
+
+    The numeric ARRAY (see numarray) is already decoded by one call.
+    """
+    if type(kbe_type) is _ArrayType:
+        return kbe_type._numeric is None  # type: ignore
+    return type(kbe_type) is _FixedDictType
+
+
+def compile_decoder(kbe_type: IKBEType) -> DecodeFrom:
+    """Compile (or get from the cache) "decode_from" of the type."""
+    assert can_compile(kbe_type), f'The type "{kbe_type}" cannot be compiled'
+    decode_from = _compiled_by_type.get(kbe_type)
+    if decode_from is None:
+        decode_from, source = _compile(kbe_type)
+        _compiled_by_type[kbe_type] = decode_from
+        _source_by_type[kbe_type] = source
+        logger.debug('[%s] The decoder of "%s" is compiled', __name__, kbe_type)
+    return decode_from
+
+
+def get_source(kbe_type: IKBEType) -> str:
+    """The source code of the compiled decoder (for debugging)."""
+    compile_decoder(kbe_type)
+    return _source_by_type[kbe_type]
+
+
+def install(kbe_type: IKBEType) -> bool:
+    """Replace "decode_from" of the type instance by the compiled one.
+
+    The "decode" method uses "decode_from", so it's compiled too. Returns
+    False if the type cannot be compiled.
+    """
+    if not can_compile(kbe_type):
+        return False
+    kbe_type.decode_from = compile_decoder(kbe_type)  # type: ignore
+    return True
+
+
+def install_all(kbe_types: Iterable[IKBEType]) -> int:
+    """Install compiled decoders of the types. Returns the number of compiled types."""
+    return sum(install(t) for t in set(kbe_types))
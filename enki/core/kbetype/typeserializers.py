@@ -45,11 +45,29 @@ class IKBEType(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[Any, int]:
+        """Decode a python type from the buffer starting at the offset.
+
+        Returns decoded data and the offset right after the decoded data.
+        The buffer is not sliced, so decoding of a sequence of values doesn't
+        create an intermediate memoryview per value.
+        """
+        pass
+
     @abc.abstractmethod
     def encode(self, value: Any) -> bytes:
         """Encode a python type to bytes."""
         pass
 
+    @abc.abstractmethod
+    def encode_into(self, buf: bytearray, value: Any) -> int:
+        """Encode a python type to the end of the buffer.
+
+        Returns the number of written bytes.
+        """
+        pass
+
     @abc.abstractmethod
     def alias(self, alias_name: str) -> IKBEType:
         """Create alias of the "self" type."""
@@ -72,16 +90,26 @@ class _BaseKBEType(IKBEType):
         raise NotImplementedError
 
     def decode(self, data: memoryview) -> Tuple[Any, int]:
+        return self.decode_from(data, 0)
+
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[Any, int]:
         raise NotImplementedError
 
     def encode(self, value: Any) -> bytes:
         raise NotImplementedError
 
+    def encode_into(self, buf: bytearray, value: Any) -> int:
+        data = self.encode(value)
+        buf += data
+        return len(data)
+
     def alias(self, alias_name: str) -> IKBEType:
         # We don't know how many attributes instance have. And it doesn't matter
         # because only type name should be changed.
         inst = self.__class__.__new__(self.__class__)
         inst.__dict__.update(self.__dict__)
+        # The compiled decoder (see typecompiler) is bound to the original type
+        inst.__dict__.pop('decode_from', None)
         inst._name = alias_name
         self._aliases.append(inst)
         return inst
@@ -104,20 +132,37 @@ class _PrimitiveKBEType(_BaseKBEType):
         self._fmt = fmt
         self._size = size
         self._default = default
+        self._struct = struct.Struct(fmt)
 
     @property
     def size(self) -> int:
         return self._size
 
+    @property
+    def fmt(self) -> str:
+        """The struct format of the type (with the byte order prefix)."""
+        return self._fmt
+
     @property
     def default(self) -> Any:
         return self._default
 
+    def normalize(self, value: Any) -> Any:
+        """Prepare the value to be packed by the struct format of the type."""
+        return value
+
     def decode(self, data: memoryview) -> Tuple[Any, int]:
-        return struct.unpack(self._fmt, data[:self._size])[0], self._size
+        return self._struct.unpack_from(data)[0], self._size
+
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[Any, int]:
+        return self._struct.unpack_from(buf, offset)[0], offset + self._size
 
     def encode(self, value: Any) -> bytes:
-        return struct.pack(self._fmt, value)
+        return self._struct.pack(value)
+
+    def encode_into(self, buf: bytearray, value: Any) -> int:
+        buf += self._struct.pack(self.normalize(value))
+        return self._size
 
 
 class _BlobType(_BaseKBEType):
@@ -127,16 +172,20 @@ class _BlobType(_BaseKBEType):
     def default(self):
         return b''
 
-    def decode(self, data: memoryview) -> Tuple[bytes, int]:
-        length, shift = UINT32.decode(data)
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[bytes, int]:
+        length, offset = UINT32.decode_from(buf, offset)
         if length == 0:
-            return b'', shift
-        size = shift + length
-        return struct.unpack(f'={length}s', data[shift:size])[0], size
+            return b'', offset
+        return struct.unpack_from(f'={length}s', buf, offset)[0], offset + length
 
     def encode(self, value: bytes) -> bytes:
         return struct.pack("=I%ss" % len(value), len(value), value)
 
+    def encode_into(self, buf: bytearray, value: bytes) -> int:
+        written = UINT32.encode_into(buf, len(value))
+        buf += value
+        return written + len(value)
+
 
 class _EndlessBlobType(_BaseKBEType):
     """Blob until data ends."""
@@ -145,14 +194,18 @@ class _EndlessBlobType(_BaseKBEType):
     def default(self):
         return b''
 
-    def decode(self, data: memoryview) -> Tuple[bytes, int]:
-        length = len(data)
-        if length == 0:
-            return b'', 0
-        return struct.unpack(f'={length}s', data)[0], length
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[bytes, int]:
+        end = len(buf)
+        if end <= offset:
+            return b'', offset
+        return bytes(buf[offset:end]), end
 
     def encode(self, value: bytes) -> bytes:
-        return struct.pack('=%s' % len(value), value)
+        return struct.pack('=%ss' % len(value), value)
+
+    def encode_into(self, buf: bytearray, value: bytes) -> int:
+        buf += value
+        return len(value)
 
 
 class _UnicodeType(_BaseKBEType):
@@ -162,35 +215,55 @@ class _UnicodeType(_BaseKBEType):
     def default(self):
         return ''
 
-    def decode(self, data: memoryview) -> Tuple[str, int]:
-        encoded, shift = BLOB.decode(data)
-        return encoded.decode('utf-8'), shift
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[str, int]:
+        encoded, offset = BLOB.decode_from(buf, offset)
+        return encoded.decode('utf-8'), offset
 
     def encode(self, value) -> bytes:
         return BLOB.encode(value.encode())
 
+    def encode_into(self, buf: bytearray, value: str) -> int:
+        return BLOB.encode_into(buf, value.encode())
+
 
 class _StringType(_BaseKBEType):
     """String data."""
 
-    _NULL_TERMINATOR = int.from_bytes(b'\x00', 'big')
+    _NULL_TERMINATOR = b'\x00'
+    # Терминатор ищется кусками, чтобы не копировать весь буфер до конца
+    _SCAN_CHUNK_SIZE = 64
 
     @property
     def default(self) -> str:
         return ''
 
-    def decode(self, data: memoryview) -> Tuple[str, int]:
-        index = 0
-        for index, b in enumerate(data):
-            if b == self._NULL_TERMINATOR:
-                break
-        size = index + 1  # string + null terminator
-        return data[:index].tobytes().decode(), size
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[str, int]:
+        end = len(buf)
+        pos = offset
+        while pos < end:
+            index = bytes(buf[pos:pos + self._SCAN_CHUNK_SIZE]).find(self._NULL_TERMINATOR)
+            if index != -1:
+                index += pos
+                # string + null terminator
+                return bytes(buf[offset:index]).decode(), index + 1
+            pos += self._SCAN_CHUNK_SIZE
+
+        # There is no null terminator. Keep the old behaviour: the last byte
+        # is considered to be the terminator.
+        if end <= offset:
+            return '', offset + 1
+        return bytes(buf[offset:end - 1]).decode(), end
 
     def encode(self, value: str):
         encoded = value.encode("utf-8")
         return struct.pack("=%ss" % (len(encoded) + 1), encoded)
 
+    def encode_into(self, buf: bytearray, value: str) -> int:
+        encoded = value.encode("utf-8")
+        buf += encoded
+        buf += self._NULL_TERMINATOR
+        return len(encoded) + 1
+
 
 class _BoolType(_BaseKBEType):
 
@@ -198,12 +271,29 @@ class _BoolType(_BaseKBEType):
     def default(self) -> bool:
         return False
 
-    def decode(self, data: memoryview) -> Tuple[bool, int]:
-        return INT8.decode(data)[0] > 0, INT8.size
+    @property
+    def fmt(self) -> str:
+        """The struct format of the value on the wire (see FieldsCodec)."""
+        return INT8.fmt
+
+    def normalize(self, value: bool) -> int:
+        """Prepare the value to be packed by the struct format of the type."""
+        return 1 if value else 0
+
+    def from_int8(self, value: int) -> bool:
+        """The value unpacked by the struct format of the type."""
+        return value > 0
+
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[bool, int]:
+        value, offset = INT8.decode_from(buf, offset)
+        return value > 0, offset
 
     def encode(self, value: bool):
         return INT8.encode(1 if value else 0)
 
+    def encode_into(self, buf: bytearray, value: bool) -> int:
+        return INT8.encode_into(buf, 1 if value else 0)
+
 
 class _RowDataType(_BaseKBEType):
     """Bytes for custom parsing."""
@@ -215,6 +305,9 @@ class _RowDataType(_BaseKBEType):
     def decode(self, data: memoryview) -> Tuple[memoryview, int]:
         return data, len(data)
 
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[memoryview, int]:
+        return memoryview(buf)[offset:], len(buf)
+
     def encode(self, value: bytes) -> bytes:
         return value
 
@@ -226,15 +319,18 @@ class _PythonType(_BaseKBEType):
     def default(self) -> object:
         return object()
 
-    def decode(self, data: memoryview) -> Tuple[object, int]:
-        bytes_, shift = BLOB.decode(data)
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[object, int]:
+        bytes_, offset = BLOB.decode_from(buf, offset)
         obj = pickle.loads(bytes_)
-        return obj, shift
+        return obj, offset
 
     def encode(self, value: object) -> bytes:
         bytes_ = pickle.dumps(value)
         return BLOB.encode(bytes_)
 
+    def encode_into(self, buf: bytearray, value: object) -> int:
+        return BLOB.encode_into(buf, pickle.dumps(value))
+
 
 class _PluginVector(EnkiType):
 
@@ -247,21 +343,19 @@ class _VectorBaseType(_BaseKBEType):
     _VECTOR_TYPE = _PluginVector
     _DIMENSIONS = tuple()
 
+    def __init__(self, name: str):
+        super().__init__(name)
+        # Each dimension is FLOAT
+        self._struct = struct.Struct('=' + 'f' * len(self._DIMENSIONS))
+
     @property
     def default(self) -> _VECTOR_TYPE:
         return self._VECTOR_TYPE()
 
-    def decode(self, data: memoryview) -> Tuple[_VECTOR_TYPE, int]:
-        kwargs = {}
-        field_type = FLOAT
-        offset = 0
-        for field_name in self._DIMENSIONS:
-            value, shift = field_type.decode(data)
-            data = data[shift:]
-            offset += shift
-            kwargs[field_name] = value
-
-        return self._VECTOR_TYPE(**kwargs), offset
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[_VECTOR_TYPE, int]:
+        values = self._struct.unpack_from(buf, offset)
+        return self._VECTOR_TYPE(**dict(zip(self._DIMENSIONS, values))), \
+            offset + self._struct.size
 
     def encode(self, value: _VECTOR_TYPE) -> bytes:
         raise NotImplementedError
@@ -300,23 +394,24 @@ class _FixedDictType(_BaseKBEType):
                 [(k, t.default) for k, t in self._pairs.items()])
         )
 
-    def decode(self, data: memoryview) -> Tuple[FixedDict, int]:
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[FixedDict, int]:
         result = OrderedDict()
-        total_offset = 0
         for key, kbe_type in self._pairs.items():
-            value, shift = kbe_type.decode(data)
-            data = data[shift:]
-            result[key] = value
-            total_offset += shift
-        return FixedDict(self._name, result), total_offset
+            result[key], offset = kbe_type.decode_from(buf, offset)
+        return FixedDict(self._name, result), offset
 
     def encode(self, value: FixedDict) -> bytes:
-        data = b''
-        for k, v in value.values():
-            assert k in self._pairs
-            data += self._pairs[k].encode(v)
-
-        return data
+        buf = bytearray()
+        self.encode_into(buf, value)
+        return bytes(buf)
+
+    def encode_into(self, buf: bytearray, value: FixedDict) -> int:
+        assert all(k in self._pairs for k in value)
+        written = 0
+        # The order of the fields is defined by the type (not by the value)
+        for key, kbe_type in self._pairs.items():
+            written += kbe_type.encode_into(buf, value[key])
+        return written
 
     def build(self, name: str,
               pairs: OrderedDict[str, IKBEType]
@@ -335,32 +430,42 @@ class _ArrayType(_BaseKBEType):
         super().__init__(name)
         # The attribute will be set in the "build" method.
         self._of: IKBEType = None  # type: ignore
+        # Decoder / encoder of numeric items by one call (see numarray.install)
+        self._numeric = None
 
     @property
     def default(self) -> Array:
         return Array(of=type(self._of.default), type_name=self._name)
 
-    def decode(self, data: memoryview) -> Tuple[Array, int]:
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[Array, int]:
         # number of bytes contained array data
-        length, shift = UINT32.decode(data)
-        data = data[shift:]
+        length, offset = UINT32.decode_from(buf, offset)
+        if self._numeric is not None:
+            return self._numeric.decode_from(self._name, buf, offset, length)
         if length == 0:
-            return self.default, shift
+            return self.default, offset
         result = []
-        offset = shift
+        decode_from = self._of.decode_from
         for _ in range(length):
-            value, shift = self._of.decode(data)
-            data = data[shift:]
-            offset += shift
+            value, offset = decode_from(buf, offset)
             result.append(value)
 
         return Array(of=type(self._of.default), type_name=self._name,
                      initial_data=result), offset
 
     def encode(self, value: Array) -> bytes:
-        if len(value) == 0:
-            return UINT32.encode(0)
-        return UINT32.encode(len(value)) + b''.join(self._of.encode(el) for el in value)  # type: ignore
+        buf = bytearray()
+        self.encode_into(buf, value)
+        return bytes(buf)
+
+    def encode_into(self, buf: bytearray, value: Array) -> int:
+        if self._numeric is not None:
+            return self._numeric.encode_into(buf, value)
+        written = UINT32.encode_into(buf, len(value))
+        encode_into = self._of.encode_into
+        for el in value:
+            written += encode_into(buf, el)
+        return written
 
     def build(self, name: str, of: IKBEType) -> _ArrayType:
         """Build a new ARRAY by type specification."""
@@ -393,26 +498,21 @@ class _EntityComponent(_BaseKBEType):
     def default(self) -> EntityComponentData:
         return EntityComponentData(0, 0, 0, 0)
 
-    def decode(self, data: memoryview) -> Tuple[EntityComponentData, int]:
-        shift = 0
-        component_type, offset = UINT32.decode(data)
-        shift += offset
+    def decode_from(self, buf: memoryview, offset: int) -> Tuple[EntityComponentData, int]:
+        component_type, offset = UINT32.decode_from(buf, offset)
         # TODO: [2022-08-27 10:31 burov_alexey@mail.ru]:
         # Тут падает. Может быть из-за того, что если прокси создана
-        owner_id, offset = INT32.decode(data[shift:])
-        shift += offset
+        owner_id, offset = INT32.decode_from(buf, offset)
 
         # UInt16 ComponentDescrsType ???
-        component_ent_id, offset = UINT16.decode(data[shift:])
-        shift += offset
+        component_ent_id, offset = UINT16.decode_from(buf, offset)
 
-        count, offset = UINT16.decode(data[shift:])
-        shift += offset
+        count, offset = UINT16.decode_from(buf, offset)
 
         inst = EntityComponentData(
             component_type, owner_id, component_ent_id, count
         )
-        return inst, shift
+        return inst, offset
 
     def encode(self, value: Any) -> bytes:
         raise NotImplementedError
@@ -420,13 +520,16 @@ class _EntityComponent(_BaseKBEType):
 
 class _FloatType(_PrimitiveKBEType):
 
-    def encode(self, value: float) -> bytes:
+    def normalize(self, value: float) -> float:
         # TODO: [2022-11-18 15:54 burov_alexey@mail.ru]:
         # Сервер может прислать потенциально число, которое больше,
         # чем Python может поменять по формату "f". Пока так.
         if value > 2147483647 or value < -2147483647:
             value = 0
-        return super().encode(value)
+        return value
+
+    def encode(self, value: float) -> bytes:
+        return super().encode(self.normalize(value))
 
 
 INT8: _PrimitiveKBEType = _PrimitiveKBEType('INT8', '=b', 1, 0)
@@ -508,6 +611,8 @@ ENTITY_METHOD_UID = UINT16.alias('ENTITY_METHOD_UID')
 
 MESSAGE_ID = UINT16.alias('MESSAGE_ID')
 MESSAGE_LENGTH = UINT16.alias('MESSAGE_LENGTH')
+# The extended length of a big message (follows MESSAGE_LENGTH equal to 0xFFFF)
+MESSAGE_LENGTH1 = UINT32.alias('MESSAGE_LENGTH1')
 
 COMPONENT_TYPE = INT32.alias('COMPONENT_TYPE')
 COMPONENT_ID: IKBEType = UINT64.alias('COMPONENT_ID')
@@ -3,19 +3,33 @@
 from __future__ import annotations
 import dataclasses
 
-import io
 import logging
+import struct
+import time
 from dataclasses import dataclass
-from typing import Any, Tuple, Iterator, List, Optional
+from typing import Any, Callable, Collection, Tuple, Iterator, List, Optional
 
 from . import kbeenum
 from .kbeenum import MsgArgsType, ComponentType
 
-from . import kbetype
-from .kbetype import IKBEType
+from . import kbetype, metrics
+from .kbetype import IKBEType, FieldsCodec
+from .metrics import MsgMetrics
 
 logger = logging.getLogger(__name__)
 
+# Если длина сообщения не меньше этого значения, то вместо длины (UINT16)
+# пишется это значение, а за ним длина в расширенном формате (UINT32).
+NETWORK_MESSAGE_MAX_SIZE = 0xFFFF
+
+
+def encode_message_length(length: int) -> bytes:
+    """Encode the length of a message (with the extended form for big messages)."""
+    if length >= NETWORK_MESSAGE_MAX_SIZE:
+        return kbetype.MESSAGE_LENGTH.encode(NETWORK_MESSAGE_MAX_SIZE) \
+            + kbetype.MESSAGE_LENGTH1.encode(length)
+    return kbetype.MESSAGE_LENGTH.encode(length)
+
 
 @dataclass(frozen=True)
 class MsgDescr:
@@ -27,14 +41,30 @@ class MsgDescr:
     field_types: tuple[IKBEType, ...]
     desc: str
 
+    def __post_init__(self):
+        # The codec is compiled once per specification (see FieldsCodec).
+        object.__setattr__(self, '_fields_codec', FieldsCodec(self.field_types))
+        # Имя и компонент вычисляются один раз, а не при каждом обращении
+        comp_name, _sep, short_name = self.name.partition('::')
+        object.__setattr__(self, '_short_name', short_name)
+        object.__setattr__(self, '_component_type',
+                           getattr(ComponentType, comp_name.upper(), None))
+
+    @property
+    def fields_codec(self) -> FieldsCodec:
+        """The compiled decoder / encoder of the message fields."""
+        return self._fields_codec  # type: ignore
+
     @property
-    def short_name(self):
-        return self.name.split('::')[1]
+    def short_name(self) -> str:
+        return self._short_name  # type: ignore
 
     @property
     def component_type(self) -> ComponentType:
-        comp_name =  self.name.split('::')[0]
-        return getattr(ComponentType, comp_name.upper())
+        comp_type = self._component_type  # type: ignore
+        if comp_type is None:
+            raise AttributeError(f'There is no component type of the message "{self.name}"')
+        return comp_type
 
     @property
     def need_calc_length(self) -> bool:
@@ -49,16 +79,17 @@ class MsgDescr:
         но одинаковая сигнатура. Данный метод вводиться, чтобы можно было
         динамически менять владельца в зависимости от того, чей ждём ответ.
         """
-        _comp_name, msg_name =  self.name.split('::')
         new_comp_name = comp_type.name.capitalize()
-        dct = dataclasses.asdict(self)
-        dct['name'] = f'{new_comp_name}::{msg_name}'
-        if id is not None:
-            dct['id'] = id
-        return MsgDescr(**dct)
+        # dataclasses.asdict делал глубокую копию типов полей, а они неизменяемые
+        return dataclasses.replace(
+            self, name=f'{new_comp_name}::{self.short_name}',
+            id=self.id if id is None else id
+        )
 
 
 class Message:
+    # Сообщение создаётся на каждый пакет, поэтому без __dict__
+    __slots__ = ('_spec', '_fields')
 
     def __init__(self, spec: MsgDescr, fields: tuple):
         assert len(spec.field_types) == len(fields)
@@ -102,6 +133,53 @@ class Message:
     __repr__ = __str__
 
 
+class LazyMessage(Message):
+    """The message decoding its fields on the first access.
+
+    The frame of the message is validated by the length (the whole message
+    is received), but the fields are decoded only when "get_values" or
+    "get_field_map" is called. A message, which is only routed or dropped
+    by the receiver, is never decoded. The frame is a view of the received
+    data, so the data must not be modified while the message is alive.
+    """
+    __slots__ = ('_frame', '_offset')
+
+    def __init__(self, spec: MsgDescr, frame: memoryview, offset: int):
+        self._spec = spec
+        self._frame: Optional[memoryview] = frame
+        self._offset = offset
+        self._fields: Optional[tuple] = None  # type: ignore
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._fields is not None
+
+    def _decode(self) -> tuple:
+        if self._fields is None:
+            assert self._frame is not None
+            registry = metrics.registry
+            if registry is not None and registry.time_next():
+                start = time.perf_counter_ns()
+                self._fields, _offset = self._spec.fields_codec.decode_from(
+                    self._frame, self._offset)
+                registry.msg(self._spec.name).decode.record(time.perf_counter_ns() - start)
+            else:
+                self._fields, _offset = self._spec.fields_codec.decode_from(
+                    self._frame, self._offset)
+            # Декодированные поля могут ссылаться на кадр (BLOB), но сам
+            # кадр сообщению больше не нужен
+            self._frame = None
+        return self._fields
+
+    def get_field_map(self):
+        self._decode()
+        return super().get_field_map()
+
+    def get_values(self) -> List[Any]:
+        self._decode()
+        return super().get_values()
+
+
 class MessageSerializer:
     """Serialize / deserialize a kbe network packet.
 
@@ -109,90 +187,211 @@ class MessageSerializer:
     This class serializes / deserializes a message object (from bytes).
     """
 
-    def __init__(self, msg_spec_by_id: dict[int, MsgDescr]) -> None:
+    def __init__(self, msg_spec_by_id: dict[int, MsgDescr],
+                 lazy_msg_ids: Collection[int] = ()) -> None:
         self._msg_spec_by_id = msg_spec_by_id
-
-    def deserialize(self, data: memoryview
-                    ) -> Tuple[Optional[Message], memoryview]:
-        """Deserialize a kbe network packet to a message.
-
-        The second element of the returned tuple is a tail of data,
-        not handled data. It's beginning of the other message.
+        # Сообщения с этими идентификаторами декодируются при первом
+        # обращении к полям (см. LazyMessage)
+        self._lazy_msg_ids = frozenset(lazy_msg_ids)
+        # Реестр метрик берётся при создании (None - метрики выключены)
+        self._metrics = metrics.registry
+        self._msg_metrics: dict[int, MsgMetrics] = {}
+        # Метрики записываются у каждой N-й пачки сообщений (и первой),
+        # см. sampled_deserialize. Отсчёт приёма и отправки раздельный.
+        self._sample = self._metrics.sample if self._metrics is not None else 0
+        self._receive_left = 1
+        self._send_left = 1
+
+    def _read_header(self, data: memoryview
+                     ) -> Tuple[Optional[MsgDescr], int, int]:
+        """Read the message id and the length of the message.
+
+        Returns the specification of the message, the offset of the payload
+        and the end of the message in the data. The end is -1 if the data is
+        too short to read the header or the length is not known before
+        decoding of the fields. The specification is None if the data is
+        too short to read the message id or the message is unknown.
         """
-        origin_data: memoryview = data[:]
-        msg_id, offset = kbetype.MESSAGE_ID.decode(data)
-        data = data[offset:]
+        if len(data) < kbetype.MESSAGE_ID.size:
+            return None, 0, -1
+        msg_id, offset = kbetype.MESSAGE_ID.decode_from(data, 0)
 
-        if msg_id not in self._msg_spec_by_id:
+        msg_spec = self._msg_spec_by_id.get(msg_id)
+        if msg_spec is None:
             logger.warning(f'[{self}] There is no specification for the message "{msg_id}"')
-            return None, origin_data
+            return None, offset, -1
 
-        msg_spec = self._msg_spec_by_id[msg_id]
         if msg_spec.args_type == kbeenum.MsgArgsType.FIXED \
                 and not msg_spec.field_types:
             # This is a short message. Only message id, there is no payload.
-            return Message(spec=msg_spec, fields=tuple()), data
+            return msg_spec, offset, offset
 
         if not msg_spec.need_calc_length:
-            fields = []
-            for kbe_type in msg_spec.field_types:
-                value, size = kbe_type.decode(data)
-                fields.append(value)
-                data = data[size:]
+            codec = msg_spec.fields_codec
+            return msg_spec, offset, offset + codec.size if codec.is_fixed else -1
 
-            return Message(spec=msg_spec, fields=tuple(fields)), data
+        if len(data) < offset + kbetype.MESSAGE_LENGTH.size:
+            return msg_spec, offset, -1
+        msg_length, offset = kbetype.MESSAGE_LENGTH.decode_from(data, offset)
+        if msg_length == NETWORK_MESSAGE_MAX_SIZE:
+            # The extended length of the big message follows the mark
+            if len(data) < offset + kbetype.MESSAGE_LENGTH1.size:
+                return msg_spec, offset, -1
+            msg_length, offset = kbetype.MESSAGE_LENGTH1.decode_from(data, offset)
 
-        msg_length, offset = kbetype.MESSAGE_LENGTH.decode(data)
-        data = data[offset:]
+        return msg_spec, offset, offset + msg_length
 
-        if len(data) < msg_length:
-            # It's a part of the message
-            return None, origin_data
+    def get_frame_size(self, data: memoryview) -> int:
+        """Size of the message starting at the beginning of the data.
+
+        Returns -1 if the size cannot be calculated by the header (e.g.
+        the header is not received yet).
+        """
+        msg_spec, _offset, end = self._read_header(data)
+        if msg_spec is None:
+            return -1
+        return end
+
+    def deserialize(self, data: memoryview
+                    ) -> Tuple[Optional[Message], memoryview]:
+        """Deserialize a kbe network packet to a message.
+
+        The second element of the returned tuple is a tail of data,
+        not handled data. It's beginning of the other message. If the id
+        of the message is in "lazy_msg_ids" and the size of the message is
+        known by the header, LazyMessage is returned.
+        """
+        msg_spec, offset, end = self._read_header(data)
+        if msg_spec is None:
+            return None, data
 
-        tail = memoryview(b'')
-        if len(data) > msg_length:
-            # There are two messages in data
-            tail = data[msg_length:]
-            data = data[:msg_length]
+        if len(data) < end or end < 0 and msg_spec.need_calc_length:
+            # It's a part of the message
+            return None, data
 
-        fields = []
-        for kbe_type in msg_spec.field_types:
-            value, size = kbe_type.decode(data)
-            fields.append(value)
-            data = data[size:]
+        if msg_spec.id in self._lazy_msg_ids and end >= 0:
+            return LazyMessage(msg_spec, data[:end], offset), data[end:]
 
-        return Message(spec=msg_spec, fields=tuple(fields)), tail
+        if not msg_spec.need_calc_length:
+            fields, offset = msg_spec.fields_codec.decode_from(data, offset)
+            return Message(spec=msg_spec, fields=fields), data[offset:]
+
+        # The payload is sliced once, so the last field (e.g. UINT8_ARRAY)
+        # doesn't capture the next message.
+        fields, _offset = msg_spec.fields_codec.decode_from(data[:end], offset)
+        return Message(spec=msg_spec, fields=fields), data[end:]
+
+    def sampled_deserialize(self) -> Callable[[memoryview],
+                                              Tuple[Optional[Message], memoryview]]:
+        """The deserialize method for the next batch of messages.
+
+        The batch is a chunk of the stream or a datagram. If the metrics
+        are on, the messages of one of "sample" batches are measured (see
+        MetricsRegistry), the other batches are decoded by "deserialize"
+        without any per-message cost.
+        """
+        if self._metrics is None:
+            return self.deserialize
+        self._receive_left -= 1
+        if self._receive_left:
+            return self.deserialize
+        self._receive_left = self._sample
+        return self._deserialize_measured
+
+    def sampled_serialize_into(self) -> Callable[..., int]:
+        """The serialize_into method for the next message (see sampled_deserialize)."""
+        if self._metrics is None:
+            return self.serialize_into
+        self._send_left -= 1
+        if self._send_left:
+            return self.serialize_into
+        self._send_left = self._sample
+        return self._serialize_into_measured
+
+    def _deserialize_measured(self, data: memoryview
+                              ) -> Tuple[Optional[Message], memoryview]:
+        started = time.perf_counter_ns()
+        msg, tail = self.deserialize(data)
+        if msg is None:
+            return msg, tail
+        duration_ns = time.perf_counter_ns() - started
+        # Сообщение выборки стоит за "sample" сообщений
+        item = self._msg_metrics_of(msg.spec)
+        item.received += self._sample
+        item.received_bytes += (len(data) - len(tail)) * self._sample
+        # Время декодирования LazyMessage замеряется при обращении к полям
+        if not isinstance(msg, LazyMessage):
+            item.decode.record(duration_ns)
+        return msg, tail
+
+    def _serialize_into_measured(self, msg: Message, buf: bytearray,
+                                 only_data: bool = False) -> int:
+        started = time.perf_counter_ns()
+        written = self.serialize_into(msg, buf, only_data)
+        duration_ns = time.perf_counter_ns() - started
+        item = self._msg_metrics_of(msg.spec)
+        item.sent += self._sample
+        item.sent_bytes += written * self._sample
+        item.encode.record(duration_ns)
+        return written
+
+    def _msg_metrics_of(self, spec: MsgDescr) -> MsgMetrics:
+        item = self._msg_metrics.get(spec.id)
+        if item is None:
+            assert self._metrics is not None
+            item = self._msg_metrics[spec.id] = self._metrics.msg(spec.name)
+        return item
 
     def serialize(self, msg: Message, only_data: bool = False) -> bytes:
         """Serialize a message to a kbe network packet."""
+        buf = bytearray()
+        self.sampled_serialize_into()(msg, buf, only_data)
+        return bytes(buf)
+
+    def serialize_into(self, msg: Message, buf: bytearray,
+                       only_data: bool = False) -> int:
+        """Serialize a message to the end of the caller-owned buffer.
+
+        The message id, the length and the fields are written to the buffer
+        without intermediate copies. The length is written as a placeholder
+        and patched after the fields are encoded. Returns the number of
+        written bytes.
+        """
+        start = len(buf)
         if msg.args_type == kbeenum.MsgArgsType.FIXED and not msg.get_values():
-            io_obj = io.BytesIO()
-            io_obj.write(kbetype.MESSAGE_ID.encode(msg.id))
-            return io_obj.getbuffer().tobytes()
+            return kbetype.MESSAGE_ID.encode_into(buf, msg.id)
 
-        io_obj = io.BytesIO()
-        # Write message arguments
-        written = 0
-        for value, kbe_type in msg.get_field_map():
-            written += io_obj.write(kbe_type.encode(value))
-
-        payload = io.BytesIO()
         # Иногда нужно отправлять только данные, без префикса с номером и длиной
         if not only_data:
-            # Write to the start of the buffer the message id and the data length
-            payload.write(kbetype.MESSAGE_ID.encode(msg.id))
-            if msg.need_calc_length:
-                payload.write(kbetype.MESSAGE_LENGTH.encode(written))
+            kbetype.MESSAGE_ID.encode_into(buf, msg.id)
+
+        length_offset = -1
+        if not only_data and msg.need_calc_length:
+            length_offset = len(buf)
+            kbetype.MESSAGE_LENGTH.encode_into(buf, 0)
+
+        # Write message arguments
+        written = msg.spec.fields_codec.encode_into(buf, msg.get_values())
+
+        if length_offset >= 0:
+            if written >= NETWORK_MESSAGE_MAX_SIZE:
+                # The big message. The mark is written instead of the length
+                # and the real length is inserted after the mark.
+                struct.pack_into(kbetype.MESSAGE_LENGTH.fmt, buf, length_offset,
+                                 NETWORK_MESSAGE_MAX_SIZE)
+                length_offset += kbetype.MESSAGE_LENGTH.size
+                buf[length_offset:length_offset] = kbetype.MESSAGE_LENGTH1.encode(written)
+            else:
+                struct.pack_into(kbetype.MESSAGE_LENGTH.fmt, buf, length_offset, written)
 
-        payload.write(io_obj.getbuffer())
-        return payload.getbuffer().tobytes()
+        return len(buf) - start
 
     def deserialize_only_data(self, data: bytes, spec: MsgDescr
                               ) -> Tuple[Optional[Message], memoryview]:
         """Декодировать сообщение без оболочки."""
         return self.deserialize(memoryview(
             kbetype.MESSAGE_ID.encode(spec.id) \
-            + (kbetype.MESSAGE_LENGTH.encode(len(data)) if spec.need_calc_length else b'') \
+            + (encode_message_length(len(data)) if spec.need_calc_length else b'') \
             + data
         ))
 
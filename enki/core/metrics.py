@@ -0,0 +1,305 @@
+"""Metrics of the messages: counts, bytes and timings per message.
+
+Also the metrics of the callbacks passed from the network thread to the
+game thread of the client (see clientapp.layer.thlayer): time in the
+queue, time of the callback and depth of the queue per callback.
+
+The registry is created at import if the "METRICS" setting is on (or by
+enable()). MessageSerializer takes it at construction (the serializers
+created before enable() are not measured), LazyMessage, App and
+Supervisor read the module attribute "registry" per message. While it
+is None nothing is measured. The metrics are exported as
+Prometheus text (see net.metricsexport).
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+from typing import Iterator, Optional
+
+from enki import settings
+
+# Гистограмма в духе HDR: каждый интервал [2^k, 2^(k+1)) наносекунд делится
+# на 2^_SUB_BITS частей (относительная погрешность до 1 / 2^_SUB_BITS)
+_SUB_BITS = 2
+_SUB_COUNT = 1 << _SUB_BITS
+_EXACT_LIMIT = 1 << (_SUB_BITS + 1)
+# Корзины для значений до 2^64 нс
+_BUCKET_COUNT = (64 - _SUB_BITS + 1) * _SUB_COUNT
+# Границы корзин при экспорте: от 1 мкс до ~69 с степенями двойки
+_EXPORT_BOUNDS_NS = tuple(1 << power for power in range(10, 37))
+# Границы глубины очереди: значения меньше 2^k совпадают с границами корзин
+_EXPORT_DEPTH_BOUNDS = tuple(1 << power for power in range(0, 17))
+
+
+def _bucket_index(value: int) -> int:
+    if value < _EXACT_LIMIT:
+        return value
+    shift = value.bit_length() - _SUB_BITS - 1
+    return (shift << _SUB_BITS) + (value >> shift)
+
+
+def _bucket_upper_bound(index: int) -> int:
+    """The exclusive upper bound (ns) of the bucket."""
+    if index < _EXACT_LIMIT:
+        return index + 1
+    shift = index // _SUB_COUNT - 1
+    top = index % _SUB_COUNT + _SUB_COUNT
+    return (top + 1) << shift
+
+
+class Histogram:
+    """Histogram of durations in nanoseconds with log-linear buckets.
+
+    Other non-negative integers (the depth of a queue) are recorded the same way.
+
+    Recording is an index calculation and an increment of a list item.
+    """
+
+    __slots__ = ('_counts', 'sum_ns')
+
+    def __init__(self) -> None:
+        self._counts = [0] * _BUCKET_COUNT
+        self.sum_ns = 0
+
+    def record(self, value_ns: int):
+        # То же, что _bucket_index, без вызова функции
+        if value_ns < _EXACT_LIMIT:
+            self._counts[value_ns] += 1
+        else:
+            shift = value_ns.bit_length() - _SUB_BITS - 1
+            self._counts[(shift << _SUB_BITS) + (value_ns >> shift)] += 1
+        self.sum_ns += value_ns
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def quantile(self, q: float) -> int:
+        """The upper bound (ns) of the bucket with the "q" quantile."""
+        count = self.count
+        if not count:
+            return 0
+        rank = q * count
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if count and seen >= rank:
+                return _bucket_upper_bound(index)
+        return 0
+
+    def cumulative(self, bounds_ns: tuple[int, ...]) -> list[int]:
+        """Counts of the values less than each of the bounds (ascending)."""
+        result = []
+        seen, index = 0, 0
+        for bound in bounds_ns:
+            while index < _BUCKET_COUNT and _bucket_upper_bound(index) <= bound:
+                seen += self._counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+
+class MsgMetrics:
+    """Metrics of one message."""
+
+    __slots__ = ('name', 'received', 'received_bytes', 'decode',
+                 'sent', 'sent_bytes', 'encode', 'handle')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.received = 0
+        self.received_bytes = 0
+        self.sent = 0
+        self.sent_bytes = 0
+        self.decode = Histogram()
+        self.encode = Histogram()
+        # Время обработчика сообщения (App, Supervisor)
+        self.handle = Histogram()
+
+
+class CallbackMetrics:
+    """Metrics of one callback type of the game queue.
+
+    "depth" is recorded by the network thread, "wait" and "run" by the game
+    thread, so every histogram is changed by one thread only.
+    """
+
+    __slots__ = ('name', 'wait', 'run', 'depth')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # Время от постановки в очередь до вызова колбэка
+        self.wait = Histogram()
+        # Время выполнения колбэка
+        self.run = Histogram()
+        # Глубина очереди при постановке (сколько колбэков впереди)
+        self.depth = Histogram()
+
+
+class MetricsRegistry:
+    """Metrics of the messages by the name of the message.
+
+    The metrics are recorded for one of "sample" batches of messages (a
+    chunk of the stream, a datagram, a sent message): even the counters
+    cost too much per message compared to decoding of a small one. The
+    counters of the sampled message are incremented by "sample", so the
+    exported messages and bytes are estimates (exact if "sample" is 1).
+    MessageSerializer samples the batches by its own countdown (see
+    MessageSerializer.sampled_deserialize), the handlers call "time_next"
+    to know whether to measure the current message.
+    """
+
+    def __init__(self, sample: int = settings.METRICS_SAMPLE) -> None:
+        self._by_name: dict[str, MsgMetrics] = {}
+        self._by_callback: dict[str, CallbackMetrics] = {}
+        # Метрики нового сообщения могут создаваться в разных потоках
+        # (сетевой и игровой потоки клиента)
+        self._lock = threading.Lock()
+        self.sample = max(sample, 1)
+        # Встроенная функция, вызов дешевле метода
+        self.time_next = itertools.cycle(
+            [True] + [False] * (self.sample - 1)).__next__
+
+    def msg(self, name: str) -> MsgMetrics:
+        metrics = self._by_name.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._by_name.setdefault(name, MsgMetrics(name))
+        return metrics
+
+    def on_decoded(self, name: str, size: int, duration_ns: int = -1, count: int = 1):
+        """Count the received message ("duration_ns" -1 - not measured).
+
+        "count" is the number of the messages the sampled one stands for.
+        """
+        metrics = self._by_name.get(name) or self.msg(name)
+        metrics.received += count
+        metrics.received_bytes += size * count
+        if duration_ns >= 0:
+            metrics.decode.record(duration_ns)
+
+    def on_encoded(self, name: str, size: int, duration_ns: int = -1, count: int = 1):
+        """Count the sent message ("duration_ns" -1 - not measured)."""
+        metrics = self._by_name.get(name) or self.msg(name)
+        metrics.sent += count
+        metrics.sent_bytes += size * count
+        if duration_ns >= 0:
+            metrics.encode.record(duration_ns)
+
+    def on_handled(self, name: str, duration_ns: int):
+        (self._by_name.get(name) or self.msg(name)).handle.record(duration_ns)
+
+    def callback(self, name: str) -> CallbackMetrics:
+        metrics = self._by_callback.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._by_callback.setdefault(name, CallbackMetrics(name))
+        return metrics
+
+    def on_enqueued(self, name: str, depth: int):
+        """The callback is put to the game queue with "depth" items before it."""
+        (self._by_callback.get(name) or self.callback(name)).depth.record(depth)
+
+    def on_dequeued(self, name: str, wait_ns: int, run_ns: int):
+        """The callback has waited in the game queue and has been called."""
+        metrics = self._by_callback.get(name) or self.callback(name)
+        metrics.wait.record(wait_ns)
+        metrics.run.record(run_ns)
+
+    def __iter__(self) -> Iterator[MsgMetrics]:
+        return iter(list(self._by_name.values()))
+
+    def callbacks(self) -> list[CallbackMetrics]:
+        return list(self._by_callback.values())
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text format."""
+        return ''.join(_prometheus_lines(self))
+
+    def write_prometheus(self, path: str):
+        """Write the metrics to the file (atomically, for the textfile collector)."""
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}(messages={len(self._by_name)})'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _prometheus_lines(registry: MetricsRegistry) -> Iterator[str]:
+    items = sorted(registry, key=lambda m: m.name)
+    for metric, attr, help_text in (
+            ('enki_messages_received_total', 'received', 'Received messages'),
+            ('enki_messages_received_bytes_total', 'received_bytes', 'Received bytes'),
+            ('enki_messages_sent_total', 'sent', 'Sent messages'),
+            ('enki_messages_sent_bytes_total', 'sent_bytes', 'Sent bytes')):
+        yield f'# HELP {metric} {help_text}\n# TYPE {metric} counter\n'
+        for item in items:
+            yield f'{metric}{{msg="{_escape(item.name)}"}} {getattr(item, attr)}\n'
+
+    for metric, attr, help_text in (
+            ('enki_message_decode_seconds', 'decode', 'Decoding time of sampled messages'),
+            ('enki_message_encode_seconds', 'encode', 'Encoding time of sampled messages'),
+            ('enki_message_handle_seconds', 'handle', 'Handling time of sampled messages')):
+        yield f'# HELP {metric} {help_text}\n# TYPE {metric} histogram\n'
+        for item in items:
+            hist: Histogram = getattr(item, attr)
+            count = hist.count
+            if not count:
+                continue
+            label = f'msg="{_escape(item.name)}"'
+            for bound, count_le in zip(_EXPORT_BOUNDS_NS, hist.cumulative(_EXPORT_BOUNDS_NS)):
+                yield f'{metric}_bucket{{{label},le="{bound / 1e9:g}"}} {count_le}\n'
+            yield f'{metric}_bucket{{{label},le="+Inf"}} {count}\n'
+            yield f'{metric}_sum{{{label}}} {hist.sum_ns / 1e9:.9f}\n'
+            yield f'{metric}_count{{{label}}} {count}\n'
+
+    callbacks = sorted(registry.callbacks(), key=lambda m: m.name)
+    for metric, attr, help_text, scale in (
+            ('enki_game_queue_wait_seconds', 'wait', 'Time of the callbacks in the game queue', 1e9),
+            ('enki_game_callback_seconds', 'run', 'Time of the callbacks in the game thread', 1e9),
+            ('enki_game_queue_depth', 'depth', 'Depth of the game queue at putting of the callback', 0)):
+        yield f'# HELP {metric} {help_text}\n# TYPE {metric} histogram\n'
+        for item in callbacks:
+            hist = getattr(item, attr)
+            count = hist.count
+            if not count:
+                continue
+            label = f'callback="{_escape(item.name)}"'
+            if scale:
+                bounds = [(bound, f'{bound / scale:g}') for bound in _EXPORT_BOUNDS_NS]
+                total = f'{hist.sum_ns / scale:.9f}'
+            else:
+                # Глубина целая: "меньше 2^k" это "не больше 2^k - 1"
+                bounds = [(bound, str(bound - 1)) for bound in _EXPORT_DEPTH_BOUNDS]
+                total = str(hist.sum_ns)
+            cumulative = hist.cumulative(tuple(bound for bound, _le in bounds))
+            for (_bound, le), count_le in zip(bounds, cumulative):
+                yield f'{metric}_bucket{{{label},le="{le}"}} {count_le}\n'
+            yield f'{metric}_bucket{{{label},le="+Inf"}} {count}\n'
+            yield f'{metric}_sum{{{label}}} {total}\n'
+            yield f'{metric}_count{{{label}}} {count}\n'
+
+
+registry: Optional[MetricsRegistry] = MetricsRegistry() if settings.METRICS else None
+
+
+def enable() -> MetricsRegistry:
+    """Create the registry (if there is none) and start measuring."""
+    global registry
+    if registry is None:
+        registry = MetricsRegistry()
+    return registry
+
+
+def disable():
+    global registry
+    registry = None
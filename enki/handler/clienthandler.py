@@ -15,7 +15,7 @@ from .base import ParsedMsgData, HandlerResult, Handler
 from .serverhandler.common import OnRegisterNewAppParsedData
 
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 
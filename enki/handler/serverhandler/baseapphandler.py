@@ -16,7 +16,7 @@ from .common import CreateEntityAnywhereParsedData, CreateEntityAnywhereParser,
     OnAppActiveTickParsedData, OnDbmgrInitCompletedParsedData, \
     OnGetEntityAppFromDbmgrParsedData, OnRegisterNewAppParsedData
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
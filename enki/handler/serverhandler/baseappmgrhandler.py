@@ -13,7 +13,7 @@ from enki.misc import devonly
 from ..base import ParsedMsgData, HandlerResult, Handler
 from .common import CreateEntityAnywhereParser, CreateEntityAnywhereParsedData, OnAppActiveTickParsedData, OnRegisterNewAppParsedData
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -16,7 +16,7 @@ from ..base import ParsedMsgData, HandlerResult, Handler
 from .common import CreateCellEntityInNewSpaceFromBaseappParsedData, \
     CreateCellEntityInNewSpaceFromBaseappParser, OnAppActiveTickParsedData, OnDbmgrInitCompletedParsedData, OnGetEntityAppFromDbmgrParsedData, OnRegisterNewAppParsedData
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
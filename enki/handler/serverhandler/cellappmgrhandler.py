@@ -14,7 +14,7 @@ from .common import CreateCellEntityInNewSpaceFromBaseappParsedData, \
     CreateCellEntityInNewSpaceFromBaseappParser, LookAppParsedData, \
     OnAppActiveTickParsedData, OnRegisterNewAppParsedData
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -17,7 +17,7 @@ from enki.misc import devonly
 
 from ..base import ParsedMsgData, HandlerResult, Handler
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
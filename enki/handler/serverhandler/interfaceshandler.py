@@ -10,7 +10,7 @@ from enki.misc import devonly
 from ..base import Handler, HandlerResult, ParsedMsgData
 from .common import OnAppActiveTickParsedData, OnRegisterNewAppParsedData
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
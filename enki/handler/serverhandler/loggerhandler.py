@@ -13,7 +13,7 @@ from ..base import ParsedMsgData, HandlerResult, Handler
 from .common import OnRegisterNewAppParsedData
 
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
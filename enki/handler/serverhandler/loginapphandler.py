@@ -11,7 +11,7 @@ from ..base import ParsedMsgData, HandlerResult, Handler
 from .common import OnAppActiveTickParsedData, OnDbmgrInitCompletedParsedData
 
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
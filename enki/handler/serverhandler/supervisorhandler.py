@@ -20,7 +20,7 @@ from enki.misc import devonly
 
 from ..base import ParsedMsgData, Handler, HandlerResult
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 
 
 @dataclass
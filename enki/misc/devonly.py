@@ -2,28 +2,51 @@
 
 It should be disabled in production usage."""
 
-import inspect
+from __future__ import annotations
 
+import sys
+from types import FrameType
+from typing import Optional
 
-def func_args_values() -> str:
+
+class _FuncArgsValues:
+    """Arguments of a function formatted on the first str() call.
+
+    Logging formats the arguments of a record only if the record is
+    emitted, so with the disabled level only the frame is taken.
+    """
+    __slots__ = ('_frame', '_text')
+
+    def __init__(self, frame: FrameType):
+        self._frame: Optional[FrameType] = frame
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            frame = self._frame
+            assert frame is not None
+            f_locals = frame.f_locals
+            self._text = ', '.join(
+                '%s = %s' % (name, f_locals[name]) for name in frame.f_code.co_varnames
+                if name in f_locals and name not in ('self', 'cls')
+            )
+            # Кадр больше не нужен, не держим его локальные переменные
+            self._frame = None
+        return self._text
+
+    __repr__ = __str__
+
+
+def func_args_values() -> _FuncArgsValues:
     """
     Returns arguments of a callee function and its values in
     the format "name = value".
 
-    For debug logging.
+    For debug logging. The values are formatted lazily, when the result
+    is converted to str (i.e. the record is emitted), so pass it as an
+    argument of the logging call, not inside an f-string.
     """
-    upper_frame_info = inspect.stack()[1]
-    upper_function_frame = upper_frame_info[0]
-    var_names = upper_function_frame.f_code.co_varnames
-    args_values = []
-    for arg_name in var_names:
-        if arg_name not in upper_function_frame.f_locals:
-            continue
-        if arg_name in ('self', 'cls'):
-            continue
-        value = upper_function_frame.f_locals[arg_name]
-        args_values.append((arg_name, value))
-    return ', '.join('%s = %s' % (arg_name, value) for arg_name, value in args_values)
+    return _FuncArgsValues(sys._getframe(1))
 
 
 class LogicError(Exception):
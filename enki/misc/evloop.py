@@ -0,0 +1,52 @@
+"""Event loop implementation (uvloop if it is enabled and installed)."""
+
+import asyncio
+import logging
+from typing import Any, Coroutine, TypeVar
+
+from enki import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+def _import_uvloop():
+    if not settings.USE_UVLOOP:
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        # uvloop не обязателен, работаем на стандартном цикле
+        logger.debug('uvloop is not installed, the default event loop is used')
+        return None
+    return uvloop
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create a new event loop."""
+    uvloop = _import_uvloop()
+    if uvloop is None:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """The event loop of the current thread (for a thread running the loop).
+
+    With uvloop a new loop is created and set as the current one.
+    """
+    uvloop = _import_uvloop()
+    if uvloop is None:
+        return asyncio.get_event_loop()
+    loop = uvloop.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """The same as asyncio.run, but on the chosen event loop."""
+    uvloop = _import_uvloop()
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(main)
@@ -1,14 +1,59 @@
 """Logging settings."""
 
+import atexit
 import logging
+import os
+import queue
 import sys
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from enki import settings
 
 DEBUG_FORMAT = '[%(levelname)-7s] [%(asctime)s] [%(threadName)s] [%(filename)s:%(lineno)s - %(funcName)s()] %(message)s'
 INFO_FORMAT = '[%(levelname)-7s] [%(asctime)s] %(message)s'
 
+# Суффикс имени логгера канала сообщений (см. msg_logger)
+MSG_CHANNEL = 'msg'
+
+_queue_handler: Optional['DroppingQueueHandler'] = None
+_listener: Optional['_Listener'] = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler with a bounded queue: if it is full the record is dropped."""
+
+    def __init__(self, queue_: queue.Queue) -> None:
+        super().__init__(queue_)
+        # Счётчик меняется под блокировкой обработчика (Handler.handle)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+
+    def enqueue_sentinel(self):
+        # Очередь может быть полна, поток записи её освободит
+        self.queue.put(self._sentinel)
+
+
+def setup_root_logger(level_name: str, log_format: Optional[str] = None,
+                      levels: Optional[str] = None, queue_size: Optional[int] = None):
+    """Set up the root logger and the levels of the subsystems.
 
-def setup_root_logger(level_name: str, log_format: Optional[str] = None):
+    "levels" is a comma separated list of "logger=LEVEL" pairs (by default
+    settings.LOG_LEVELS), e.g. "enki.net=INFO,enki.app.clientapp.appl.msg=DEBUG".
+
+    If "queue_size" (by default settings.LOG_QUEUE_SIZE) is above zero the
+    records are written to stdout by a separate thread. The logging threads
+    only put the records to a queue of this size; if it is full the records
+    are dropped (see dropped_records).
+    """
     level = logging.getLevelName(level_name)
     if not isinstance(level, int):
         logging.error(f'There is no debug level "{level_name}". Exit')
@@ -24,4 +69,131 @@ def setup_root_logger(level_name: str, log_format: Optional[str] = None):
             log_format = INFO_FORMAT
     formatter = logging.Formatter(log_format)
     stream_handler.setFormatter(formatter)
-    logger.handlers = [stream_handler]
+
+    stop_listener()
+    if queue_size is None:
+        queue_size = settings.LOG_QUEUE_SIZE
+    if queue_size > 0:
+        _start_listener(stream_handler, queue_size)
+        logger.handlers = [_queue_handler]
+    else:
+        logger.handlers = [stream_handler]
+
+    setup_levels(settings.LOG_LEVELS if levels is None else levels)
+
+
+def _start_listener(handler: logging.Handler, queue_size: int):
+    global _queue_handler, _listener
+    records: queue.Queue = queue.Queue(queue_size)
+    if _queue_handler is None:
+        _queue_handler = DroppingQueueHandler(records)
+    else:
+        # Счётчик отброшенных записей сохраняется
+        _queue_handler.queue = records
+    _listener = _Listener(records, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_listener():
+    """Write the queued records and stop the thread writing the logs."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    """The number of records dropped because the queue of the logs was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def _after_fork_in_child():
+    # Поток записи не переживает fork (например, обработчики SupervisorCluster),
+    # а очередь могла быть заблокирована другим потоком. Дочерний процесс
+    # получает свои очередь и поток записи.
+    global _listener
+    if _listener is None:
+        return
+    handler = _listener.handlers[0]
+    _listener = None
+    _start_listener(handler, _queue_handler.queue.maxsize)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(stop_listener)
+
+
+def setup_levels(levels: str):
+    """Set the levels of the loggers by the "logger=LEVEL,..." string."""
+    for item in filter(None, (i.strip() for i in levels.split(','))):
+        name, sep, level_name = item.partition('=')
+        level = logging.getLevelName(level_name.strip().upper())
+        if not sep or not isinstance(level, int):
+            logging.error(f'Wrong logger level "{item}" (expected "logger=LEVEL"). Exit')
+            sys.exit(1)
+        logging.getLogger(name.strip()).setLevel(level)
+
+
+class Fields:
+    """Fields of a log record rendered only when the record is emitted.
+
+    A callable value is called at rendering (e.g. Fields(values=msg.get_values)).
+    """
+
+    __slots__ = ('_fields', )
+
+    def __init__(self, **fields: Any) -> None:
+        self._fields = fields
+
+    def __str__(self) -> str:
+        return ', '.join(
+            f'{name}={value() if callable(value) else value}'
+            for name, value in self._fields.items()
+        )
+
+    __repr__ = __str__
+
+
+class SampledLogger:
+    """Канал отладочных записей на каждое сообщение.
+
+    Записывается каждая "sample"-я запись канала (0 - канал выключен).
+    Пропущенная запись не создаётся и не форматируется. Уровень канала
+    (DEBUG) проверяется логгером, т.е. его можно задать через LOG_LEVELS.
+    """
+
+    __slots__ = ('_logger', '_sample', '_counter')
+
+    def __init__(self, logger: logging.Logger, sample: int) -> None:
+        self._logger = logger
+        self._sample = sample
+        self._counter = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._sample > 0 and self._logger.isEnabledFor(logging.DEBUG)
+
+    def debug(self, msg: str, *args: Any):
+        if self._sample <= 0 or not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        self._counter += 1
+        if self._counter < self._sample:
+            return
+        self._counter = 0
+        # stacklevel указывает на вызывающий код, а не на этот метод
+        self._logger.debug(msg, *args, stacklevel=2)
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}(name={self._logger.name}, sample={self._sample})'
+
+
+def msg_logger(name: str, sample: Optional[int] = None) -> SampledLogger:
+    """Channel of the per-message records of the module "name".
+
+    The channel is the child logger "<name>.msg", so the level of the
+    subsystem gates it too. "sample" is settings.LOG_MSG_SAMPLE by default.
+    """
+    if sample is None:
+        sample = settings.LOG_MSG_SAMPLE
+    return SampledLogger(logging.getLogger(f'{name}.{MSG_CHANNEL}'), sample)
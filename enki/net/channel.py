@@ -7,7 +7,7 @@ from asyncio import StreamWriter
 from enki.misc import devonly
 from enki.core.enkitype import AppAddr
 from enki.core.message import Message
-from enki.net.client import UDPClient
+from enki.net import udppool
 
 from .inet import ChannelType, ConnectionInfo, IChannel
 
@@ -36,13 +36,9 @@ class UDPChannel(IChannel):
     async def send_msg_content(self, data: bytes, addr: AppAddr, channel_type: ChannelType) -> bool:
         logger.debug('[%s] %s', self, devonly.func_args_values())
         if channel_type == ChannelType.UDP:
-            client = UDPClient(addr)
-            await client.send(data)
-            return True
+            return await udppool.sendto(data, addr)
         if channel_type == ChannelType.BROADCAST:
-            client = UDPClient(addr, broadcast=True)
-            await client.send(data)
-            return True
+            return await udppool.sendto(data, addr, broadcast=True)
         raise NotImplementedError
         return False
 
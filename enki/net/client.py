@@ -4,33 +4,41 @@ from __future__ import annotations
 
 import abc
 import asyncio
+import enum
 import logging
-import socket
-from asyncio import DatagramTransport, Future, Protocol, Transport
-from typing import Callable, Optional
+import time
+from asyncio import BufferedProtocol, Future, Protocol, Transport
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Collection, Hashable, Optional
 
 from enki import settings
-from enki.misc import devonly
+from enki.misc import devonly, log
 from enki.core.enkitype import Result, AppAddr
 from enki.core import msgspec
-from enki.core.message import Message, MsgDescr
+from enki.core.message import LazyMessage, Message, MsgDescr
 from enki.core.message import MessageSerializer
 
+from . import udppool
+from .framedecoder import FrameDecoder, ReceiveBuffer
+from .sockopt import SocketOptions, tcp_options
 from .inet import IClientDataReceiver, IClientMsgSender, IDataSender, \
     IMsgForwarder, IClientMsgReceiver, IServerMsgSender, IStartable
 
 logger = logging.getLogger(__name__)
+# Записи на каждое сообщение (см. misc.log.msg_logger)
+msg_logger = log.msg_logger(__name__)
 
 
 class _DefaultMsgReceiver(IClientMsgReceiver):
     """Message receiver using by default after initialization of the client."""
 
     def on_receive_msg(self, msg: Message) -> bool:
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        logger.debug('[%s] (%s)', self, devonly.func_args_values())
         return True
 
     def on_end_receive_msg(self):
-        logger.debug(f'[{self}] ({devonly.func_args_values()})')
+        logger.debug('[%s] (%s)', self, devonly.func_args_values())
 
 
 class _TCPClientProtocol(Protocol):
@@ -60,13 +68,15 @@ class _TCPClientProtocol(Protocol):
         self._client.on_end_receive_data()
 
     def pause_writing(self):
-        logger.warning('[%s] %s', self, devonly.func_args_values())
+        logger.debug('[%s] %s', self, devonly.func_args_values())
+        self._client.on_pause_writing()
 
     def resume_writing(self):
         logger.debug('[%s] %s', self, devonly.func_args_values())
+        self._client.on_resume_writing()
 
     def data_received(self, data: bytes):
-        logger.debug('[%s] %s', self, data)
+        msg_logger.debug('[%s] %s', self, data)
         self._client.on_receive_data(memoryview(data))
 
     def eof_received(self) -> bool:
@@ -77,22 +87,120 @@ class _TCPClientProtocol(Protocol):
         return f'{self.__class__.__name__}()'
 
 
+class _BufferedTCPClientProtocol(_TCPClientProtocol, BufferedProtocol):
+    """The protocol reading the data directly to the receive buffer.
+
+    The client gets a view of the buffer (without copying of the data),
+    the buffer is reused after the client has handled the data.
+    """
+
+    def __init__(self, client: IClientDataReceiver,
+                 buffer_size: int = settings.TCP_RECV_BUFFER_SIZE):
+        super().__init__(client)
+        self._recv_buffer = ReceiveBuffer(buffer_size)
+
+    def get_buffer(self, sizehint: int) -> bytearray:
+        # Сам bytearray, а не memoryview, иначе буфер останется
+        # экспортированным транспортом на время вызова buffer_updated
+        return self._recv_buffer.buffer
+
+    def buffer_updated(self, nbytes: int):
+        self._client.on_receive_data(self._recv_buffer.view(nbytes))
+        self._recv_buffer.release()
+
+
+class OverflowPolicy(enum.Enum):
+    """What TCPClient does with the data while the peer doesn't read it."""
+    # send() ждёт, пока буфер отправки не освободится
+    BLOCK = 'block'
+    # Данные копятся в очереди: данные с тем же ключом (устаревшее обновление
+    # положения) заменяются, самые старые данные сверх верхней границы
+    # буфера отбрасываются
+    DROP_OLDEST = 'drop_oldest'
+    # Соединение закрывается
+    DISCONNECT = 'disconnect'
+
+
+@dataclass
+class WriteStats:
+    """Counters of the outgoing data of TCPClient."""
+    # Data in the buffer of the transport and in the queue of DROP_OLDEST
+    buffered_bytes: int = 0
+    max_buffered_bytes: int = 0
+    pending_bytes: int = 0
+    # How many times and how long the writing was paused
+    pauses: int = 0
+    paused_seconds: float = 0.0
+    # Dropped by DROP_OLDEST
+    dropped: int = 0
+    dropped_bytes: int = 0
+
+
 class TCPClient(IStartable, IClientDataReceiver, IDataSender):
 
-    def __init__(self, addr: AppAddr, on_receive_data: Callable[[bytes], None] | None = None):
+    def __init__(self, addr: AppAddr, on_receive_data: Callable[[bytes], None] | None = None,
+                 buffered_protocol: bool = False,
+                 overflow_policy: OverflowPolicy = OverflowPolicy(settings.TCP_OVERFLOW_POLICY),
+                 write_high_water: int = settings.TCP_WRITE_HIGH_WATER,
+                 write_low_water: int = settings.TCP_WRITE_LOW_WATER,
+                 socket_options: Optional[SocketOptions] = None):
         self._addr = addr
+        # Читать данные сразу в буфер соединения (asyncio.BufferedProtocol)
+        self._buffered_protocol = buffered_protocol
+        # Параметры сокета (по умолчанию из настроек)
+        self._socket_options = socket_options if socket_options is not None \
+            else tcp_options()
         self._transport: Optional[Transport] = None
         self._on_receive_data: Callable[[bytes], None] = \
             on_receive_data if on_receive_data is not None else lambda data: None
+        self._overflow_policy = overflow_policy
+        self._write_high_water = write_high_water
+        self._write_low_water = write_low_water
+        # Отправка остановлена, пока future не выполнится
+        self._writable: Optional[Future] = None
+        self._paused_at = 0.0
+        # Очередь данных DROP_OLDEST, пока отправка остановлена
+        self._pending: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._write_stats = WriteStats()
+        # Выполняется при закрытии соединения (создаётся при подключении)
+        self._closed: Optional[Future] = None
 
     @property
     def is_alive(self) -> bool:
         return self._transport is not None
 
+    @property
+    def closed(self) -> Future:
+        """The future done after the connection is closed."""
+        if self._closed is None:
+            self._closed = asyncio.get_running_loop().create_future()
+            if self._transport is None:
+                self._closed.set_result(None)
+        return self._closed
+
+    def set_on_receive_data(self, on_receive_data: Callable[[bytes], None]):
+        self._on_receive_data = on_receive_data
+
+    @property
+    def is_paused(self) -> bool:
+        """The writing is paused (the peer doesn't read the data in time)."""
+        return self._writable is not None
+
+    @property
+    def write_stats(self) -> WriteStats:
+        stats = self._write_stats
+        stats.buffered_bytes = self._buffered_bytes()
+        if self._writable is not None:
+            return replace(
+                stats, paused_seconds=stats.paused_seconds + time.monotonic() - self._paused_at)
+        return replace(stats)
+
     async def start(self) -> Result:
         loop = asyncio.get_running_loop()
+        protocol_cls = _BufferedTCPClientProtocol if self._buffered_protocol \
+            else _TCPClientProtocol
         future = loop.create_connection(
-            lambda: _TCPClientProtocol(self),
+            lambda: protocol_cls(self),
             self._addr.host, self._addr.port,
         )
         logger.info('[%s] Connecting to the server ...', self)
@@ -102,6 +210,9 @@ class TCPClient(IStartable, IClientDataReceiver, IDataSender):
             )
         except (asyncio.TimeoutError, OSError, ConnectionError) as err:
             return Result(False, None, str(err))
+        self._socket_options.apply(self._transport.get_extra_info('socket'))
+        self._transport.set_write_buffer_limits(self._write_high_water, self._write_low_water)
+        self._closed = loop.create_future()
 
         logger.debug('[%s] Connected', self)
         return Result(True, None)
@@ -113,121 +224,253 @@ class TCPClient(IStartable, IClientDataReceiver, IDataSender):
             return
         self._transport.close()
         self._transport = None
+        if self._pending:
+            logger.warning('[%s] The connection is closed, %s bytes are not sent',
+                           self, self._write_stats.pending_bytes)
+            self._pending.clear()
+            self._write_stats.pending_bytes = 0
+        # Ожидающие отправки узнают, что соединения больше нет
+        self.on_resume_writing()
+        if self._closed is not None and not self._closed.done():
+            self._closed.set_result(None)
 
     def on_receive_data(self, data: memoryview):
-        logger.debug('[%s] Received data (%s)', self, data.obj)
+        msg_logger.debug('[%s] Received data (%s bytes)', self, len(data))
         self._on_receive_data(data.tobytes())
 
     def on_end_receive_data(self):
         logger.debug('[%s] %s', self, devonly.func_args_values())
         self.stop()
 
-    async def send(self, data: bytes) -> bool:
+    def on_pause_writing(self):
+        logger.warning('[%s] The server does not read the data in time (%s bytes are buffered)',
+                       self, self._buffered_bytes())
+        if self._overflow_policy == OverflowPolicy.DISCONNECT:
+            logger.error('[%s] The connection is closed by the overflow policy', self)
+            self.stop()
+            return
+        if self._writable is None:
+            self._writable = asyncio.get_running_loop().create_future()
+            self._paused_at = time.monotonic()
+            self._write_stats.pauses += 1
+
+    def on_resume_writing(self):
+        if self._writable is None:
+            return
+        logger.info('[%s] The writing is resumed', self)
+        writable, self._writable = self._writable, None
+        self._write_stats.paused_seconds += time.monotonic() - self._paused_at
+        if not writable.done():
+            writable.set_result(None)
+        self._write_pending()
+
+    async def drain(self):
+        """Wait until the writing is resumed (or the connection is closed)."""
+        while self._writable is not None:
+            # Отмена одного ожидающего не должна отменять ожидание остальных
+            await asyncio.shield(self._writable)
+
+    async def send(self, data: bytes, key: Optional[Hashable] = None) -> bool:
+        """Send the data.
+
+        The data with the same key not sent yet is replaced by the new one
+        (the policy DROP_OLDEST).
+        """
         if self._transport is None:
             logger.warning('[%s] The connection is not connected (data=%s)',
                            self, devonly.func_args_values())
             return False
-        self._transport.write(data)
+        if self._writable is not None and self._overflow_policy == OverflowPolicy.BLOCK:
+            await self.drain()
+        if not self._write(data, key):
+            return False
         logger.debug('[%s] Data has been sent', self)
         return True
 
+    def _buffered_bytes(self) -> int:
+        size = self._write_stats.pending_bytes
+        if self._transport is not None:
+            size += self._transport.get_write_buffer_size()
+        return size
+
+    def _write(self, data: bytes, key: Optional[Hashable] = None) -> bool:
+        """Write the data according to the overflow policy."""
+        transport = self._transport
+        if transport is None or transport.is_closing():
+            logger.warning('[%s] The connection is closed, %s bytes are not sent',
+                           self, len(data))
+            return False
+        stats = self._write_stats
+        if self._writable is not None and self._overflow_policy == OverflowPolicy.DROP_OLDEST:
+            self._enqueue(data, key)
+        else:
+            # Может вызвать on_pause_writing
+            transport.write(data)
+        stats.max_buffered_bytes = max(stats.max_buffered_bytes, self._buffered_bytes())
+        return True
+
+    def _enqueue(self, data: bytes, key: Optional[Hashable]):
+        pending, stats = self._pending, self._write_stats
+        if key is None:
+            # Данные без ключа ничего не заменяют
+            key = object()
+        else:
+            superseded = pending.pop(key, None)
+            if superseded is not None:
+                stats.pending_bytes -= len(superseded)
+                stats.dropped += 1
+                stats.dropped_bytes += len(superseded)
+        pending[key] = data
+        stats.pending_bytes += len(data)
+        while stats.pending_bytes > self._write_high_water and len(pending) > 1:
+            _, oldest = pending.popitem(last=False)
+            stats.pending_bytes -= len(oldest)
+            stats.dropped += 1
+            stats.dropped_bytes += len(oldest)
+
+    def _write_pending(self):
+        pending, stats = self._pending, self._write_stats
+        # Запись может снова остановить отправку
+        while pending and self._writable is None and self._transport is not None:
+            _, data = pending.popitem(last=False)
+            stats.pending_bytes -= len(data)
+            self._transport.write(data)
+
     def __str__(self) -> str:
         return f'{__class__.__name__}({self._addr})'
 
 
+def _get_superseding_key(msg: Message) -> Optional[Hashable]:
+    """The key of the message replacing the not sent one with the same key.
+
+    A new position update of the entity supersedes the previous one.
+    """
+    if msg.id == msgspec.app.baseapp.onUpdateDataFromClient.id:
+        return (msg.id, )
+    if msg.id == msgspec.app.baseapp.onUpdateDataFromClientForControlledEntity.id:
+        # Обновление положения конкретной управляемой сущности
+        return (msg.id, msg.get_values()[0])
+    return None
+
+
 class MsgTCPClient(TCPClient, IMsgForwarder, IClientMsgSender):
     """TCPClient of a KBEngine server."""
 
-    def __init__(self, addr: AppAddr, msg_spec_by_id: dict[int, MsgDescr]):
-        super().__init__(addr)
-        self._serializer = MessageSerializer(msg_spec_by_id)
+    def __init__(self, addr: AppAddr, msg_spec_by_id: dict[int, MsgDescr],
+                 lazy_msg_ids: Collection[int] = (), buffered_protocol: bool = False,
+                 corked: bool = False, cork_delay: float = settings.TCP_CORK_DELAY,
+                 cork_size: int = settings.TCP_CORK_SIZE,
+                 overflow_policy: OverflowPolicy = OverflowPolicy(settings.TCP_OVERFLOW_POLICY),
+                 write_high_water: int = settings.TCP_WRITE_HIGH_WATER,
+                 write_low_water: int = settings.TCP_WRITE_LOW_WATER,
+                 socket_options: Optional[SocketOptions] = None):
+        super().__init__(addr, buffered_protocol=buffered_protocol,
+                         overflow_policy=overflow_policy,
+                         write_high_water=write_high_water, write_low_water=write_low_water,
+                         socket_options=socket_options)
+        # Сообщения из lazy_msg_ids декодируются при обращении к полям (LazyMessage)
+        self._serializer = MessageSerializer(msg_spec_by_id, lazy_msg_ids)
         self._msg_receiver = _DefaultMsgReceiver()
-        self._in_buffer = b''
+        # Сообщение, разделённое между частями данных, собирается декодером
+        self._frame_decoder = FrameDecoder(self._serializer)
+        # В режиме corked сообщения, отправленные за одну итерацию цикла
+        # событий (или за cork_delay секунд), пишутся в сокет одним вызовом.
+        # Накопленные данные пишутся сразу, если их больше cork_size.
+        self._corked = corked
+        self._cork_delay = cork_delay
+        self._cork_size = cork_size
+        self._cork_buffer = bytearray()
+        self._flush_handle: Optional[asyncio.Handle] = None
 
     def set_msg_receiver(self, receiver: IClientMsgReceiver):
         self._msg_receiver = receiver
 
     def on_receive_data(self, data: memoryview):
-        logger.debug('[%s] Received data (%s)', self, data.obj)
-        if self._in_buffer:
-            # Waiting for next chunks of the message
-            data = memoryview(self._in_buffer + data)
-        while data:
-            msg, data = self._serializer.deserialize(data)
-            if msg is None:
-                logger.debug('[%s] Got chunk of the message', self)
-                self._in_buffer += data
-                return
-
-            logger.debug('[%s] Message "%s" fields: %s',
-                         self, msg.name, msg.get_values())
+        msg_logger.debug('[%s] Received data (%s bytes)', self, len(data))
+        for msg in self._frame_decoder.feed(data):
+            if not isinstance(msg, LazyMessage):
+                msg_logger.debug('[%s] %s', self,
+                                 log.Fields(msg=msg.name, values=msg.get_values))
             self._msg_receiver.on_receive_msg(msg)
-            self._in_buffer = b''
+        if self._frame_decoder.buffered:
+            msg_logger.debug('[%s] Got chunk of the message (%s bytes)',
+                             self, self._frame_decoder.buffered)
 
     def on_end_receive_data(self):
         super().on_end_receive_data()
         self._msg_receiver.on_end_receive_msg()
 
-    async def send_msg(self, msg: Message) -> bool:
-        logger.debug(f'[{self}]  ({devonly.func_args_values()})')
-        data = self._serializer.serialize(msg)
-        return await self.send(data)
-
-
-class _UDPClientProtocol(Protocol):
-
-    def __init__(self, addr: AppAddr, data: bytes, broadcast: bool):
-        self._addr = addr
-        # Переменная нужна и для логики и для отображение чей это протокол в логах
-        self._broadcast = broadcast
-        self._data = data
-        self._transport: Optional[DatagramTransport] = None
-
-    def connection_made(self, transport: DatagramTransport):
-        logger.debug('[%s] %s', self, devonly.func_args_values())
-        self._transport = transport
-        if self._broadcast:
-            self._transport.sendto(self._data, self._addr.to_tuple())
-        else:
-            # Если не бродкаст, значит при создании транспорта уже был передан адрес.
-            self._transport.sendto(self._data)
-
-    def error_received(self, exc):
-        logger.error('[%s] %s', self, devonly.func_args_values())
-
-    def connection_lost(self, exc):
-        logger.debug('[%s] %s', self, devonly.func_args_values())
+    def stop(self):
+        self.flush()
+        super().stop()
 
-    def __str__(self) -> str:
-        return f'{__class__.__name__}({self._addr}, broadcast={self._broadcast})'
+    async def send_msg(self, msg: Message) -> bool:
+        logger.debug('[%s]  (%s)', self, devonly.func_args_values())
+        if self._corked:
+            if not self.is_paused:
+                return self._cork_msg(msg)
+            # Пока отправка остановлена, действует политика переполнения
+            self.flush()
+        # Буфер новый на каждое сообщение, т.к. транспорт может держать
+        # ссылку на переданные данные до их отправки.
+        data = bytearray()
+        self._serializer.sampled_serialize_into()(msg, data)
+        return await self.send(data, _get_superseding_key(msg))
+
+    def flush(self):
+        """Write the corked messages to the connection."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._cork_buffer:
+            return
+        if self._transport is None or self._transport.is_closing():
+            logger.warning('[%s] The connection is closed, %s bytes are not sent',
+                           self, len(self._cork_buffer))
+            self._cork_buffer.clear()
+            return
+        # Буфер отдаётся транспорту, он может держать ссылку на данные
+        data, self._cork_buffer = self._cork_buffer, bytearray()
+        self._write(data)
+        logger.debug('[%s] Corked data has been sent (%s bytes)', self, len(data))
 
-    __repr__ = __str__
+    def _cork_msg(self, msg: Message) -> bool:
+        if self._transport is None:
+            logger.warning('[%s] The connection is not connected (msg=%s)', self, msg.name)
+            return False
+        buffer = self._cork_buffer
+        start = len(buffer)
+        try:
+            self._serializer.sampled_serialize_into()(msg, buffer)
+        except Exception:
+            # Часть сообщения испортила бы поток
+            del buffer[start:]
+            raise
+        if len(buffer) >= self._cork_size:
+            self.flush()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            if self._cork_delay > 0:
+                self._flush_handle = loop.call_later(self._cork_delay, self.flush)
+            else:
+                self._flush_handle = loop.call_soon(self.flush)
+        return True
 
 
 class UDPClient(IDataSender):
 
-    def __init__(self, addr: AppAddr, broadcast: bool = False) -> None:
+    def __init__(self, addr: AppAddr, broadcast: bool = False,
+                 socket_options: Optional[SocketOptions] = None) -> None:
         self._addr = addr
         self._broadcast = broadcast
+        # Без параметров у сокета параметры пула (из настроек)
+        self._socket_options = socket_options
 
     async def send(self, data: bytes) -> bool:
         logger.debug('[%s] %s', self, devonly.func_args_values())
-        loop = asyncio.get_running_loop()
-        if self._broadcast:
-            transport, _ = await loop.create_datagram_endpoint(
-                lambda: _UDPClientProtocol(self._addr, data, self._broadcast),
-                family=socket.AF_INET,
-                proto=socket.IPPROTO_UDP,
-                allow_broadcast=True,
-                local_addr=None
-            )
-            return True
-
-        transport, _ = await loop.create_datagram_endpoint(
-            lambda: _UDPClientProtocol(self._addr, data, self._broadcast),
-            remote_addr=(self._addr.host, self._addr.port)
-        )
-        return True
+        # Сокеты переиспользуются пулом процесса
+        return await udppool.sendto(data, self._addr, self._broadcast,
+                                    self._socket_options)
 
     def __str__(self) -> str:
         return f'{__class__.__name__}({self._addr}, broadcast={self._broadcast})'
@@ -0,0 +1,227 @@
+"""Incremental decoder of messages from a stream transport (TCP)."""
+
+from __future__ import annotations
+
+import logging
+import struct
+from typing import Callable, List, Optional, Tuple, Union
+
+from enki.core import kbetype
+from enki.core.message import Message, MessageSerializer
+
+logger = logging.getLogger(__name__)
+
+# Сообщения больше этого размера собираются в отдельном буфере
+DEFAULT_CAPACITY = 4096
+
+# Самый длинный заголовок: id, 0xFFFF и расширенная длина
+_MAX_HEADER_SIZE = kbetype.MESSAGE_ID.size + kbetype.MESSAGE_LENGTH.size \
+    + kbetype.MESSAGE_LENGTH1.size
+
+_Deserialize = Callable[[memoryview], Tuple[Optional[Message], memoryview]]
+
+
+class FrameDecoder:
+    """Decode the messages of a stream chunk by chunk.
+
+    Complete messages are decoded directly from the received chunk. Only
+    the message split between chunks is buffered: its bytes are written
+    at the write cursor of the preallocated buffer, nothing is concatenated
+    and the accumulated prefix is never copied again. A message bigger than
+    the buffer is assembled in its own buffer allocated by the size from
+    the header.
+
+    The decoded messages may refer to the data (e.g. BLOB fields or
+    LazyMessage), so the buffer of a completed message is never reused:
+    a small message is copied out, the own buffer of a big one is handed
+    over to the message. A message whose size is known only after decoding
+    is decoded from the buffer and the buffer is handed over to it.
+    """
+
+    def __init__(self, serializer: MessageSerializer,
+                 capacity: int = DEFAULT_CAPACITY):
+        self._serializer = serializer
+        self._capacity = capacity
+        self._buffer = bytearray(capacity)
+        # Write cursor: the buffered part of the incomplete message
+        self._filled = 0
+        # Size of the buffered message (-1 if the header is not buffered yet)
+        self._frame_size = -1
+
+    @property
+    def buffered(self) -> int:
+        """Number of bytes of the incomplete message."""
+        return self._filled
+
+    def feed(self, data: Union[bytes, memoryview]) -> List[Message]:
+        """Decode the messages completed by the chunk of the stream.
+
+        The chunk must not be modified after the call, the messages may
+        refer to it.
+        """
+        data = memoryview(data)
+        messages: List[Message] = []
+        # Метрики пишутся для части чанков (см. MessageSerializer)
+        deserialize = self._serializer.sampled_deserialize()
+        if self._filled:
+            tail = self._feed_buffered(data, messages, deserialize)
+            if tail is None:
+                return messages
+            data = tail
+
+        while data:
+            msg, data = deserialize(data)
+            if msg is None:
+                self._start_frame(data)
+                break
+            messages.append(msg)
+        return messages
+
+    def clear(self):
+        """Drop the incomplete message (e.g. the connection is lost)."""
+        self._reset(self._buffer if len(self._buffer) == self._capacity
+                    else bytearray(self._capacity))
+
+    def _reset(self, buffer: bytearray):
+        self._buffer = buffer
+        self._filled = 0
+        self._frame_size = -1
+
+    def _write(self, data: memoryview):
+        # Запись за пределы буфера расширяет его
+        self._buffer[self._filled:self._filled + len(data)] = data
+        self._filled += len(data)
+
+    def _reserve(self, frame_size: int):
+        if frame_size <= len(self._buffer):
+            return
+        logger.debug('[%s] The buffer of the big message is allocated (%s bytes)',
+                     self, frame_size)
+        buffer = bytearray(frame_size)
+        buffer[:self._filled] = self._buffer[:self._filled]
+        self._buffer = buffer
+
+    def _start_frame(self, data: memoryview):
+        """Buffer the beginning of the incomplete message."""
+        self._frame_size = self._serializer.get_frame_size(data)
+        if self._frame_size > 0:
+            self._reserve(self._frame_size)
+        self._write(data)
+
+    def _read_frame_size(self, data: memoryview) -> int:
+        """Buffer the header of the message. Returns the used size of data."""
+        used = min(len(data), max(0, _MAX_HEADER_SIZE - self._filled))
+        self._write(data[:used])
+        with memoryview(self._buffer) as view:
+            frame_size = self._serializer.get_frame_size(view[:self._filled])
+        if frame_size < 0:
+            return used
+        # The header may be shorter than the longest one, the bytes of
+        # the message body are written again by the caller.
+        excess = max(0, self._filled - frame_size)
+        self._filled -= excess
+        self._frame_size = frame_size
+        self._reserve(frame_size)
+        return used - excess
+
+    def _feed_buffered(self, data: memoryview, messages: List[Message],
+                       deserialize: _Deserialize) -> Optional[memoryview]:
+        """Complete the buffered message by the chunk.
+
+        Returns the tail of the chunk after the message or None if
+        the whole chunk is buffered.
+        """
+        if self._frame_size < 0:
+            used = self._read_frame_size(data)
+            data = data[used:]
+            if self._frame_size < 0:
+                if self._filled < _MAX_HEADER_SIZE:
+                    return None
+                # The size is known only after decoding of the fields
+                # (or the message is unknown). Try to decode it as a whole.
+                self._write(data)
+                return self._decode_unsized(messages, deserialize)
+
+        size = min(self._frame_size - self._filled, len(data))
+        self._write(data[:size])
+        if self._filled < self._frame_size:
+            return None
+
+        messages.append(self._decode_frame(deserialize))
+        return data[size:]
+
+    def _decode_frame(self, deserialize: _Deserialize) -> Message:
+        frame_size = self._frame_size
+        if len(self._buffer) > self._capacity:
+            # The own buffer of the big message is handed over to it
+            frame = self._buffer
+            self._reset(bytearray(self._capacity))
+        else:
+            with memoryview(self._buffer) as view:
+                frame = bytes(view[:frame_size])  # type: ignore
+            self._reset(self._buffer)
+        msg, tail = deserialize(memoryview(frame))
+        assert msg is not None and not tail, 'The frame is not the message'
+        return msg
+
+    def _decode_unsized(self, messages: List[Message],
+                        deserialize: _Deserialize) -> Optional[memoryview]:
+        # Декодируется прямо из буфера, накопленная часть не копируется
+        # при каждой попытке
+        data = memoryview(self._buffer)[:self._filled]
+        try:
+            msg, tail = deserialize(data)
+        except struct.error:
+            # The fields are not received yet
+            msg, tail = None, data
+        if msg is None:
+            # Буфер будет дописан, ссылок на него остаться не должно
+            tail.release()
+            data.release()
+            return None
+        messages.append(msg)
+        # The message and the tail refer to the buffer, so it is handed
+        # over to them (as the own buffer of a big message)
+        self._reset(bytearray(self._capacity))
+        return tail
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}({self._serializer})'
+
+    __repr__ = __str__
+
+
+class ReceiveBuffer:
+    """Preallocated receive buffer of a connection (see asyncio.BufferedProtocol).
+
+    The data is read directly to the buffer and the messages are decoded
+    from views of it. After the messages are handled the buffer is reused,
+    but only if none of them refers to it (e.g. a BLOB field or LazyMessage
+    is kept by the receiver). Otherwise the buffer is left to the messages
+    and a new one is allocated.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._buffer = bytearray(size)
+        # Сколько раз буфер остался сообщениям (для статистики)
+        self.reallocations = 0
+
+    @property
+    def buffer(self) -> bytearray:
+        return self._buffer
+
+    def view(self, nbytes: int) -> memoryview:
+        """The received data."""
+        return memoryview(self._buffer)[:nbytes]
+
+    def release(self):
+        """Handling of the received data is finished."""
+        try:
+            # bytearray с экспортированными буферами нельзя изменить в размере
+            self._buffer.append(0)
+        except BufferError:
+            self._buffer = bytearray(self._size)
+            self.reallocations += 1
+            return
+        del self._buffer[-1]
@@ -46,6 +46,12 @@ class IClientDataReceiver(abc.ABC):
     def on_end_receive_data(self):
         pass
 
+    def on_pause_writing(self):
+        """Буфер отправки соединения заполнен (выше верхней границы)."""
+
+    def on_resume_writing(self):
+        """Буфер отправки соединения освободился (ниже нижней границы)."""
+
 
 class IDataSender(abc.ABC):
     """Интерфейс для отправителя сетевых данных."""
@@ -0,0 +1,126 @@
+"""Export of the message metrics (core.metrics) as Prometheus text.
+
+The metrics are served by a tiny HTTP endpoint ("GET /metrics") and / or
+written to a file periodically (for the textfile collector of node_exporter).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from asyncio import StreamReader, StreamWriter
+from typing import Optional
+
+from enki import settings
+from enki.core import metrics
+from enki.core.enkitype import AppAddr, Result
+from enki.core.metrics import MetricsRegistry
+
+from .inet import IStartable
+
+logger = logging.getLogger(__name__)
+
+_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsExporter(IStartable):
+    """Serve the metrics by HTTP and / or write them to a file.
+
+    "http_addr" None and empty "file_path" turn the corresponding export off.
+    """
+
+    def __init__(self, registry: MetricsRegistry, http_addr: Optional[AppAddr] = None,
+                 file_path: str = '', file_period: float = settings.METRICS_FILE_PERIOD):
+        self._registry = registry
+        self._http_addr = http_addr
+        self._file_path = file_path
+        self._file_period = file_period
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._file_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self._server is not None or self._file_task is not None
+
+    @property
+    def http_addr(self) -> Optional[AppAddr]:
+        """The address of the HTTP endpoint (with the real port if the port was 0)."""
+        if self._server is None:
+            return None
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return AppAddr(host, port)
+
+    async def start(self) -> Result:
+        if self._http_addr is not None:
+            try:
+                self._server = await asyncio.start_server(
+                    self._handle_request, self._http_addr.host, self._http_addr.port)
+            except OSError as err:
+                return Result(False, None, str(err))
+            logger.info('[%s] Metrics are served on http://%s/metrics', self, self.http_addr)
+        if self._file_path:
+            self._file_task = asyncio.create_task(self._write_periodically())
+        return Result(True, None)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._file_task is not None:
+            self._file_task.cancel()
+            self._file_task = None
+            # Последние значения метрик остаются в файле
+            self._write_file()
+
+    async def _handle_request(self, reader: StreamReader, writer: StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), settings.SECOND)
+            # Заголовки запроса не нужны, но их нужно прочитать до ответа
+            while (await asyncio.wait_for(reader.readline(), settings.SECOND)).strip():
+                pass
+        except (asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+
+        method, _, path = request_line.decode('latin-1').partition(' ')
+        path = path.split(' ', 1)[0]
+        if method == 'GET' and path in ('/metrics', '/'):
+            status, body = '200 OK', self._registry.to_prometheus().encode()
+        else:
+            status, body = '404 Not Found', b'Not Found\n'
+        writer.write(
+            f'HTTP/1.0 {status}\r\nContent-Type: {_CONTENT_TYPE}\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _write_periodically(self):
+        while True:
+            self._write_file()
+            await asyncio.sleep(self._file_period)
+
+    def _write_file(self):
+        try:
+            self._registry.write_prometheus(self._file_path)
+        except OSError as err:
+            logger.warning('[%s] Metrics cannot be written (%s)', self, err)
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}(http_addr={self._http_addr}, file={self._file_path})'
+
+
+def exporter_from_settings() -> Optional[MetricsExporter]:
+    """The exporter configured by the METRICS* settings (None if it is off)."""
+    if metrics.registry is None:
+        return None
+    http_addr = None
+    if settings.METRICS_HTTP_PORT > 0:
+        http_addr = AppAddr(settings.METRICS_HTTP_HOST, settings.METRICS_HTTP_PORT)
+    if http_addr is None and not settings.METRICS_FILE:
+        return None
+    return MetricsExporter(metrics.registry, http_addr, settings.METRICS_FILE)
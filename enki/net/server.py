@@ -4,20 +4,26 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from asyncio import DatagramProtocol, DatagramTransport, Protocol, Server, StreamReader, StreamWriter, Task, Transport
+from asyncio import BufferedProtocol, DatagramProtocol, DatagramTransport, Future, Protocol, \
+    Server, StreamReader, StreamWriter, Task, Transport
 import socket
 import struct
-from typing import Optional
+from dataclasses import dataclass
+from typing import Collection, Optional
 from enki import settings
-from enki.core.message import Message, MessageSerializer, MsgDescr
+from enki.core.message import LazyMessage, Message, MessageSerializer, MsgDescr
 
-from enki.misc import devonly
+from enki.misc import devonly, log
 from enki.core.enkitype import AppAddr, Result
 from enki.net.channel import TCPChannel, UDPChannel
-from enki.net.inet import ConnectionInfo, IDataSender, \
+from enki.net.framedecoder import FrameDecoder, ReceiveBuffer
+from enki.net.sockopt import SocketOptions, tcp_options, udp_options
+from enki.net.inet import ConnectionInfo, IChannel, IDataSender, \
     IServerDataReceiver, IServerMsgReceiver, IStartable
 
 logger = logging.getLogger(__name__)
+# Записи на каждое сообщение (см. misc.log.msg_logger)
+msg_logger = log.msg_logger(__name__)
 
 
 def get_free_port() -> int:
@@ -33,11 +39,114 @@ def get_real_host_ip(docker_container_name: str) -> str:
     return sock.getsockname()[0]
 
 
+@dataclass
+class DatagramStats:
+    """Counters of UDPServer handling the datagrams by the queue."""
+    received: int = 0
+    handled: int = 0
+    # The receiver raised an exception
+    failed: int = 0
+    # The datagrams dropped because the queue of their handler was full
+    # and how many times a queue became full
+    dropped: int = 0
+    overflows: int = 0
+    # Datagrams waiting for a handler now and the maximum of them
+    queued: int = 0
+    max_queued: int = 0
+    batches: int = 0
+
+
+class _DatagramDispatcher:
+    """Fixed pool of handlers of the datagrams with bounded queues.
+
+    The datagrams of one source always go to the same handler, so they
+    are handled in the order of receiving. A handler takes up to
+    "batch_size" datagrams from its queue at once. If the queue is full,
+    the datagram is dropped (UDP doesn't guarantee delivery anyway).
+    """
+
+    def __init__(self, data_receiver: IServerDataReceiver, workers: int,
+                 queue_size: int, batch_size: int):
+        assert workers > 0 and batch_size > 0
+        self._data_receiver = data_receiver
+        self._batch_size = batch_size
+        self._stats = DatagramStats()
+        self._queues: list[asyncio.Queue[tuple[memoryview, AppAddr]]] = [
+            asyncio.Queue(max(1, queue_size // workers)) for _ in range(workers)
+        ]
+        # The queue is full and the drop is already reported
+        self._overflowed = [False] * workers
+        self._workers = [asyncio.create_task(self._work(i)) for i in range(workers)]
+
+    @property
+    def stats(self) -> DatagramStats:
+        return self._stats
+
+    def put(self, data: memoryview, addr: AppAddr) -> bool:
+        """Queue the datagram. Returns False if it is dropped."""
+        stats = self._stats
+        stats.received += 1
+        index = hash((addr.host, addr.port)) % len(self._queues)
+        try:
+            self._queues[index].put_nowait((data, addr))
+        except asyncio.QueueFull:
+            stats.dropped += 1
+            if not self._overflowed[index]:
+                self._overflowed[index] = True
+                stats.overflows += 1
+                logger.warning('[%s] The queue of the handler %s is full, datagrams are dropped',
+                               self, index)
+            return False
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        return True
+
+    async def join(self):
+        """Wait for handling of the queued datagrams."""
+        for queue in self._queues:
+            await queue.join()
+
+    def close(self):
+        for worker in self._workers:
+            worker.cancel()
+
+    async def _work(self, index: int):
+        queue, stats = self._queues[index], self._stats
+        batch_size = self._batch_size
+        on_receive_data = self._data_receiver.on_receive_data
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            stats.queued -= len(batch)
+            stats.batches += 1
+            for data, addr in batch:
+                try:
+                    await on_receive_data(data, addr)
+                    stats.handled += 1
+                except Exception:
+                    stats.failed += 1
+                    logger.exception('[%s] The datagram from %s cannot be handled', self, addr)
+                finally:
+                    queue.task_done()
+            batch = None  # type: ignore
+            if queue.empty():
+                self._overflowed[index] = False
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}({self._data_receiver})'
+
+    __repr__ = __str__
+
+
 class UDPServerProtocol(DatagramProtocol):
 
-    def __init__(self, addr, data_receiver: IServerDataReceiver):
+    def __init__(self, addr, data_receiver: IServerDataReceiver,
+                 dispatcher: Optional[_DatagramDispatcher] = None):
         self._addr = addr
         self._data_receiver = data_receiver
+        # Без диспетчера каждая датаграмма обрабатывается в своей задаче
+        self._dispatcher = dispatcher
         self._transport: Optional[DatagramTransport] = None
 
     def connection_made(self, transport: DatagramTransport):
@@ -51,6 +160,9 @@ class UDPServerProtocol(DatagramProtocol):
 
     def datagram_received(self, data: bytes, addr: tuple[str, int]):
         # logger.debug('[%s] %s', self, devonly.func_args_values())
+        if self._dispatcher is not None:
+            self._dispatcher.put(memoryview(data), AppAddr(*addr))
+            return
         asyncio.create_task(self._data_receiver.on_receive_data(
             memoryview(data), AppAddr(*addr))
         )
@@ -65,20 +177,63 @@ class UDPServerProtocol(DatagramProtocol):
 
 
 class UDPServer(IStartable, IServerDataReceiver):
-
-    def __init__(self, addr: AppAddr):
+    """UDP сервер.
+
+    По умолчанию каждая датаграмма обрабатывается в своей задаче. С
+    dispatch_queue датаграммы обрабатываются фиксированным числом
+    обработчиков (workers) из ограниченных очередей, датаграммы одного
+    источника по порядку, лишние датаграммы отбрасываются (см. stats).
+    Параметры сокета (socket_options) по умолчанию из настроек. С
+    SocketOptions.reuse_port порт может слушать несколько процессов
+    (SO_REUSEPORT), ядро распределяет между ними датаграммы по адресу
+    источника. SO_REUSEADDR для UDP asyncio не поддерживает.
+    """
+
+    def __init__(self, addr: AppAddr, dispatch_queue: bool = False,
+                 workers: int = settings.UDP_SERVER_WORKERS,
+                 queue_size: int = settings.UDP_SERVER_QUEUE_SIZE,
+                 batch_size: int = settings.UDP_SERVER_BATCH_SIZE,
+                 socket_options: Optional[SocketOptions] = None):
         self._addr = addr
+        self._socket_options = socket_options if socket_options is not None \
+            else udp_options()
         self._transport: Optional[DatagramTransport] = None
+        self._dispatch_queue = dispatch_queue
+        self._workers = workers
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._dispatcher: Optional[_DatagramDispatcher] = None
+
+    @property
+    def addr(self) -> AppAddr:
+        return self._addr
+
+    @property
+    def stats(self) -> Optional[DatagramStats]:
+        """Counters of the dispatch queue (None without it)."""
+        if self._dispatcher is None:
+            return None
+        return self._dispatcher.stats
 
     async def start(self) -> Result:
         loop = asyncio.get_running_loop()
+        dispatcher = None
+        if self._dispatch_queue:
+            dispatcher = _DatagramDispatcher(self, self._workers, self._queue_size,
+                                             self._batch_size)
         try:
             self._transport, _ = await loop.create_datagram_endpoint(
-                lambda: UDPServerProtocol(self._addr, data_receiver=self),
-                local_addr=(self._addr.host, self._addr.port)
+                lambda: UDPServerProtocol(self._addr, data_receiver=self,
+                                          dispatcher=dispatcher),
+                local_addr=(self._addr.host, self._addr.port),
+                reuse_port=self._socket_options.reuse_port
             )
+            self._socket_options.apply(self._transport.get_extra_info('socket'))
         except (asyncio.TimeoutError, OSError, ConnectionError) as err:
+            if dispatcher is not None:
+                dispatcher.close()
             return Result(False, None, str(err))
+        self._dispatcher = dispatcher
 
         logger.debug('[%s] Connected', self)
         return Result(True, None)
@@ -88,6 +243,8 @@ class UDPServer(IStartable, IServerDataReceiver):
             logger.warning('[%s] The server has been already stopped', self)
             return
         self._transport.close()
+        if self._dispatcher is not None:
+            self._dispatcher.close()
 
     def on_stop_receive(self):
         self.stop()
@@ -97,7 +254,7 @@ class UDPServer(IStartable, IServerDataReceiver):
         return self._transport is not None
 
     async def on_receive_data(self, data: memoryview, addr: AppAddr):
-        logger.debug('[%s] Received data (%s)', self, data.obj)
+        msg_logger.debug('[%s] Received data (%s)', self, data.obj)
 
     def __str__(self) -> str:
         return f'{self.__class__.__name__}(addr={self._addr})'
@@ -109,9 +266,18 @@ class UDPMsgServer(UDPServer):
     """Сервер принимает по UDP закодированные сообщения."""
 
     def __init__(self, addr: AppAddr, msg_spec_by_id: dict[int, MsgDescr],
-                 msg_receiver: IServerMsgReceiver):
-        super().__init__(addr)
-        self._serializer = MessageSerializer(msg_spec_by_id)
+                 msg_receiver: IServerMsgReceiver, lazy_msg_ids: Collection[int] = (),
+                 dispatch_queue: bool = True,
+                 workers: int = settings.UDP_SERVER_WORKERS,
+                 queue_size: int = settings.UDP_SERVER_QUEUE_SIZE,
+                 batch_size: int = settings.UDP_SERVER_BATCH_SIZE,
+                 socket_options: Optional[SocketOptions] = None):
+        # Сообщения обрабатываются через очередь (см. UDPServer), чтобы
+        # поток широковещательных сообщений не создавал задачу на каждое
+        super().__init__(addr, dispatch_queue, workers, queue_size, batch_size,
+                         socket_options)
+        # Сообщения из lazy_msg_ids декодируются при обращении к полям (LazyMessage)
+        self._serializer = MessageSerializer(msg_spec_by_id, lazy_msg_ids)
         self._msg_receiver = msg_receiver
 
     async def on_receive_data(self, data: memoryview, addr: AppAddr):
@@ -120,24 +286,242 @@ class UDPMsgServer(UDPServer):
         channel = UDPChannel(conn_info)
 
         err_template = '[%s] Got unreadable data. Rejected'
+        # Метрики пишутся для части датаграмм (см. MessageSerializer)
+        deserialize = self._serializer.sampled_deserialize()
         while data:
             try:
-                msg, data = self._serializer.deserialize(data)
+                msg, data = deserialize(data)
             except KeyError:
                 logger.warning(err_template, self)
                 return
             if msg is None:
                 logger.warning(err_template, self)
                 return
-            logger.debug('[%s] Message "%s" fields: %s', self, msg.name, msg.get_values())
+            if not isinstance(msg, LazyMessage):
+                msg_logger.debug('[%s] %s', self,
+                                 log.Fields(msg=msg.name, values=msg.get_values))
             await self._msg_receiver.on_receive_msg(msg, channel)
 
 
+@dataclass
+class ConnectionStats:
+    """Counters of a connection of TCPServer."""
+    addr: AppAddr
+    received_bytes: int = 0
+    received_msgs: int = 0
+    handled_msgs: int = 0
+    # The receiver raised an exception
+    failed_msgs: int = 0
+    # Messages waiting for a handler now and the maximum of them
+    queued_msgs: int = 0
+    max_queued_msgs: int = 0
+    # How many times the reading waited for the full queue of the handlers
+    backpressure_waits: int = 0
+
+
+class _MsgDispatcher:
+    """Handlers of the messages of one connection.
+
+    The messages are handled by "concurrency" tasks (in the order of
+    receiving if there is only one task). If the queue is full, the reading
+    of the connection waits (backpressure).
+    """
+
+    def __init__(self, msg_receiver: IServerMsgReceiver, channel: IChannel,
+                 stats: ConnectionStats, concurrency: int, queue_size: int):
+        self._msg_receiver = msg_receiver
+        self._channel = channel
+        self._stats = stats
+        self._queue: asyncio.Queue[Message] = asyncio.Queue(queue_size)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(concurrency)]
+
+    @property
+    def stats(self) -> ConnectionStats:
+        return self._stats
+
+    async def put(self, msg: Message):
+        stats = self._stats
+        stats.received_msgs += 1
+        if self._queue.full():
+            stats.backpressure_waits += 1
+        await self._queue.put(msg)
+        stats.queued_msgs = self._queue.qsize()
+        stats.max_queued_msgs = max(stats.max_queued_msgs, stats.queued_msgs)
+
+    async def join(self):
+        """Wait for handling of the queued messages."""
+        await self._queue.join()
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _work(self):
+        queue, stats = self._queue, self._stats
+        while True:
+            msg = await queue.get()
+            stats.queued_msgs = queue.qsize()
+            try:
+                msg_logger.debug('[%s] %s', self,
+                                 log.Fields(msg=msg.name, values=msg.get_values))
+                await self._msg_receiver.on_receive_msg(msg, self._channel)
+                stats.handled_msgs += 1
+            except Exception:
+                stats.failed_msgs += 1
+                logger.exception('[%s] The message "%s" cannot be handled', self, msg.name)
+            finally:
+                # Сообщение может ссылаться на буфер приёма
+                msg = None  # type: ignore
+                queue.task_done()
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}({self._stats.addr})'
+
+    __repr__ = __str__
+
+
+class _TransportWriter:
+    """The methods of StreamWriter used by TCPChannel over the transport."""
+
+    def __init__(self, transport: Transport, protocol: _TCPServerProtocol):
+        self._transport = transport
+        self._protocol = protocol
+
+    def write(self, data: bytes):
+        self._transport.write(data)
+
+    async def drain(self):
+        await self._protocol.wait_writable()
+
+    def is_closing(self) -> bool:
+        return self._transport.is_closing()
+
+    def close(self):
+        self._transport.close()
+
+    async def wait_closed(self):
+        await self._protocol.wait_closed()
+
+    def get_extra_info(self, name: str, default=None):
+        return self._transport.get_extra_info(name, default)
+
+
+class _TCPServerProtocol(BufferedProtocol):
+    """Connection of TCPServer reading the data directly to the receive buffer.
+
+    The messages are decoded from views of the buffer. While they are
+    handled the reading is paused, then the buffer is reused.
+    """
+    _dispatcher: _MsgDispatcher
+
+    def __init__(self, server: TCPServer, buffer_size: int = settings.TCP_RECV_BUFFER_SIZE):
+        self._server = server
+        self._recv_buffer = ReceiveBuffer(buffer_size)
+        self._frame_decoder = FrameDecoder(server.serializer)
+        self._transport: Optional[Transport] = None
+        self._channel: Optional[TCPChannel] = None
+        loop = asyncio.get_running_loop()
+        self._closed: Future = loop.create_future()
+        self._writable: Optional[Future] = None
+        self._handling: Optional[Task] = None
+        self._lost = False
+
+    def connection_made(self, transport: Transport):  # type: ignore[override]
+        self._transport = transport
+        self._server.socket_options.apply(transport.get_extra_info('socket'))
+        addr = transport.get_extra_info('peername')
+        conn_info = ConnectionInfo(AppAddr(addr[0], addr[1]), self._server.addr)
+        self._channel = TCPChannel(conn_info, _TransportWriter(transport, self))  # type: ignore
+        self._dispatcher = self._server.new_dispatcher(self._channel)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        logger.debug('[%s] %s', self, devonly.func_args_values())
+        self._frame_decoder.clear()
+        self._lost = True
+        if self._channel is not None and self._handling is None:
+            asyncio.create_task(self._server.close_dispatcher(self._channel, self._dispatcher))
+        if not self._closed.done():
+            self._closed.set_result(None)
+        self.resume_writing()
+
+    def pause_writing(self):
+        if self._writable is None:
+            self._writable = asyncio.get_running_loop().create_future()
+
+    def resume_writing(self):
+        if self._writable is not None and not self._writable.done():
+            self._writable.set_result(None)
+        self._writable = None
+
+    async def wait_writable(self):
+        if self._writable is not None:
+            await self._writable
+
+    async def wait_closed(self):
+        await self._closed
+
+    def get_buffer(self, sizehint: int) -> bytearray:
+        # Сам bytearray, а не memoryview, иначе буфер останется
+        # экспортированным транспортом на время обработки данных
+        return self._recv_buffer.buffer
+
+    def buffer_updated(self, nbytes: int):
+        self._dispatcher.stats.received_bytes += nbytes
+        msgs = self._frame_decoder.feed(self._recv_buffer.view(nbytes))
+        if not msgs:
+            self._recv_buffer.release()
+            return
+        assert self._transport is not None
+        # Сообщения ссылаются на буфер, он не читается до конца их обработки
+        self._transport.pause_reading()
+        self._handling = asyncio.create_task(self._handle_msgs(msgs))
+
+    async def _handle_msgs(self, msgs: list[Message]):
+        assert self._transport is not None
+        try:
+            for msg in msgs:
+                await self._dispatcher.put(msg)
+            # Ссылки на сообщения больше не нужны, иначе буфер нельзя переиспользовать
+            msg = msgs = None  # type: ignore
+            await self._dispatcher.join()
+        finally:
+            msg = msgs = None  # type: ignore
+            self._handling = None
+            self._recv_buffer.release()
+            if self._lost:
+                # The messages read before the connection was lost are handled
+                assert self._channel is not None
+                await self._server.close_dispatcher(self._channel, self._dispatcher)
+            elif not self._transport.is_closing():
+                self._transport.resume_reading()
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}({self._server})'
+
+    __repr__ = __str__
+
+
 class TCPServer(IStartable, IDataSender):
 
     def __init__(self, addr: AppAddr, msg_spec_by_id: dict[int, MsgDescr],
-                 msg_receiver: IServerMsgReceiver):
+                 msg_receiver: IServerMsgReceiver, buffered_protocol: bool = False,
+                 concurrency: int = settings.TCP_SERVER_CONCURRENCY,
+                 queue_size: int = settings.TCP_SERVER_QUEUE_SIZE,
+                 socket_options: Optional[SocketOptions] = None):
         self._addr = addr
+        # Параметры слушающего сокета и соединений (по умолчанию из настроек).
+        # С reuse_port порт могут слушать несколько процессов (SO_REUSEPORT),
+        # ядро распределяет между ними входящие соединения
+        self._socket_options = socket_options if socket_options is not None \
+            else tcp_options()
+        # Читать данные сразу в буфер соединения (asyncio.BufferedProtocol)
+        self._buffered_protocol = buffered_protocol
+        # Сколько сообщений одного соединения обрабатываются одновременно
+        # и сколько их может ждать обработки, пока чтение не остановится
+        self._concurrency = concurrency
+        self._queue_size = queue_size
+        self._stats_by_addr: dict[tuple[str, int], ConnectionStats] = {}
         self._transport: Optional[Transport] = None
         self._serializer = MessageSerializer(msg_spec_by_id)
         self._msg_receiver = msg_receiver
@@ -148,13 +532,56 @@ class TCPServer(IStartable, IDataSender):
     def addr(self) -> AppAddr:
         return self._addr.copy()
 
+    @property
+    def serializer(self) -> MessageSerializer:
+        return self._serializer
+
+    @property
+    def msg_receiver(self) -> IServerMsgReceiver:
+        return self._msg_receiver
+
+    @property
+    def connection_stats(self) -> list[ConnectionStats]:
+        """Counters of the alive connections."""
+        return list(self._stats_by_addr.values())
+
+    @property
+    def socket_options(self) -> SocketOptions:
+        return self._socket_options
+
+    def new_dispatcher(self, channel: IChannel) -> _MsgDispatcher:
+        """Create handlers of the messages of the new connection."""
+        addr = channel.connection_info.src_addr
+        stats = ConnectionStats(addr)
+        self._stats_by_addr[addr.to_tuple()] = stats
+        return _MsgDispatcher(self._msg_receiver, channel, stats,
+                              self._concurrency, self._queue_size)
+
+    async def close_dispatcher(self, channel: IChannel, dispatcher: _MsgDispatcher):
+        await dispatcher.close()
+        self._stats_by_addr.pop(channel.connection_info.src_addr.to_tuple(), None)
+
     async def start(self) -> Result:
         try:
-            self._server = await asyncio.start_server(
-                self.handle_connection, self._addr.host, self._addr.port
-            )
+            if self._buffered_protocol:
+                loop = asyncio.get_running_loop()
+                self._server = await loop.create_server(
+                    lambda: _TCPServerProtocol(self), self._addr.host, self._addr.port,
+                    reuse_address=self._socket_options.reuse_address,
+                    reuse_port=self._socket_options.reuse_port
+                )
+            else:
+                self._server = await asyncio.start_server(
+                    self.handle_connection, self._addr.host, self._addr.port,
+                    reuse_address=self._socket_options.reuse_address,
+                    reuse_port=self._socket_options.reuse_port
+                )
         except (asyncio.TimeoutError, OSError, ConnectionError) as err:
             return Result(False, None, str(err))
+        # Размеры буферов слушающего сокета наследуют принятые соединения
+        # (окно TCP согласуется до accept)
+        for sock in self._server.sockets:
+            self._socket_options.apply(sock)
 
         async def serve_forever(server: Server):
             await server.start_serving()
@@ -164,26 +591,30 @@ class TCPServer(IStartable, IDataSender):
         return Result(True, None)
 
     async def handle_connection(self, reader: StreamReader, writer: StreamWriter):
+        self._socket_options.apply(writer.get_extra_info('socket'))
         addr = writer.get_extra_info('peername')
         conn_info = ConnectionInfo(AppAddr(addr[0], addr[1]), self._addr)
         channel = TCPChannel(conn_info, writer)
 
-        buffer = bytes()
-        while not reader.at_eof():
-            data = await reader.read(settings.TCP_CHUNK_SIZE)
-            if not data:
-                continue
-            if buffer:
-                data = buffer + data
-            msg, data_tail = self._serializer.deserialize(memoryview(data))
-            if msg is None:
-                logger.info(f'[{self}] Data cannot be decoded to the message (%s)',
-                            self, data)
-                buffer = data
-                continue
-            buffer = data_tail.tobytes()
-            logger.debug('[%s] Message "%s" fields: %s', self, msg.name, msg.get_values())
-            await self._msg_receiver.on_receive_msg(msg, channel)
+        frame_decoder = FrameDecoder(self._serializer)
+        dispatcher = self.new_dispatcher(channel)
+        stats = dispatcher.stats
+        try:
+            while not reader.at_eof():
+                data = await reader.read(settings.TCP_CHUNK_SIZE)
+                if not data:
+                    continue
+                stats.received_bytes += len(data)
+                # Все сообщения из прочитанных данных отдаются обработчикам
+                # до следующего чтения. Если очередь полна, чтение ждёт.
+                for msg in frame_decoder.feed(data):
+                    await dispatcher.put(msg)
+                if frame_decoder.buffered:
+                    msg_logger.debug('[%s] Got chunk of the message (%s bytes)',
+                                     self, frame_decoder.buffered)
+            await dispatcher.join()
+        finally:
+            await self.close_dispatcher(channel, dispatcher)
 
     async def stop(self):
         if self._server is None:
@@ -0,0 +1,91 @@
+"""Socket options of the transports."""
+
+from __future__ import annotations
+
+import logging
+import socket
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from enki import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SocketOptions:
+    """Options set on the sockets of a transport.
+
+    Zero buffer sizes and keepalive timings mean the system values. The
+    options not applicable to the socket type (TCP_NODELAY, keepalive of
+    a UDP socket) are skipped, the options not supported by the platform
+    are logged and skipped.
+    """
+    # Отключить алгоритм Нейгла (asyncio включает TCP_NODELAY сам, False его выключает)
+    nodelay: bool = True
+    rcvbuf: int = 0
+    sndbuf: int = 0
+    keepalive: bool = False
+    # Через сколько секунд простоя отправлять проверки, интервал между ними
+    # и сколько проверок без ответа закрывают соединение
+    keepidle: int = 0
+    keepintvl: int = 0
+    keepcnt: int = 0
+    # None - значение по умолчанию asyncio
+    reuse_address: Optional[bool] = None
+    reuse_port: bool = False
+
+    def apply(self, sock: Any):
+        """Set the options on the socket (or asyncio.TransportSocket)."""
+        is_tcp = sock.type == socket.SOCK_STREAM
+        if is_tcp and sock.family in (socket.AF_INET, socket.AF_INET6):
+            _setsockopt(sock, socket.IPPROTO_TCP, 'TCP_NODELAY', int(self.nodelay))
+            if self.keepalive:
+                _setsockopt(sock, socket.SOL_SOCKET, 'SO_KEEPALIVE', 1)
+                # На macOS время простоя задаётся опцией TCP_KEEPALIVE
+                idle_opt = 'TCP_KEEPIDLE' if hasattr(socket, 'TCP_KEEPIDLE') else 'TCP_KEEPALIVE'
+                for name, value in ((idle_opt, self.keepidle),
+                                    ('TCP_KEEPINTVL', self.keepintvl),
+                                    ('TCP_KEEPCNT', self.keepcnt)):
+                    if value > 0:
+                        _setsockopt(sock, socket.IPPROTO_TCP, name, value)
+        if self.rcvbuf > 0:
+            _setsockopt(sock, socket.SOL_SOCKET, 'SO_RCVBUF', self.rcvbuf)
+        if self.sndbuf > 0:
+            _setsockopt(sock, socket.SOL_SOCKET, 'SO_SNDBUF', self.sndbuf)
+
+
+def _setsockopt(sock: Any, level: int, name: str, value: int):
+    opt = getattr(socket, name, None)
+    if opt is None:
+        logger.warning('The socket option "%s" is not supported by the platform', name)
+        return
+    try:
+        sock.setsockopt(level, opt, value)
+    except OSError as err:
+        logger.warning('The socket option "%s" cannot be set (%s)', name, err)
+
+
+def tcp_options(**kwargs) -> SocketOptions:
+    """Options of TCP sockets from the settings ("kwargs" override them)."""
+    kwargs = {
+        'nodelay': settings.TCP_NODELAY,
+        'rcvbuf': settings.TCP_RCVBUF,
+        'sndbuf': settings.TCP_SNDBUF,
+        'keepalive': settings.TCP_KEEPALIVE,
+        'keepidle': settings.TCP_KEEPIDLE,
+        'keepintvl': settings.TCP_KEEPINTVL,
+        'keepcnt': settings.TCP_KEEPCNT,
+        **kwargs
+    }
+    return SocketOptions(**kwargs)
+
+
+def udp_options(**kwargs) -> SocketOptions:
+    """Options of UDP sockets from the settings ("kwargs" override them)."""
+    kwargs = {
+        'rcvbuf': settings.UDP_RCVBUF,
+        'sndbuf': settings.UDP_SNDBUF,
+        **kwargs
+    }
+    return SocketOptions(**kwargs)
@@ -0,0 +1,265 @@
+"""Pool of UDP endpoints for sending datagrams."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+from asyncio import AbstractEventLoop, DatagramProtocol, DatagramTransport, Future
+from dataclasses import dataclass
+from typing import Optional
+
+from enki import settings
+from enki.core.enkitype import AppAddr
+
+from .sockopt import SocketOptions, udp_options
+
+logger = logging.getLogger(__name__)
+
+_Key = tuple[tuple[str, int], bool, Optional[SocketOptions]]
+
+
+@dataclass
+class UDPPoolStats:
+    """Counters of UDPEndpointPool."""
+    created: int = 0
+    # Closed after the TTL without sending
+    expired: int = 0
+    sent: int = 0
+    # Flushes of the datagrams queued during one iteration of the event loop
+    batches: int = 0
+
+
+class _Endpoint(DatagramProtocol):
+    """Socket sending the datagrams to one address.
+
+    The datagrams sent during one iteration of the event loop are queued
+    and written together by one callback, the senders wait for the same
+    future.
+    """
+
+    def __init__(self, pool: UDPEndpointPool, addr: AppAddr, broadcast: bool,
+                 sock: socket.socket):
+        self._pool = pool
+        self._addr = addr
+        self._broadcast = broadcast
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._transport: Optional[DatagramTransport] = None
+        self._pending: list[bytes] = []
+        self._flushed: Optional[Future] = None
+        self.last_used = self._loop.time()
+
+    @property
+    def is_closing(self) -> bool:
+        return self._transport is None or self._transport.is_closing()
+
+    @property
+    def is_idle(self) -> bool:
+        return not self._pending
+
+    def connection_made(self, transport: DatagramTransport):  # type: ignore[override]
+        self._transport = transport
+
+    def connection_lost(self, exc: Optional[Exception]):
+        if exc is not None:
+            logger.warning('[%s] %s', self, exc)
+        self._pool._forget(self)
+
+    def error_received(self, exc: Exception):
+        logger.error('[%s] %s', self, exc)
+
+    def send(self, data: bytes) -> Future:
+        """Queue the datagram. The future is done after it is written."""
+        self.last_used = self._loop.time()
+        self._pending.append(data)
+        if self._flushed is None:
+            self._flushed = self._loop.create_future()
+            self._loop.call_soon(self._flush)
+        return self._flushed
+
+    def close(self):
+        if self._transport is None:
+            return
+        if not self._loop.is_closed():
+            self._transport.close()
+        if not self._loop.is_running():
+            # Цикл не закроет сокет (закрыт или больше не запускается),
+            # транспорт закрытого цикла не закрыть, закрывается только сокет
+            self._sock.close()
+
+    def _flush(self):
+        pending, flushed = self._pending, self._flushed
+        self._pending, self._flushed = [], None
+        assert flushed is not None
+        success = not self.is_closing
+        if success:
+            assert self._transport is not None
+            # Широковещательный сокет не подключён к адресу
+            addr = self._addr.to_tuple() if self._broadcast else None
+            for data in pending:
+                self._transport.sendto(data, addr)
+            self._pool.stats.sent += len(pending)
+            self._pool.stats.batches += 1
+        if not flushed.done():
+            flushed.set_result(success)
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}({self._addr}, broadcast={self._broadcast})'
+
+    __repr__ = __str__
+
+
+class UDPEndpointPool:
+    """UDP sockets reused for the sending to the same address.
+
+    An endpoint is created by the first datagram to the address (and the
+    broadcast flag, the socket options) and closed after "ttl" seconds
+    without sending. The sockets have "socket_options" (from the settings
+    by default) if the sender doesn't pass its own ones.
+    """
+
+    def __init__(self, ttl: float = settings.UDP_ENDPOINT_TTL,
+                 socket_options: Optional[SocketOptions] = None):
+        self._loop = asyncio.get_running_loop()
+        self._ttl = ttl
+        self._socket_options = socket_options if socket_options is not None \
+            else udp_options()
+        self._endpoints: dict[_Key, _Endpoint] = {}
+        self._creating: dict[_Key, Future] = {}
+        self._expire_handle: Optional[asyncio.TimerHandle] = None
+        self.stats = UDPPoolStats()
+
+    @property
+    def loop(self) -> AbstractEventLoop:
+        return self._loop
+
+    def __len__(self) -> int:
+        return len(self._endpoints)
+
+    async def sendto(self, data: bytes, addr: AppAddr, broadcast: bool = False,
+                     socket_options: Optional[SocketOptions] = None) -> bool:
+        """Send the datagram. Returns False if the endpoint is closed."""
+        key = (addr.to_tuple(), broadcast, socket_options)
+        endpoint = self._endpoints.get(key)
+        if endpoint is None or endpoint.is_closing:
+            endpoint = await self._get_new(key, addr, broadcast,
+                                           socket_options or self._socket_options)
+        # Отмена одного отправителя не должна отменять ожидание остальных
+        return await asyncio.shield(endpoint.send(data))
+
+    def close(self):
+        """Close all endpoints.
+
+        Must be called in the thread of the pool loop. The sockets are
+        closed at once if the loop is not running (e.g. already closed).
+        """
+        if self._expire_handle is not None:
+            self._expire_handle.cancel()
+            self._expire_handle = None
+        for endpoint in list(self._endpoints.values()):
+            endpoint.close()
+        self._endpoints.clear()
+
+    async def _get_new(self, key: _Key, addr: AppAddr, broadcast: bool,
+                       socket_options: SocketOptions) -> _Endpoint:
+        creating = self._creating.get(key)
+        if creating is not None:
+            return await asyncio.shield(creating)
+
+        creating = self._creating[key] = self._loop.create_future()
+        try:
+            endpoint = await self._create(addr, broadcast, socket_options)
+        except asyncio.CancelledError:
+            creating.cancel()
+            raise
+        except Exception as err:
+            creating.set_exception(err)
+            # Ошибка уже передана вызывающему
+            creating.exception()
+            raise
+        else:
+            self._endpoints[key] = endpoint
+            creating.set_result(endpoint)
+            self._schedule_expire()
+            return endpoint
+        finally:
+            del self._creating[key]
+
+    async def _create(self, addr: AppAddr, broadcast: bool,
+                      socket_options: SocketOptions) -> _Endpoint:
+        loop = self._loop
+        logger.debug('[%s] Create the endpoint to %s (broadcast=%s)', self, addr, broadcast)
+        # Сокет создаётся здесь, чтобы пул мог закрыть его и без цикла событий
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            sock.setblocking(False)
+            if broadcast:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            else:
+                await loop.sock_connect(sock, addr.to_tuple())
+            socket_options.apply(sock)
+            _, endpoint = await loop.create_datagram_endpoint(
+                lambda: _Endpoint(self, addr, broadcast, sock), sock=sock)
+        except BaseException:
+            sock.close()
+            raise
+        self.stats.created += 1
+        return endpoint
+
+    def _forget(self, endpoint: _Endpoint):
+        for key, value in list(self._endpoints.items()):
+            if value is endpoint:
+                del self._endpoints[key]
+
+    def _schedule_expire(self):
+        if self._expire_handle is None and self._endpoints:
+            # Ближайший момент, когда может истечь срок одного из сокетов
+            when = min(e.last_used for e in self._endpoints.values()) + self._ttl
+            self._expire_handle = self._loop.call_at(when, self._expire)
+
+    def _expire(self):
+        self._expire_handle = None
+        deadline = self._loop.time() - self._ttl
+        for key, endpoint in list(self._endpoints.items()):
+            if endpoint.is_idle and endpoint.last_used <= deadline:
+                logger.debug('[%s] Close the expired %s', self, endpoint)
+                del self._endpoints[key]
+                endpoint.close()
+                self.stats.expired += 1
+        self._schedule_expire()
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}(size={len(self._endpoints)})'
+
+    __repr__ = __str__
+
+
+# Пул процесса, сокеты принадлежат циклу событий, в котором созданы
+_pool: Optional[UDPEndpointPool] = None
+
+
+def get_pool() -> UDPEndpointPool:
+    """The pool of the process (of the running event loop)."""
+    global _pool
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool.loop is not loop:
+        if _pool is not None:
+            _close_pool(_pool)
+        _pool = UDPEndpointPool()
+    return _pool
+
+
+def _close_pool(pool: UDPEndpointPool):
+    """Close the pool of another event loop."""
+    if pool.loop.is_running():
+        # Цикл работает в другом потоке, сокеты закрываются в нём
+        pool.loop.call_soon_threadsafe(pool.close)
+    else:
+        pool.close()
+
+
+async def sendto(data: bytes, addr: AppAddr, broadcast: bool = False,
+                 socket_options: Optional[SocketOptions] = None) -> bool:
+    """Send the datagram by the endpoint of the process pool."""
+    return await get_pool().sendto(data, addr, broadcast, socket_options)
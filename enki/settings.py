@@ -18,8 +18,72 @@ CONNECT_TO_SERVER_TIMEOUT = 5 * SECOND
 SERVER_TICK_PERIOD = 30 * SECOND
 
 TCP_CHUNK_SIZE: int = 65535
+# Размер буфера соединения при чтении через asyncio.BufferedProtocol (как
+# максимальный размер чтения у транспортов asyncio)
+TCP_RECV_BUFFER_SIZE: int = _env.int('TCP_RECV_BUFFER_SIZE', 256 * 1024)
+# Сколько сообщений одного соединения TCPServer обрабатывает одновременно
+# (при 1 сообщения обрабатываются по порядку) и сколько их может ждать
+# обработки, пока чтение из соединения не остановится
+TCP_SERVER_CONCURRENCY: int = _env.int('TCP_SERVER_CONCURRENCY', 1)
+TCP_SERVER_QUEUE_SIZE: int = _env.int('TCP_SERVER_QUEUE_SIZE', 64)
+# Клиент BaseApp копит сообщения, отправленные за одну итерацию цикла событий
+# (или за TCP_CORK_DELAY секунд), и пишет их в сокет одним вызовом. Накопленные
+# данные больше TCP_CORK_SIZE пишутся сразу
+TCP_CORK: bool = _env.bool('TCP_CORK', False)
+TCP_CORK_DELAY: float = _env.float('TCP_CORK_DELAY', 0.0)
+TCP_CORK_SIZE: int = _env.int('TCP_CORK_SIZE', 64 * 1024)
+# Границы буфера отправки TCP клиента: выше верхней отправка считается
+# остановленной, ниже нижней возобновляется. Что делать с данными, пока
+# отправка остановлена (см. net.client.OverflowPolicy): "block" - ждать,
+# "drop_oldest" - копить, заменяя устаревшие обновления положения и отбрасывая
+# самые старые данные сверх верхней границы, "disconnect" - закрыть соединение
+TCP_WRITE_HIGH_WATER: int = _env.int('TCP_WRITE_HIGH_WATER', 256 * 1024)
+TCP_WRITE_LOW_WATER: int = _env.int('TCP_WRITE_LOW_WATER', 64 * 1024)
+TCP_OVERFLOW_POLICY: str = _env.str('TCP_OVERFLOW_POLICY', 'block')
+# Сколько обработчиков датаграмм у UDP сервера, сколько датаграмм может ждать
+# обработки (лишние отбрасываются) и сколько их обработчик берёт за раз
+UDP_SERVER_WORKERS: int = _env.int('UDP_SERVER_WORKERS', 4)
+UDP_SERVER_QUEUE_SIZE: int = _env.int('UDP_SERVER_QUEUE_SIZE', 1024)
+UDP_SERVER_BATCH_SIZE: int = _env.int('UDP_SERVER_BATCH_SIZE', 32)
+# Через сколько секунд без отправки закрывается UDP сокет пула (см. net.udppool)
+UDP_ENDPOINT_TTL: float = _env.float('UDP_ENDPOINT_TTL', MINUTE)
+# Параметры сокетов транспортов (см. net.sockopt.SocketOptions). Размеры
+# буферов и время keepalive 0 - значения системы
+TCP_NODELAY: bool = _env.bool('TCP_NODELAY', True)
+TCP_RCVBUF: int = _env.int('TCP_RCVBUF', 0)
+TCP_SNDBUF: int = _env.int('TCP_SNDBUF', 0)
+TCP_KEEPALIVE: bool = _env.bool('TCP_KEEPALIVE', False)
+TCP_KEEPIDLE: int = _env.int('TCP_KEEPIDLE', 0)
+TCP_KEEPINTVL: int = _env.int('TCP_KEEPINTVL', 0)
+TCP_KEEPCNT: int = _env.int('TCP_KEEPCNT', 0)
+UDP_RCVBUF: int = _env.int('UDP_RCVBUF', 0)
+UDP_SNDBUF: int = _env.int('UDP_SNDBUF', 0)
+
+# Использовать цикл событий uvloop, если он установлен (Supervisor, сетевой
+# поток клиента, скрипты tools/cmd)
+USE_UVLOOP: bool = _env.bool('USE_UVLOOP', False)
 
 LOG_LEVEL: int = _env.log_level('LOG_LEVEL', logging.DEBUG)
+# Уровни логов подсистем: "enki.net=INFO,enki.app.clientapp=DEBUG"
+LOG_LEVELS: str = _env.str('LOG_LEVELS', '')
+# Записи на каждое сообщение пишутся в отдельный канал "<модуль>.msg" уровня
+# DEBUG: пишется каждая N-я запись, 0 - канал выключен (см. misc.log.msg_logger)
+LOG_MSG_SAMPLE: int = _env.int('LOG_MSG_SAMPLE', 0)
+# Записи журнала пишет отдельный поток, остальные потоки только кладут их в
+# очередь этого размера (если она полна, запись отбрасывается). 0 - записи
+# пишутся синхронно (см. misc.log.setup_root_logger)
+LOG_QUEUE_SIZE: int = _env.int('LOG_QUEUE_SIZE', 0)
+
+# Метрики сообщений: число, байты, время декодирования, кодирования и
+# обработки (см. core.metrics). Экспорт в формате Prometheus по HTTP
+# (порт 0 - выключен) и в файл (для textfile collector node_exporter)
+METRICS: bool = _env.bool('METRICS', False)
+# Метрики записываются у одного из N сообщений, счётчики умножаются на N
+METRICS_SAMPLE: int = _env.int('METRICS_SAMPLE', 16)
+METRICS_HTTP_HOST: str = _env.str('METRICS_HTTP_HOST', '127.0.0.1')
+METRICS_HTTP_PORT: int = _env.int('METRICS_HTTP_PORT', 0)
+METRICS_FILE: str = _env.str('METRICS_FILE', '')
+METRICS_FILE_PERIOD: float = _env.float('METRICS_FILE_PERIOD', 15.0)
 
 # Нужно так же учитывать примерный интревала удержания GIL (~5ms). Быстрее работать не будет.
 # https://pythonspeed.com/articles/python-gil/
@@ -27,3 +91,11 @@ GAME_TICK = 20 * MSECOND
 GAME_HALF_TICK = GAME_TICK / 2
 
 KBE_VERSION: int  = _env.int('KBE_VERSION', 2)
+
+# Компилировать декодеры FIXED_DICT / ARRAY пользовательских типов
+# в линейный код при загрузке описаний сущностей (см. kbetype.typecompiler)
+COMPILE_KBE_TYPES: bool = _env.bool('COMPILE_KBE_TYPES', False)
+
+# Декодировать массивы чисел и векторов одним вызовом (numpy.frombuffer
+# или array.array, если NumPy не установлен), см. kbetype.numarray
+NUMERIC_ARRAYS: bool = _env.bool('NUMERIC_ARRAYS', False)
@@ -0,0 +1,102 @@
+"""Tests of RequestCommand (loopback)."""
+
+import asyncio
+import struct
+import time
+
+import asynctest
+
+from enki.command import ConnectionPool, RequestCommand
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.kbeenum import ComponentType
+from enki.core.message import Message
+
+# Поля onLookApp: тип компонента, его идентификатор и состояние завершения
+_RESPONSE = struct.pack('<iQb', ComponentType.BASEAPP.value, 1000, 0)
+
+
+class RequestCommandTestCase(asynctest.TestCase):
+
+    async def setUp(self):
+        self._connections = 0
+        self._close_after_response = False
+        self._no_response = False
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            self._connections += 1
+            while await reader.read(65536):
+                if self._no_response:
+                    continue
+                writer.write(_RESPONSE)
+                if self._close_after_response:
+                    break
+            writer.close()
+
+        self._server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self._addr = AppAddr('127.0.0.1', self._server.sockets[0].getsockname()[1])
+
+    async def tearDown(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _cmd(self, **kwargs) -> RequestCommand:
+        return RequestCommand(
+            self._addr,
+            Message(msgspec.app.baseapp.lookApp, tuple()),
+            msgspec.custom.onLookApp.change_component_owner(ComponentType.BASEAPP),
+            **kwargs
+        )
+
+    async def test_done_on_first_response(self):
+        start = time.perf_counter()
+        res = await self._cmd(stop_on_first_data_chunk=True).execute()
+        self.assertTrue(res.success, res.text)
+        self.assertEqual(res.result[0].get_values(), [ComponentType.BASEAPP.value, 1000, 0])
+        # Ответ не ждёт тика опроса
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    async def test_done_on_close(self):
+        self._close_after_response = True
+        res = await self._cmd(timeout=5).execute()
+        self.assertTrue(res.success, res.text)
+        self.assertEqual(len(res.result), 1)
+
+    async def test_closed_without_response(self):
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            await reader.read(65536)
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.addCleanup(server.close)
+        self._addr = AppAddr('127.0.0.1', server.sockets[0].getsockname()[1])
+        res = await self._cmd(timeout=5).execute()
+        self.assertFalse(res.success)
+        self.assertIn('closed the connection', res.text)
+
+    async def test_no_response(self):
+        self._no_response = True
+        start = time.perf_counter()
+        res = await self._cmd(timeout=0.1).execute()
+        self.assertFalse(res.success)
+        self.assertIn('No response', res.text)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    async def test_pool_reuses_connection(self):
+        pool = ConnectionPool()
+        self.addCleanup(pool.close)
+        for _ in range(3):
+            res = await self._cmd(expected_count=1, pool=pool).execute()
+            self.assertTrue(res.success, res.text)
+        self.assertEqual(self._connections, 1)
+
+    async def test_pool_reconnects_after_close(self):
+        pool = ConnectionPool()
+        self.addCleanup(pool.close)
+        self._close_after_response = True
+        for _ in range(2):
+            res = await self._cmd(expected_count=1, pool=pool).execute()
+            self.assertTrue(res.success, res.text)
+            # Даём клиенту узнать о закрытии соединения сервером
+            await asyncio.sleep(0.05)
+        self.assertEqual(self._connections, 2)
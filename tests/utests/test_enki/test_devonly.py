@@ -0,0 +1,46 @@
+"""Tests of devonly.func_args_values."""
+
+import logging
+import unittest
+from unittest import mock
+
+from enki.misc import devonly
+
+
+class _Value:
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self) -> str:
+        self.formatted += 1
+        return 'value'
+
+
+class FuncArgsValuesTestCase(unittest.TestCase):
+
+    def _func(self, a, b=2, *, c):
+        return devonly.func_args_values()
+
+    def test_format(self):
+        self.assertEqual(str(self._func(1, c='x')), 'a = 1, b = 2, c = x')
+
+    def test_lazy(self):
+        """Аргументы не форматируются, если запись журнала не выводится."""
+        value = _Value()
+        test_logger = logging.getLogger(f'{__name__}.lazy')
+        test_logger.setLevel(logging.INFO)
+
+        def func(arg):
+            test_logger.debug('%s', devonly.func_args_values())
+            test_logger.info('%s', devonly.func_args_values())
+
+        with mock.patch.object(test_logger, 'handle') as handle:
+            func(value)
+        self.assertEqual(value.formatted, 0)
+        record = handle.call_args[0][0]
+        self.assertEqual(record.getMessage(), 'arg = value')
+        self.assertEqual(value.formatted, 1)
+        # Отформатированный текст сохраняется, кадр больше не нужен
+        self.assertEqual(str(record.args[0]), 'arg = value')
+        self.assertEqual(value.formatted, 1)
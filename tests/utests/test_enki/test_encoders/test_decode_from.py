@@ -0,0 +1,78 @@
+"""Tests of decoding by offset (decode_from)."""
+
+import collections
+import unittest
+
+from enki.core import kbetype
+
+
+class DecodeFromTestCase(unittest.TestCase):
+    """decode_from returns the same values as decode and the offset after the value."""
+
+    _PREFIX = b'\xff\xff\xff'
+
+    def _assert_same_as_decode(self, kbe_type, value):
+        encoded = kbe_type.encode(value)
+        expected, size = kbe_type.decode(memoryview(encoded))
+        buf = memoryview(self._PREFIX + encoded + b'tail')
+        decoded, offset = kbe_type.decode_from(buf, len(self._PREFIX))
+        self.assertEqual(decoded, expected, kbe_type)
+        self.assertEqual(offset, len(self._PREFIX) + size, kbe_type)
+
+    def test_simple_types(self):
+        for kbe_type, value in (
+            (kbetype.INT8, -3),
+            (kbetype.UINT16, 300),
+            (kbetype.INT32, -70000),
+            (kbetype.UINT64, 2 ** 40),
+            (kbetype.FLOAT, 0.5),
+            (kbetype.DOUBLE, 0.25),
+            (kbetype.BOOL, True),
+            (kbetype.BLOB, b'blob'),
+            (kbetype.BLOB, b''),
+            (kbetype.STRING, 'kbengine'),
+            (kbetype.STRING, ''),
+            (kbetype.UNICODE, 'юникод'),
+            (kbetype.PYTHON, {'key': [1, 2]}),
+            (kbetype.ENTITY_ID, 42),
+        ):
+            self._assert_same_as_decode(kbe_type, value)
+
+    def test_long_string(self):
+        # The terminator is beyond the first scanned chunk
+        self._assert_same_as_decode(kbetype.STRING, 'x' * 200)
+
+    def test_string_without_terminator(self):
+        buf = memoryview(b'\x00abc')
+        # The same as decode: the last byte is considered as the terminator
+        self.assertEqual(kbetype.STRING.decode(buf[1:]), ('ab', 3))
+        self.assertEqual(kbetype.STRING.decode_from(buf, 1), ('ab', 4))
+        self.assertEqual(kbetype.STRING.decode_from(buf, 4), ('', 5))
+
+    def test_vector(self):
+        buf = memoryview(self._PREFIX + kbetype.FLOAT.encode(1.0)
+                         + kbetype.FLOAT.encode(2.0) + kbetype.FLOAT.encode(3.0))
+        value, offset = kbetype.VECTOR3.decode_from(buf, len(self._PREFIX))
+        self.assertEqual(value, kbetype.Vector3(1.0, 2.0, 3.0))
+        self.assertEqual(offset, len(buf))
+
+    def test_row_data(self):
+        buf = memoryview(b'\x01\x02\x03')
+        value, offset = kbetype.UINT8_ARRAY.decode_from(buf, 1)
+        self.assertEqual(bytes(value), b'\x02\x03')
+        self.assertEqual(offset, 3)
+
+    def test_array_of_fixed_dict(self):
+        fd_type = kbetype.FIXED_DICT.build('AVATAR_INFO', collections.OrderedDict([
+            ('name', kbetype.UNICODE),
+            ('uid', kbetype.INT32),
+        ]))
+        arr_type = kbetype.ARRAY.build('AVATAR_INFO_LIST', fd_type)
+        data = b'\x02\x00\x00\x00' \
+            + kbetype.UNICODE.encode('one') + kbetype.INT32.encode(1) \
+            + kbetype.UNICODE.encode('two') + kbetype.INT32.encode(2)
+        buf = memoryview(self._PREFIX + data)
+        value, offset = arr_type.decode_from(buf, len(self._PREFIX))
+        self.assertEqual(offset, len(buf))
+        self.assertEqual([dict(fd) for fd in value],
+                         [{'name': 'one', 'uid': 1}, {'name': 'two', 'uid': 2}])
@@ -0,0 +1,90 @@
+"""Tests of encoding to the caller-owned buffer (encode_into)."""
+
+import collections
+import unittest
+
+from enki.core import kbetype, msgspec
+from enki.core.message import Message, MessageSerializer
+
+
+class EncodeIntoTestCase(unittest.TestCase):
+    """encode_into appends the same bytes as encode returns."""
+
+    _PREFIX = b'\xff\xff\xff'
+
+    def _assert_same_as_encode(self, kbe_type, value):
+        buf = bytearray(self._PREFIX)
+        written = kbe_type.encode_into(buf, value)
+        expected = kbe_type.encode(value)
+        self.assertEqual(bytes(buf), self._PREFIX + expected, kbe_type)
+        self.assertEqual(written, len(expected), kbe_type)
+
+    def test_simple_types(self):
+        for kbe_type, value in (
+            (kbetype.INT8, -3),
+            (kbetype.UINT16, 300),
+            (kbetype.INT32, -70000),
+            (kbetype.UINT64, 2 ** 40),
+            (kbetype.FLOAT, 0.5),
+            (kbetype.FLOAT, 1e20),
+            (kbetype.DOUBLE, 0.25),
+            (kbetype.BOOL, True),
+            (kbetype.BLOB, b'blob'),
+            (kbetype.BLOB, b''),
+            (kbetype.ENDLESS_BLOB, b'blob'),
+            (kbetype.STRING, 'kbengine'),
+            (kbetype.UNICODE, 'юникод'),
+            (kbetype.UINT8_ARRAY, b'\x01\x02'),
+        ):
+            self._assert_same_as_encode(kbe_type, value)
+
+    def test_fixed_dict(self):
+        fd_type = kbetype.FIXED_DICT.build('AVATAR_INFO', collections.OrderedDict([
+            ('name', kbetype.UNICODE),
+            ('uid', kbetype.INT32),
+        ]))
+        value = fd_type.default
+        value['name'] = 'name'
+        value['uid'] = 7
+        buf = bytearray()
+        written = fd_type.encode_into(buf, value)
+        self.assertEqual(written, len(buf))
+        self.assertEqual(fd_type.decode(memoryview(buf)), (value, len(buf)))
+        self.assertEqual(fd_type.encode(value), bytes(buf))
+
+    def test_array(self):
+        arr_type = kbetype.ARRAY.build('INT_ARRAY', kbetype.INT32)
+        value = kbetype.Array(of=int, type_name='INT_ARRAY', initial_data=[1, 2, 3])
+        self._assert_same_as_encode(arr_type, value)
+        self._assert_same_as_encode(arr_type, arr_type.default)
+
+
+class SerializeIntoTestCase(unittest.TestCase):
+
+    def test_same_as_serialize(self):
+        serializer = MessageSerializer(msgspec.app.machine.SPEC_BY_ID)
+        spec = msgspec.app.machine.onBroadcastInterface
+        msg = Message(spec, tuple(
+            'name' if t is kbetype.STRING else t.default for t in spec.field_types))
+        buf = bytearray(b'prefix')
+        written = serializer.serialize_into(msg, buf)
+        self.assertEqual(bytes(buf), b'prefix' + serializer.serialize(msg))
+        self.assertEqual(written, len(buf) - len(b'prefix'))
+        for only_data in (True, False):
+            buf = bytearray()
+            serializer.serialize_into(msg, buf, only_data=only_data)
+            self.assertEqual(bytes(buf), serializer.serialize(msg, only_data=only_data))
+
+    def test_length_is_patched(self):
+        serializer = MessageSerializer(msgspec.app.machine.SPEC_BY_ID)
+        spec = msgspec.app.machine.onBroadcastInterface
+        assert spec.need_calc_length
+        msg = Message(spec, tuple(t.default for t in spec.field_types))
+        buf = bytearray()
+        serializer.serialize_into(msg, buf)
+        length, _ = kbetype.MESSAGE_LENGTH.decode_from(buf, kbetype.MESSAGE_ID.size)
+        self.assertEqual(length, len(buf) - kbetype.MESSAGE_ID.size - kbetype.MESSAGE_LENGTH.size)
+        decoded, tail = serializer.deserialize(memoryview(bytes(buf)))
+        assert decoded is not None
+        self.assertEqual(decoded.get_values(), msg.get_values())
+        self.assertFalse(tail)
@@ -0,0 +1,79 @@
+"""Tests of the compiled codec of message fields."""
+
+import unittest
+
+from enki.core import kbetype, msgspec
+from enki.core.kbetype import FieldsCodec
+from enki.core.message import Message, MessageSerializer
+
+
+def _decode_generic(field_types, data: memoryview):
+    values = []
+    for kbe_type in field_types:
+        value, size = kbe_type.decode(data)
+        values.append(value)
+        data = data[size:]
+    return tuple(values)
+
+
+class FieldsCodecTestCase(unittest.TestCase):
+
+    def test_primitive_fields_are_one_struct(self):
+        codec = FieldsCodec((kbetype.INT32, kbetype.UINT16, kbetype.FLOAT, kbetype.UINT64))
+        self.assertTrue(codec.is_fixed)
+        self.assertEqual(codec.size, 4 + 2 + 4 + 8)
+        values = (-1, 2, 0.5, 2 ** 40)
+        data = codec.encode(values)
+        self.assertEqual(data, b''.join(
+            t.encode(v) for t, v in zip(codec.field_types, values)))
+        self.assertEqual(codec.decode(memoryview(data)), (values, len(data)))
+
+    def test_mixed_fields(self):
+        spec = msgspec.app.machine.onBroadcastInterface
+        codec = spec.fields_codec
+        self.assertFalse(codec.is_fixed)
+        values = tuple(
+            'name' if t is kbetype.STRING else t.default for t in spec.field_types
+        )
+        data = codec.encode(values)
+        self.assertEqual(data, b''.join(
+            t.encode(v) for t, v in zip(spec.field_types, values)))
+        decoded, size = codec.decode(memoryview(data + b'tail'))
+        self.assertEqual(size, len(data))
+        self.assertEqual(decoded, _decode_generic(spec.field_types, memoryview(data)))
+
+    def test_float_is_normalized(self):
+        codec = FieldsCodec((kbetype.FLOAT, kbetype.INT8))
+        self.assertEqual(codec.encode((1e20, 1)), kbetype.FLOAT.encode(1e20) + b'\x01')
+
+    def test_bool_in_struct(self):
+        """BOOL входит в общую struct, значение декодируется как и раньше."""
+        codec = msgspec.custom.onReqCloseServer.fields_codec
+        self.assertTrue(codec.is_fixed)
+        self.assertEqual(codec.size, 1)
+
+        codec = FieldsCodec((kbetype.UINT16, kbetype.BOOL, kbetype.INT8))
+        self.assertTrue(codec.is_fixed)
+        self.assertEqual(codec.encode((1, 5, -1)), b'\x01\x00\x01\xff')
+        for byte in (0, 1, 0x7f, 0x80, 0xff):
+            data = memoryview(b'\x01\x00' + bytes([byte]) + b'\xff')
+            self.assertEqual(codec.decode(data)[0],
+                             (1, kbetype.BOOL.decode(data[2:])[0], -1))
+
+    def test_no_fields(self):
+        codec = FieldsCodec(tuple())
+        self.assertEqual(codec.decode(memoryview(b'')), (tuple(), 0))
+        self.assertEqual(codec.encode(tuple()), b'')
+
+
+class MessageSerializerCodecTestCase(unittest.TestCase):
+
+    def test_serialize_deserialize_all_machine_specs(self):
+        serializer = MessageSerializer(msgspec.app.machine.SPEC_BY_ID)
+        for spec in msgspec.app.machine.SPEC_BY_ID.values():
+            values = tuple(t.default for t in spec.field_types)
+            data = serializer.serialize(Message(spec, values))
+            msg, tail = serializer.deserialize(memoryview(data))
+            assert msg is not None
+            self.assertEqual(msg.get_values(), list(values), spec.name)
+            self.assertFalse(tail)
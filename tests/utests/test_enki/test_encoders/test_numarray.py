@@ -0,0 +1,130 @@
+"""Tests of ARRAY of numeric items (NumericArray)."""
+
+import collections
+import unittest
+from unittest import mock
+
+from enki.core import kbetype
+from enki.core.kbetype import numarray, typecompiler
+
+
+def _numeric_array_type(name: str, of):
+    arr_type = kbetype.ARRAY.build(name, of)
+    numarray.install(arr_type)
+    return arr_type
+
+
+class _NumericArrayTestsMixin:
+    """The tests are run with NumPy and with array.array."""
+
+    _PREFIX = b'\xff\xfe'
+
+    def _assert_same_as_generic(self, of, data: bytes):
+        generic_type = kbetype.ARRAY.build('GENERIC', of)
+        numeric_type = _numeric_array_type('GENERIC', of)
+        buf = memoryview(self._PREFIX + data + b'tail')
+        expected, expected_offset = generic_type.decode_from(buf, len(self._PREFIX))
+        value, offset = numeric_type.decode_from(buf, len(self._PREFIX))
+        self.assertIsInstance(value, kbetype.NumericArray)
+        self.assertEqual(offset, expected_offset)
+        self.assertEqual(value, expected)
+        self.assertEqual(list(value), list(expected))
+        self.assertEqual(str(value), str(expected))
+        for i in range(-len(expected), len(expected)):
+            self.assertEqual(value[i], expected[i])
+            self.assertIs(type(value[i]), type(expected[i]))
+        return value
+
+    def test_primitive_types(self):
+        for of, values in (
+            (kbetype.INT8, [-1, 2, 127]),
+            (kbetype.UINT16, [0, 65535]),
+            (kbetype.INT32, [-70000, 1, 2, 3]),
+            (kbetype.UINT64, [2 ** 63]),
+            (kbetype.FLOAT, [0.5, -1.25]),
+            (kbetype.DOUBLE, [0.1, 1e100]),
+            (kbetype.INT64, []),
+        ):
+            with self.subTest(of=of.name):
+                data = kbetype.UINT32.encode(len(values)) \
+                    + b''.join(of.encode(v) for v in values)
+                value = self._assert_same_as_generic(of, data)
+                # Encoding is straight from the typed buffer
+                numeric_type = _numeric_array_type('GENERIC', of)
+                self.assertEqual(numeric_type.encode(value), data)
+
+    def test_vectors(self):
+        data = kbetype.UINT32.encode(2) \
+            + b''.join(kbetype.FLOAT.encode(v) for v in (1, 2, 3, 4, 5, 6))
+        value = self._assert_same_as_generic(kbetype.VECTOR3, data)
+        self.assertEqual(value[1], kbetype.Vector3(4, 5, 6))
+        self.assertEqual(_numeric_array_type('VECTORS', kbetype.VECTOR3).encode(value), data)
+
+    def test_modification(self):
+        arr_type = _numeric_array_type('INT_ARRAY', kbetype.INT32)
+        data = kbetype.UINT32.encode(3) + b''.join(kbetype.INT32.encode(v) for v in (1, 2, 3))
+        value, _ = arr_type.decode_from(memoryview(data), 0)
+        copy = value.copy()
+        value.append(4)
+        value.insert(0, 0)
+        value[1] = 10
+        del value[2]
+        self.assertEqual(value.pop(), 4)
+        value.extend([5, 6])
+        self.assertEqual(value, [0, 10, 3, 5, 6])
+        self.assertEqual(value[1:3], [10, 3])
+        with self.assertRaises(TypeError):
+            value.append('7')
+        with self.assertRaises(TypeError):
+            value[0] = 1.5
+        # The copy and the decoded data are not changed
+        self.assertEqual(copy, [1, 2, 3])
+        self.assertEqual(arr_type.decode_from(memoryview(data), 0)[0], [1, 2, 3])
+        # The modified array is encoded too
+        self.assertEqual(arr_type.decode(memoryview(arr_type.encode(value)))[0], value)
+
+    def test_vector_modification(self):
+        arr_type = _numeric_array_type('VECTORS', kbetype.VECTOR2)
+        value, _ = arr_type.decode_from(memoryview(kbetype.UINT32.encode(0)), 0)
+        value.append(kbetype.Vector2(1, 2))
+        value.insert(0, kbetype.Vector2(3, 4))
+        self.assertEqual(value, [kbetype.Vector2(3, 4), kbetype.Vector2(1, 2)])
+        del value[-1]
+        self.assertEqual(len(value), 1)
+
+    def test_in_fixed_dict(self):
+        fd_type = kbetype.FIXED_DICT.build('PATH', collections.OrderedDict([
+            ('id', kbetype.INT32),
+            ('waypoints', kbetype.ARRAY.build('WAYPOINTS', kbetype.VECTOR3)),
+            ('names', kbetype.ARRAY.build('NAMES', kbetype.STRING)),
+        ]))
+        self.assertEqual(numarray.install(fd_type), 1)
+        data = kbetype.INT32.encode(7) + kbetype.UINT32.encode(1) \
+            + b''.join(kbetype.FLOAT.encode(v) for v in (1, 2, 3)) \
+            + kbetype.UINT32.encode(1) + kbetype.STRING.encode('name')
+        for decode_from in (fd_type.decode_from, typecompiler.compile_decoder(fd_type)):
+            value, offset = decode_from(memoryview(data), 0)
+            self.assertEqual(offset, len(data))
+            self.assertIsInstance(value['waypoints'], kbetype.NumericArray)
+            self.assertEqual(value['waypoints'], [kbetype.Vector3(1, 2, 3)])
+            self.assertEqual(value['names'], ['name'])
+        # Numeric array cannot be compiled (it's already decoded by one call)
+        self.assertFalse(typecompiler.can_compile(fd_type._pairs['waypoints']))
+
+    def test_short_buffer(self):
+        arr_type = _numeric_array_type('INT_ARRAY', kbetype.INT32)
+        with self.assertRaises(Exception):
+            arr_type.decode(memoryview(kbetype.UINT32.encode(2) + b'\x00' * 4))
+
+
+@unittest.skipIf(numarray.np is None, 'NumPy is not installed')
+class NumpyNumericArrayTestCase(_NumericArrayTestsMixin, unittest.TestCase):
+    pass
+
+
+class ArrayModuleNumericArrayTestCase(_NumericArrayTestsMixin, unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(numarray, 'np', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
@@ -0,0 +1,134 @@
+"""Differential tests of the compiled FIXED_DICT / ARRAY decoders.
+
+The compiled decoder must return the same values (including the key order,
+the type names and the item types) and the same offset as the generic one.
+"""
+
+import collections
+import random
+import unittest
+
+from enki.core import kbetype
+from enki.core.kbetype import typecompiler
+from enki.core.kbetype.typeserializers import _ArrayType, _BlobType, _BoolType, \
+    _FixedDictType, _PrimitiveKBEType, _StringType, _UnicodeType
+
+from tests.data.descr import deftype
+
+_INT_RANGE_BY_CHAR = {
+    'b': (-2 ** 7, 2 ** 7 - 1), 'B': (0, 2 ** 8 - 1),
+    'h': (-2 ** 15, 2 ** 15 - 1), 'H': (0, 2 ** 16 - 1),
+    'i': (-2 ** 31, 2 ** 31 - 1), 'I': (0, 2 ** 32 - 1),
+    'q': (-2 ** 63, 2 ** 63 - 1), 'Q': (0, 2 ** 64 - 1),
+}
+
+
+def _random_value(rnd: random.Random, kbe_type, depth: int = 0):
+    if isinstance(kbe_type, _PrimitiveKBEType):
+        char = kbe_type.fmt[-1]
+        if char in 'fd':
+            return rnd.randint(-4000, 4000) / 4
+        return rnd.randint(*_INT_RANGE_BY_CHAR[char])
+    if isinstance(kbe_type, _BoolType):
+        return rnd.random() > 0.5
+    if isinstance(kbe_type, (_StringType, _UnicodeType)):
+        return ''.join(rnd.choice('abcюя') for _ in range(rnd.randint(0, 10)))
+    if isinstance(kbe_type, _BlobType):
+        return bytes(rnd.randint(0, 255) for _ in range(rnd.randint(0, 10)))
+    if type(kbe_type) is _FixedDictType:
+        return kbetype.FixedDict(kbe_type.name, collections.OrderedDict(
+            (k, _random_value(rnd, t, depth + 1)) for k, t in kbe_type._pairs.items()
+        ))
+    if type(kbe_type) is _ArrayType:
+        length = 0 if rnd.random() < 0.2 else rnd.randint(1, 5 if depth else 20)
+        return kbetype.Array(
+            of=type(kbe_type._of.default), type_name=kbe_type.name,
+            initial_data=[_random_value(rnd, kbe_type._of, depth + 1) for _ in range(length)]
+        )
+    raise AssertionError(f'There is no generator for the type "{kbe_type}"')
+
+
+def _generic_decode_from(kbe_type, buf, offset):
+    # The method of the class (not the compiled function of the instance)
+    return type(kbe_type).decode_from(kbe_type, buf, offset)
+
+
+class TypeCompilerTestCase(unittest.TestCase):
+
+    _PREFIX = b'\xff\xfe'
+    _TAIL = b'tail'
+
+    def _assert_same(self, kbe_type, data: bytes):
+        buf = memoryview(self._PREFIX + data + self._TAIL)
+        expected, expected_offset = _generic_decode_from(kbe_type, buf, len(self._PREFIX))
+        compiled = typecompiler.compile_decoder(kbe_type)
+        value, offset = compiled(buf, len(self._PREFIX))
+        source = typecompiler.get_source(kbe_type)
+        self.assertEqual(offset, expected_offset, source)
+        self.assertIs(type(value), type(expected), source)
+        # repr contains the type name and the order of keys
+        self.assertEqual(repr(value), repr(expected), source)
+        self.assertEqual(str(value), str(expected), source)
+        self.assertEqual(value, expected, source)
+
+    def _assert_random_values(self, kbe_type, count: int = 30):
+        rnd = random.Random(kbe_type.name)
+        for _ in range(count):
+            value = _random_value(rnd, kbe_type)
+            self._assert_same(kbe_type, kbe_type.encode(value))
+
+    def test_generated_types(self):
+        types = [spec.kbetype for spec in deftype.TYPE_SPEC_BY_ID.values()
+                 if typecompiler.can_compile(spec.kbetype)]
+        self.assertTrue(types)
+        for kbe_type in types:
+            with self.subTest(kbe_type=kbe_type.name):
+                self._assert_random_values(kbe_type)
+
+    def test_nested_types(self):
+        point = kbetype.FIXED_DICT.build('POINT', collections.OrderedDict([
+            ('x', kbetype.FLOAT), ('y', kbetype.FLOAT),
+            ('visible', kbetype.BOOL), ('name', kbetype.STRING),
+            ('id', kbetype.UINT64), ('flags', kbetype.UINT8),
+        ]))
+        points = kbetype.ARRAY.build('POINTS', point)
+        matrix = kbetype.ARRAY.build('MATRIX', kbetype.ARRAY.build('ROW', kbetype.INT16))
+        root = kbetype.FIXED_DICT.build('ROOT', collections.OrderedDict([
+            ('points', points),
+            ('matrix', matrix),
+            ('blob', kbetype.BLOB),
+            ('flags', kbetype.ARRAY.build('FLAGS', kbetype.BOOL)),
+            ('title', kbetype.UNICODE),
+            ('inner', point),
+        ]))
+        for kbe_type in (point, points, matrix, root):
+            with self.subTest(kbe_type=kbe_type.name):
+                self._assert_random_values(kbe_type)
+
+    def test_empty(self):
+        empty_fd = kbetype.FIXED_DICT.build('EMPTY', collections.OrderedDict())
+        self._assert_same(empty_fd, b'')
+        self._assert_same(kbetype.ARRAY.build('INT_ARRAY', kbetype.INT32), b'\x00' * 4)
+
+    def test_not_encodable_child(self):
+        # VECTOR3 has no encoder, the data is prepared by hand
+        fd = kbetype.FIXED_DICT.build('WITH_VECTOR', collections.OrderedDict([
+            ('pos', kbetype.VECTOR3), ('id', kbetype.INT32),
+        ]))
+        data = kbetype.FLOAT.encode(1) + kbetype.FLOAT.encode(2) \
+            + kbetype.FLOAT.encode(3) + kbetype.INT32.encode(7)
+        self._assert_same(fd, data)
+
+    def test_install(self):
+        fd = kbetype.FIXED_DICT.build('INSTALLED', collections.OrderedDict([
+            ('a', kbetype.INT32), ('b', kbetype.STRING),
+        ]))
+        self.assertTrue(typecompiler.install(fd))
+        self.assertIs(fd.decode_from, typecompiler.compile_decoder(fd))
+        value = fd.default
+        data = fd.encode(value)
+        self.assertEqual(fd.decode(memoryview(data)), (value, len(data)))
+        # The alias is decoded with its own name
+        alias = fd.alias('INSTALLED_ALIAS')
+        self.assertNotIn('decode_from', alias.__dict__)
+        self.assertFalse(typecompiler.install(kbetype.INT32))
@@ -0,0 +1,51 @@
+"""Tests of the choice of the event loop (misc.evloop)."""
+
+import asyncio
+import sys
+import unittest
+from unittest import mock
+
+from enki import settings
+from enki.misc import evloop
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+class EventLoopTestCase(unittest.TestCase):
+
+    def _new_loop(self) -> asyncio.AbstractEventLoop:
+        loop = evloop.new_event_loop()
+        self.addCleanup(loop.close)
+        return loop
+
+    def test_disabled(self):
+        with mock.patch.object(settings, 'USE_UVLOOP', False):
+            loop = self._new_loop()
+        self.assertIsInstance(loop, asyncio.BaseEventLoop)
+        if uvloop is not None:
+            self.assertNotIsInstance(loop, uvloop.Loop)
+
+    def test_not_installed(self):
+        # Без uvloop используется стандартный цикл
+        with mock.patch.object(settings, 'USE_UVLOOP', True), \
+                mock.patch.dict(sys.modules, {'uvloop': None}):
+            loop = self._new_loop()
+        self.assertIsInstance(loop, asyncio.BaseEventLoop)
+
+    @unittest.skipIf(uvloop is None, 'uvloop is not installed')
+    def test_enabled(self):
+        with mock.patch.object(settings, 'USE_UVLOOP', True):
+            loop = self._new_loop()
+        self.assertIsInstance(loop, uvloop.Loop)
+
+    @unittest.skipIf(uvloop is None, 'uvloop is not installed')
+    def test_run(self):
+        async def loop_type():
+            return type(asyncio.get_running_loop())
+
+        self.addCleanup(asyncio.set_event_loop_policy, None)
+        with mock.patch.object(settings, 'USE_UVLOOP', True):
+            self.assertIs(evloop.run(loop_type()), uvloop.Loop)
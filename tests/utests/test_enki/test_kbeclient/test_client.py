@@ -1,9 +1,11 @@
 """Tests of the module client.client ."""
 
 import unittest
+from unittest.mock import MagicMock
 
 from enki.core import enkitype
 from enki.core import msgspec
+from enki.core.message import Message, MessageSerializer
 from enki.net.client import MsgTCPClient
 
 
@@ -28,3 +30,20 @@ class OnReceiveDataTestCase(unittest.TestCase):
         # 511_512_511_504_511_506_511_507_511_511
         data = b'\xff\x01\x0e\x00\x9b\x08\x00\x00\x00\x04\x02\x00\x00\x00\x00\x00\x00\x00\x00\x02\x9b\x08\x00\x00\xff\x01 \x00\x9c\x08\x00\x00\x00\x08\x07\x00\x00\x00\x9c\x08\x00\x00\x03\x00\x00\x00\x00\t\x07\x00\x00\x00\x9c\x08\x00\x00\x03\x00\x00\x00\xf8\x01\x13\x00\x00\x00\x07\x00Wu\xffb\x9c\x08\x00\x00Avatar\x00\xff\x01\xb1\x00\x9c\x08\x00\x00\x00\x03\x01\x00\x00\x00\x00\x01\x81\xe5@D\x83\x00SC3#BD\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x04d\x00\x00\x00\x00\x05\x00\x00\x00\x00\x00\x06d\x00\x00\x00\x00\x07\x00\x00\x00\x00\x00\x08\x07\x00\x00\x00\x9c\x08\x00\x00\x03\x00\x02\x00\x08\x04\xe9\x03\x00\x00\x08\x05\xc8\x01\x00\x00\x00\n\x07\x00\x00\x00\x9c\x08\x00\x00\x04\x00\x02\x00\n\x04\xe9\x03\x00\x00\n\x05x\x03\x00\x00\x00\x0b\x00\x00\x00\x00\x00\x0c\x01\x00\x00\r\x81J]\x05\x00\x0e\x01\x00\x0f<\x00\x10\x07\x00\x00\x00Damkina\x00\x11\x00\x00\x00\x12\x01\x00\x00\x00\x00\x13\x00\x00\x14\x00\x00\x15\x00\x00\x00\x00\x00\x16\x00\x00\x00\x00\xfa\x01\n\x00\x9c\x08\x00\x00\n\x01\t\x03\x00\x00\xff\x01 \x00\x9c\x08\x00\x00\x00\x01\x81\xe5@D\x83\x00SC3#BD\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xfb\x01\x06\x00\x9c\x08\x00\x00\x02\x00\xff\x01\n\x00\x9c\x08\x00\x00\x00\x05d\x00\x00\x00\xff\x01\n\x00\x9c\x08\x00\x00\x00\x07d\x00\x00\x00'
         self._client.on_receive_data(memoryview(data))
+
+    def test_big_message_by_chunks(self):
+        serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+        spec = msgspec.app.client.onImportClientEntityDef
+        payload = bytes(range(256)) * 4096  # 1 MB (the extended length)
+        data = serializer.serialize(Message(spec, (payload, ))) * 2 \
+            + serializer.serialize(Message(spec, (b'small', )))
+        receiver = MagicMock()
+        self._client.set_msg_receiver(receiver)
+        # The chunk boundaries are inside the header too
+        chunk_size = 65536 + 3
+        for i in range(0, len(data), chunk_size):
+            self._client.on_receive_data(memoryview(data[i:i + chunk_size]))
+
+        msgs = [c.args[0] for c in receiver.on_receive_msg.call_args_list]
+        self.assertEqual([bytes(m.get_values()[0]) for m in msgs],
+                         [payload, payload, b'small'])
@@ -0,0 +1,44 @@
+"""Тесты чтения упакованных координат (onUpdateData_*_optimized)."""
+
+import unittest
+
+from enki.core import kbetype
+from enki.app.clientapp.clienthandler import ehandler
+from enki.app.clientapp.clienthandler.ehandler import _OptimizedXYZReader
+
+
+class OptimizedXYZReaderTestCase(unittest.TestCase):
+
+    def test_read_packed_xz(self):
+        data = memoryview(b'\xff' + bytes([0x12, 0x34, 0x56]))
+        self.assertEqual(_OptimizedXYZReader.read_packed_xz(data, 1),
+                         (kbetype.Vector2(2.546875, 40.75), 4))
+        # Бит знака у каждой из половин
+        data = memoryview(bytes([0x92, 0x3c, 0x56]))
+        self.assertEqual(_OptimizedXYZReader.read_packed_xz(data),
+                         (kbetype.Vector2(-2.546875, -40.75), 3))
+
+    def test_read_packed_y(self):
+        self.assertEqual(_OptimizedXYZReader.read_packed_y(memoryview(b'\x12\x04')),
+                         (1.017578125, 2))
+        self.assertEqual(_OptimizedXYZReader.read_packed_y(memoryview(b'\x12\x84')),
+                         (-1.017578125, 2))
+
+    def test_int32_float32(self):
+        self.assertEqual(_OptimizedXYZReader.int32_to_float32(0x40000000), 2.0)
+        self.assertEqual(_OptimizedXYZReader.int32_to_float32(0xC0000000), -2.0)
+        self.assertEqual(_OptimizedXYZReader.float32_to_int32(-2.0), -0x40000000)
+
+    @unittest.skipIf(ehandler.np is None, 'NumPy is not installed')
+    def test_read_packed_xyz_batch(self):
+        items = [bytes([0x12, 0x34, 0x56, 0x12, 0x04]),
+                 bytes([0x92, 0x3c, 0x56, 0x12, 0x84]),
+                 bytes(5)]
+        data = memoryview(b'\x00\x00' + b''.join(items) + b'tail')
+        values, offset = _OptimizedXYZReader.read_packed_xyz_batch(data, 2, len(items))
+        self.assertEqual(offset, 2 + 5 * len(items))
+        self.assertEqual(values.shape, (len(items), 3))
+        for item, row in zip(items, values.tolist()):
+            xz, off = _OptimizedXYZReader.read_packed_xz(memoryview(item))
+            y, _ = _OptimizedXYZReader.read_packed_y(memoryview(item), off)
+            self.assertEqual(row, [xz.x, y, xz.y])
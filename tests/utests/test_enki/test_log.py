@@ -0,0 +1,138 @@
+"""Tests of the logging helpers."""
+
+import io
+import logging
+import threading
+import time
+import unittest
+from unittest import mock
+
+from enki.misc import log
+
+
+class _Value:
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self) -> str:
+        self.formatted += 1
+        return 'value'
+
+
+class FieldsTestCase(unittest.TestCase):
+
+    def test_format(self):
+        fields = log.Fields(msg='onUpdateData', values=lambda: [1, 2])
+        self.assertEqual(str(fields), 'msg=onUpdateData, values=[1, 2]')
+
+    def test_lazy(self):
+        values = mock.Mock(return_value=[])
+        logger = logging.getLogger('test_log.fields')
+        logger.setLevel(logging.INFO)
+        logger.debug('%s', log.Fields(values=values))
+        values.assert_not_called()
+
+
+class SampledLoggerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._logger = logging.getLogger('test_log.sampled')
+        self._logger.setLevel(logging.DEBUG)
+
+    def test_sample(self):
+        """Записывается каждая N-я запись."""
+        channel = log.SampledLogger(self._logger, 3)
+        with self.assertLogs(self._logger, logging.DEBUG) as cm:
+            for i in range(7):
+                channel.debug('record %s', i)
+        self.assertEqual([r.getMessage() for r in cm.records], ['record 2', 'record 5'])
+        # Место записи - вызывающий код
+        self.assertEqual(cm.records[0].funcName, 'test_sample')
+
+    def test_disabled(self):
+        """Выключенный канал не создаёт и не форматирует записи."""
+        value = _Value()
+        for channel in (log.SampledLogger(self._logger, 0),
+                        log.SampledLogger(logging.getLogger('test_log.info'), 1)):
+            logging.getLogger('test_log.info').setLevel(logging.INFO)
+            self.assertFalse(channel.enabled)
+            channel.debug('%s', value)
+        self.assertEqual(value.formatted, 0)
+
+    def test_msg_logger(self):
+        channel = log.msg_logger('test_log.subsystem', sample=1)
+        log.setup_levels('test_log.subsystem=INFO')
+        self.addCleanup(logging.getLogger('test_log.subsystem').setLevel, logging.NOTSET)
+        # Уровень подсистемы ограничивает и её канал сообщений
+        self.assertFalse(channel.enabled)
+        log.setup_levels(' test_log.subsystem.msg = debug, ')
+        self.addCleanup(logging.getLogger('test_log.subsystem.msg').setLevel, logging.NOTSET)
+        self.assertTrue(channel.enabled)
+
+
+class SetupLevelsTestCase(unittest.TestCase):
+
+    def test_wrong_level(self):
+        with self.assertRaises(SystemExit):
+            log.setup_levels('enki.net=LOUD')
+        with self.assertRaises(SystemExit):
+            log.setup_levels('enki.net')
+
+
+class _BlockingStream(io.StringIO):
+    """Stream of a slow consumer: writing waits for the event."""
+
+    def __init__(self):
+        super().__init__()
+        self.event = threading.Event()
+
+    def write(self, s: str) -> int:
+        self.event.wait(5)
+        return super().write(s)
+
+
+class QueueLoggingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.addCleanup(setattr, root, 'handlers', root.handlers)
+        self.addCleanup(root.setLevel, root.level)
+        self.addCleanup(log.stop_listener)
+
+    def _setup(self, stream: io.StringIO, queue_size: int):
+        with mock.patch('sys.stdout', stream):
+            log.setup_root_logger('INFO', '%(levelname)s test [%(asctime)s] - %(message)s',
+                                  queue_size=queue_size)
+
+    def test_write_by_thread(self):
+        stream = io.StringIO()
+        self._setup(stream, 10)
+        self.assertIsInstance(logging.getLogger().handlers[0], log.DroppingQueueHandler)
+        logging.getLogger('test_log.queue').info('record %s', 1)
+        log.stop_listener()
+        # Формат (например, LOG_FORMAT Supervisor) применяется потоком записи
+        self.assertRegex(stream.getvalue(), r'^INFO test \[.+\] - record 1\n$')
+
+    def test_drop_if_full(self):
+        """Медленный вывод не блокирует логирующий поток."""
+        stream = _BlockingStream()
+        self._setup(stream, 2)
+        dropped = log.dropped_records()
+        logger = logging.getLogger('test_log.queue')
+        start = time.perf_counter()
+        for i in range(10):
+            logger.info('record %s', i)
+        self.assertLess(time.perf_counter() - start, 1)
+        # Одну запись поток записи уже мог забрать из очереди
+        self.assertIn(log.dropped_records() - dropped, (7, 8))
+        stream.event.set()
+        log.stop_listener()
+        self.assertIn('record 0', stream.getvalue())
+
+    def test_sync_by_default(self):
+        stream = io.StringIO()
+        self._setup(stream, 0)
+        self.assertIsInstance(logging.getLogger().handlers[0], logging.StreamHandler)
+        logging.getLogger('test_log.queue').info('record')
+        self.assertIn('record', stream.getvalue())
@@ -0,0 +1,259 @@
+"""Tests of the message metrics and their export."""
+
+import asyncio
+import os
+import queue
+import tempfile
+import unittest
+
+import asynctest
+
+from enki.app.clientapp.layer.thlayer import ThreadedGameLayer, _put_in_game_queue
+from enki.app.supervisor.supervisorapp import Supervisor
+from enki.core import metrics, msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.kbeenum import ComponentType
+from enki.core.message import Message, MessageSerializer
+from enki.core.metrics import Histogram, MetricsRegistry
+from enki.handler.serverhandler.machinehandler import OnBroadcastInterfaceParsedData
+from enki.net.framedecoder import FrameDecoder
+from enki.net.metricsexport import MetricsExporter
+from enki.net.server import get_free_port
+
+
+class HistogramTestCase(unittest.TestCase):
+
+    def test_buckets(self):
+        """Значение попадает в корзину, граница которой не дальше 25%."""
+        for value in (0, 1, 7, 8, 9, 15, 16, 1000, 123_456, 10 ** 9, 2 ** 64 - 1):
+            upper = metrics._bucket_upper_bound(metrics._bucket_index(value))
+            self.assertGreater(upper, value)
+            self.assertLessEqual(upper, max(value * 1.25, value + 1))
+
+    def test_quantile(self):
+        hist = Histogram()
+        for value in range(1, 1001):
+            hist.record(value * 1000)
+        self.assertEqual(hist.count, 1000)
+        self.assertEqual(hist.sum_ns, 500_500_000)
+        self.assertAlmostEqual(hist.quantile(0.5), 500_000, delta=500_000 * 0.25)
+        self.assertAlmostEqual(hist.quantile(0.99), 990_000, delta=990_000 * 0.25)
+
+    def test_cumulative(self):
+        hist = Histogram()
+        for value in (100, 1500, 3000, 10 ** 9):
+            hist.record(value)
+        self.assertEqual(hist.cumulative((1024, 2048, 4096, 2 ** 40)), [1, 2, 3, 4])
+
+
+class SerializerMetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(setattr, metrics, 'registry', metrics.registry)
+        self._spec = msgspec.app.client.onUpdateBasePos
+
+    def _serializer(self, sample: int = 1) -> MessageSerializer:
+        """The serializer measuring the messages (the registry is taken at creation)."""
+        metrics.registry = MetricsRegistry(sample)
+        return MessageSerializer(msgspec.app.client.SPEC_BY_ID,
+                                 lazy_msg_ids=[msgspec.app.client.onUpdateData.id])
+
+    def test_disabled(self):
+        metrics.disable()
+        self.assertIsNone(metrics.registry)
+        serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+        data = serializer.serialize(Message(self._spec, (1.0, 2.0, 3.0)))
+        msg, _ = serializer.deserialize(memoryview(data))
+        self.assertEqual(msg.get_values(), [1.0, 2.0, 3.0])
+
+    def test_enabled(self):
+        serializer = self._serializer()
+        data = serializer.serialize(Message(self._spec, (1.0, 2.0, 3.0)))
+        msg, tail = serializer.sampled_deserialize()(memoryview(data + data))
+        item = metrics.registry.msg(self._spec.name)
+        self.assertEqual((item.sent, item.sent_bytes), (1, len(data)))
+        self.assertEqual((item.received, item.received_bytes), (1, len(data)))
+        self.assertEqual(item.decode.count, 1)
+        self.assertEqual(item.encode.count, 1)
+        self.assertEqual(len(tail), len(data))
+
+    def test_sample(self):
+        """Записывается первая и каждая N-я пачка, счётчики умножаются на N."""
+        data = MessageSerializer(msgspec.app.client.SPEC_BY_ID).serialize(
+            Message(self._spec, (1.0, 2.0, 3.0)))
+        serializer = self._serializer(sample=4)
+        for _ in range(7):
+            serializer.sampled_deserialize()(memoryview(data))
+        item = metrics.registry.msg(self._spec.name)
+        self.assertEqual((item.received, item.received_bytes), (8, 8 * len(data)))
+        self.assertEqual(item.decode.count, 2)
+        # Без выборки метрики не пишутся
+        serializer.deserialize(memoryview(data))
+        self.assertEqual(item.received, 8)
+
+    def test_frame_decoder(self):
+        """Пачка FrameDecoder - чанк потока."""
+        data = MessageSerializer(msgspec.app.client.SPEC_BY_ID).serialize(
+            Message(self._spec, (1.0, 2.0, 3.0)))
+        decoder = FrameDecoder(self._serializer(sample=4))
+        item = metrics.registry.msg(self._spec.name)
+        self.assertEqual(len(decoder.feed(data * 3 + data[:5])), 3)
+        self.assertEqual((item.received, item.decode.count), (12, 3))
+        # Следующий чанк (и сообщение из двух чанков) не в выборке
+        self.assertEqual(len(decoder.feed(data[5:] + data)), 2)
+        self.assertEqual((item.received, item.decode.count), (12, 3))
+
+    def test_no_payload(self):
+        serializer = self._serializer()
+        spec = msgspec.app.client.onAppActiveTickCB
+        data = serializer.serialize(Message(spec, ()))
+        item = metrics.registry.msg(spec.name)
+        self.assertEqual((item.sent, item.sent_bytes, item.encode.count), (1, len(data), 1))
+
+    def test_lazy_decode(self):
+        """Время декодирования LazyMessage замеряется при обращении к полям."""
+        serializer = self._serializer()
+        spec = msgspec.app.client.onUpdateData
+        data = serializer.serialize(Message(spec, (b'\x01\x00\x00\x00', )))
+        msg, _ = serializer.sampled_deserialize()(memoryview(data))
+        item = metrics.registry.msg(spec.name)
+        self.assertEqual((item.received, item.decode.count), (1, 0))
+        msg.get_values()
+        self.assertEqual(item.decode.count, 1)
+
+
+class HandlerMetricsTestCase(asynctest.TestCase):
+
+    async def test_supervisor(self):
+        self.addCleanup(setattr, metrics, 'registry', metrics.registry)
+        registry = metrics.registry = MetricsRegistry(sample=1)
+        app = Supervisor(AppAddr('127.0.0.1', get_free_port()),
+                         AppAddr('127.0.0.1', get_free_port()))
+        info = OnBroadcastInterfaceParsedData.get_empty()
+        info.componentType = ComponentType.BASEAPP.value
+        info.componentID = 1000
+        msg = Message(msgspec.app.machine.onBroadcastInterface, info.values())
+        await app.on_receive_msg(msg, asynctest.MagicMock())
+        self.assertEqual(registry.msg(msg.name).handle.count, 1)
+
+
+class GameQueueMetricsTestCase(unittest.TestCase):
+
+    def test_callbacks(self):
+        """Время в очереди, время колбэка и глубина очереди по типу колбэка."""
+        self.addCleanup(setattr, metrics, 'registry', metrics.registry)
+        registry = metrics.registry = MetricsRegistry()
+        layer = ThreadedGameLayer({}, queue.Queue())
+        for space_id in range(3):
+            layer.call_set_space_data(space_id, 'key', 'value')
+        layer.call_delete_space_data(0, 'key')
+        self.assertEqual(layer.sync_layers(0.03), 4)
+
+        item = registry.callback('on_call_set_space_data')
+        self.assertEqual((item.wait.count, item.run.count), (3, 3))
+        self.assertEqual(item.depth.sum_ns, 0 + 1 + 2)
+        self.assertEqual(registry.callback('on_call_delete_space_data').depth.sum_ns, 3)
+
+        text = registry.to_prometheus()
+        self.assertIn('enki_game_queue_wait_seconds_count{callback="on_call_set_space_data"} 3\n',
+                      text)
+        self.assertIn('enki_game_queue_depth_bucket{callback="on_call_set_space_data",le="1"} 2\n',
+                      text)
+        self.assertIn('enki_game_queue_depth_bucket{callback="on_call_set_space_data",le="3"} 3\n',
+                      text)
+
+    def test_full(self):
+        """Колбэк, не попавший в переполненную очередь, не учитывается."""
+        self.addCleanup(setattr, metrics, 'registry', metrics.registry)
+        registry = metrics.registry = MetricsRegistry()
+        game_queue = queue.Queue(maxsize=1)
+        _put_in_game_queue(game_queue, print, ())
+        with self.assertRaises(queue.Full):
+            _put_in_game_queue(game_queue, print, ())
+        self.assertEqual(game_queue.qsize(), 1)
+        self.assertEqual(registry.callback('print').depth.count, 1)
+
+    def test_disabled(self):
+        self.addCleanup(setattr, metrics, 'registry', metrics.registry)
+        metrics.disable()
+        game_queue = queue.Queue()
+        layer = ThreadedGameLayer({}, game_queue)
+        layer.call_set_space_data(1, 'key', 'value')
+        self.assertGreater(game_queue.queue[0].enqueued_ns, 0)
+        self.assertEqual(layer.sync_layers(0.03), 1)
+        self.assertEqual(layer.get_game_state().space_data[1], {'key': 'value'})
+
+
+class PrometheusTestCase(unittest.TestCase):
+
+    def _registry(self) -> MetricsRegistry:
+        registry = MetricsRegistry()
+        registry.on_decoded('Client::onUpdateBasePos', 16, 1500)
+        registry.on_handled('Client::onUpdateBasePos', 3000)
+        return registry
+
+    def test_text(self):
+        text = self._registry().to_prometheus()
+        self.assertIn('# TYPE enki_messages_received_total counter\n', text)
+        self.assertIn('enki_messages_received_total{msg="Client::onUpdateBasePos"} 1\n', text)
+        self.assertIn('enki_messages_received_bytes_total{msg="Client::onUpdateBasePos"} 16\n', text)
+        self.assertIn('enki_message_decode_seconds_bucket'
+                      '{msg="Client::onUpdateBasePos",le="2.048e-06"} 1\n', text)
+        self.assertIn('enki_message_handle_seconds_count{msg="Client::onUpdateBasePos"} 1\n', text)
+        # Пустые гистограммы не выводятся
+        self.assertNotIn('enki_message_encode_seconds_count', text)
+
+    def test_above_top_bound(self):
+        """Значения больше верхней границы входят в "+Inf" и "_count"."""
+        registry = MetricsRegistry()
+        registry.on_handled('Client::onUpdateBasePos', 1000)
+        registry.on_handled('Client::onUpdateBasePos', 100 * 10 ** 9)
+        text = registry.to_prometheus()
+        label = 'msg="Client::onUpdateBasePos"'
+        self.assertIn(f'enki_message_handle_seconds_bucket{{{label},le="68.7195"}} 1\n', text)
+        self.assertIn(f'enki_message_handle_seconds_bucket{{{label},le="+Inf"}} 2\n', text)
+        self.assertIn(f'enki_message_handle_seconds_count{{{label}}} 2\n', text)
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'enki.prom')
+            self._registry().write_prometheus(path)
+            with open(path) as f:
+                self.assertIn('enki_messages_received_total', f.read())
+            self.assertEqual(os.listdir(tmp_dir), ['enki.prom'])
+
+
+class MetricsExporterTestCase(asynctest.TestCase):
+
+    async def test_http(self):
+        registry = MetricsRegistry()
+        registry.on_encoded('Baseapp::hello', 10, 1000)
+        exporter = MetricsExporter(registry, AppAddr('127.0.0.1', 0))
+        self.assertTrue((await exporter.start()).success)
+        self.addCleanup(exporter.stop)
+        addr = exporter.http_addr
+
+        async def get(path: str) -> bytes:
+            reader, writer = await asyncio.open_connection(addr.host, addr.port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+            response = await reader.read()
+            writer.close()
+            return response
+
+        response = await get('/metrics')
+        self.assertTrue(response.startswith(b'HTTP/1.0 200 OK\r\n'))
+        self.assertIn(b'enki_messages_sent_total{msg="Baseapp::hello"} 1\n', response)
+        self.assertTrue((await get('/other')).startswith(b'HTTP/1.0 404'))
+
+    async def test_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'enki.prom')
+            registry = MetricsRegistry()
+            exporter = MetricsExporter(registry, file_path=path, file_period=0.01)
+            self.assertTrue((await exporter.start()).success)
+            await asyncio.sleep(0.05)
+            self.assertTrue(os.path.exists(path))
+            registry.on_encoded('Baseapp::hello', 10, 1000)
+            await exporter.stop()
+            with open(path) as f:
+                self.assertIn('Baseapp::hello', f.read())
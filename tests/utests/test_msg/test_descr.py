@@ -0,0 +1,35 @@
+"""Тесты спецификации сообщения (MsgDescr) и самого сообщения."""
+
+import unittest
+
+from enki.core import msgspec
+from enki.core.kbeenum import ComponentType
+from enki.core.message import Message
+
+
+class MsgDescrTestCase(unittest.TestCase):
+
+    def test_names(self):
+        spec = msgspec.app.client.onUpdateData_xyz_ypr
+        self.assertEqual(spec.short_name, 'onUpdateData_xyz_ypr')
+        self.assertEqual(spec.component_type, ComponentType.CLIENT)
+
+    def test_change_component_owner(self):
+        spec = msgspec.custom.onLookApp
+        new_spec = spec.change_component_owner(ComponentType.MACHINE)
+        self.assertEqual(new_spec.name, 'Machine::onLookApp')
+        self.assertEqual(new_spec.short_name, 'onLookApp')
+        self.assertEqual(new_spec.component_type, ComponentType.MACHINE)
+        self.assertEqual(new_spec.id, spec.id)
+        self.assertEqual(new_spec.field_types, spec.field_types)
+        self.assertIs(new_spec.field_types[0], spec.field_types[0])
+
+        new_spec = spec.change_component_owner(ComponentType.LOGGER, id=spec.id + 1)
+        self.assertEqual(new_spec.name, 'Logger::onLookApp')
+        self.assertEqual(new_spec.id, spec.id + 1)
+
+    def test_message_slots(self):
+        spec = msgspec.app.client.onUpdateBasePos
+        msg = Message(spec, (1.0, 2.0, 3.0))
+        self.assertFalse(hasattr(msg, '__dict__'))
+        self.assertEqual(msg.get_values(), [1.0, 2.0, 3.0])
@@ -0,0 +1,104 @@
+"""Тесты сериализатора сообщений (длина большого сообщения)."""
+
+import unittest
+
+from enki.core import kbetype, msgspec
+from enki.core.message import LazyMessage, Message, MessageSerializer, \
+    NETWORK_MESSAGE_MAX_SIZE
+
+
+class ExtendedLengthTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+        self._spec = msgspec.app.client.onImportClientEntityDef
+
+    def _round_trip(self, size: int):
+        payload = bytes(range(256)) * (size // 256) + b'\x01' * (size % 256)
+        data = self._serializer.serialize(Message(self._spec, (payload, )))
+        msg, tail = self._serializer.deserialize(memoryview(data + b'\x01\x02'))
+        assert msg is not None
+        self.assertEqual(bytes(msg.get_values()[0]), payload)
+        self.assertEqual(bytes(tail), b'\x01\x02')
+        return data
+
+    def test_small_message(self):
+        data = self._round_trip(NETWORK_MESSAGE_MAX_SIZE - 1)
+        length, _ = kbetype.MESSAGE_LENGTH.decode_from(data, kbetype.MESSAGE_ID.size)
+        self.assertEqual(length, NETWORK_MESSAGE_MAX_SIZE - 1)
+
+    def test_big_message(self):
+        for size in (NETWORK_MESSAGE_MAX_SIZE, 3 * 1024 * 1024):
+            data = self._round_trip(size)
+            offset = kbetype.MESSAGE_ID.size
+            mark, offset = kbetype.MESSAGE_LENGTH.decode_from(data, offset)
+            length, offset = kbetype.MESSAGE_LENGTH1.decode_from(data, offset)
+            self.assertEqual(mark, NETWORK_MESSAGE_MAX_SIZE)
+            self.assertEqual(length, size)
+            self.assertEqual(len(data), offset + size)
+
+    def test_frame_size(self):
+        data = self._serializer.serialize(Message(self._spec, (b'\x00' * 70000, )))
+        self.assertEqual(self._serializer.get_frame_size(memoryview(data)), len(data))
+        # The header is not received yet
+        for size in (1, 3, 5, 7):
+            self.assertEqual(self._serializer.get_frame_size(memoryview(data[:size])), -1)
+            msg, tail = self._serializer.deserialize(memoryview(data[:size]))
+            self.assertIsNone(msg)
+            self.assertEqual(bytes(tail), data[:size])
+        self.assertEqual(self._serializer.get_frame_size(memoryview(data[:8])), len(data))
+
+    def test_deserialize_only_data(self):
+        payload = b'\x02' * 100000
+        msg, tail = self._serializer.deserialize_only_data(payload, self._spec)
+        assert msg is not None
+        self.assertEqual(bytes(msg.get_values()[0]), payload)
+        self.assertFalse(tail)
+
+
+class LazyMessageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._fixed_spec = msgspec.app.client.onUpdateBasePos
+        self._var_spec = msgspec.app.client.onImportClientEntityDef
+        self._serializer = MessageSerializer(
+            msgspec.app.client.SPEC_BY_ID,
+            lazy_msg_ids=(self._fixed_spec.id, self._var_spec.id))
+
+    def test_decoded_on_access(self):
+        data = self._serializer.serialize(Message(self._fixed_spec, (1.0, 2.0, 3.0))) \
+            + self._serializer.serialize(Message(self._var_spec, (b'\x01' * 100, )))
+        msg, tail = self._serializer.deserialize(memoryview(data + b'\x05'))
+        assert isinstance(msg, LazyMessage)
+        self.assertFalse(msg.is_decoded)
+        self.assertEqual(msg.name, self._fixed_spec.name)
+        self.assertEqual(msg.get_values(), [1.0, 2.0, 3.0])
+        self.assertTrue(msg.is_decoded)
+
+        msg, tail = self._serializer.deserialize(tail)
+        assert isinstance(msg, LazyMessage)
+        self.assertFalse(msg.is_decoded)
+        (value, kbe_type), = msg.get_field_map()
+        self.assertEqual(bytes(value), b'\x01' * 100)
+        self.assertIs(kbe_type, self._var_spec.field_types[0])
+        self.assertEqual(bytes(tail), b'\x05')
+
+    def test_part_of_message(self):
+        for spec, fields in ((self._fixed_spec, (1.0, 2.0, 3.0)),
+                             (self._var_spec, (b'\x01' * 100, ))):
+            data = self._serializer.serialize(Message(spec, fields))
+            msg, tail = self._serializer.deserialize(memoryview(data[:-1]))
+            self.assertIsNone(msg)
+            self.assertEqual(bytes(tail), data[:-1])
+
+    def test_not_lazy(self):
+        spec = msgspec.app.client.onUpdateBasePosXZ
+        data = self._serializer.serialize(Message(spec, (1.0, 2.0)))
+        msg, _tail = self._serializer.deserialize(memoryview(data))
+        self.assertIs(type(msg), Message)
+
+    def test_serialize(self):
+        data = self._serializer.serialize(Message(self._var_spec, (b'\x02' * 10, )))
+        msg, _tail = self._serializer.deserialize(memoryview(data))
+        assert msg is not None
+        self.assertEqual(self._serializer.serialize(msg), data)
@@ -0,0 +1,41 @@
+"""Общее для тестов транспортов (loopback)."""
+
+import asyncio
+from typing import Callable, Iterable
+
+import asynctest
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.message import Message, MessageSerializer
+from enki.net.server import get_free_port
+
+
+class NetTestCase(asynctest.TestCase):
+    """Base of the loopback tests sending Client::onUpdateBasePos messages."""
+
+    def setUp(self):
+        super().setUp()
+        self._serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+        self._spec = msgspec.app.client.onUpdateBasePos
+
+    def _msg(self, value) -> Message:
+        return Message(self._spec, (float(value), 0.0, 0.0))
+
+    def _data(self, values: Iterable) -> bytes:
+        return b''.join(self._serializer.serialize(self._msg(v)) for v in values)
+
+    async def _start_server(self, server_cls, receiver, **kwargs):
+        """Start a message server of "server_cls" on a free port of localhost."""
+        server = server_cls(AppAddr('127.0.0.1', get_free_port()),
+                            msgspec.app.client.SPEC_BY_ID, receiver, **kwargs)
+        res = await server.start()
+        self.assertTrue(res.success)
+        return server
+
+    async def _wait_for(self, predicate: Callable[[], bool]):
+        for _ in range(500):
+            if predicate():
+                return
+            await asyncio.sleep(0.01)
+        self.fail('Timeout')
@@ -0,0 +1,122 @@
+"""Tests of the receive path via asyncio.BufferedProtocol (loopback)."""
+
+import asyncio
+import unittest
+
+import asynctest
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.message import Message, MessageSerializer
+from enki.net.client import MsgTCPClient
+from enki.net.framedecoder import ReceiveBuffer
+from enki.net.inet import IClientMsgReceiver, IServerMsgReceiver
+from enki.net.server import TCPServer, get_free_port
+
+
+def _get_msgs() -> list:
+    spec = msgspec.app.client
+    return [Message(spec.onImportClientEntityDef, (bytes([i % 256]) * (i * 997 % 100000), ))
+            for i in range(60)] \
+        + [Message(spec.onUpdateBasePos, (float(i), 2.0, 3.0)) for i in range(100)]
+
+
+def _values(msg: Message) -> list:
+    return [bytes(v) if isinstance(v, memoryview) else v for v in msg.get_values()]
+
+
+class ReceiveBufferTestCase(unittest.TestCase):
+
+    def test_release(self):
+        buffer = ReceiveBuffer(16)
+        initial = buffer.buffer
+        view = buffer.view(4)
+        self.assertEqual(len(view), 4)
+        del view
+        buffer.release()
+        self.assertIs(buffer.buffer, initial)
+        self.assertEqual(len(buffer.buffer), 16)
+
+        kept = buffer.view(4)[1:3]
+        buffer.release()
+        self.assertIsNot(buffer.buffer, initial)
+        self.assertEqual(buffer.reallocations, 1)
+        self.assertIs(kept.obj, initial)
+
+
+class _ClientReceiver(IClientMsgReceiver):
+
+    def __init__(self, count: int):
+        self.msgs: list = []
+        self._count = count
+        self.done = asyncio.get_running_loop().create_future()
+
+    def on_receive_msg(self, msg: Message) -> bool:
+        self.msgs.append(msg)
+        if len(self.msgs) == self._count:
+            self.done.set_result(None)
+        return True
+
+    def on_end_receive_msg(self):
+        pass
+
+
+class _ServerReceiver(IServerMsgReceiver):
+
+    def __init__(self, count: int):
+        self.msgs: list = []
+        self._count = count
+        self.done = asyncio.get_running_loop().create_future()
+
+    async def on_receive_msg(self, msg: Message, channel) -> bool:
+        self.msgs.append(msg)
+        if len(self.msgs) == self._count:
+            self.done.set_result(None)
+        return True
+
+
+class BufferedProtocolTestCase(asynctest.TestCase):
+
+    def setUp(self):
+        self._serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+        self._msgs = _get_msgs()
+        self._data = b''.join(self._serializer.serialize(m) for m in self._msgs)
+
+    async def test_client(self):
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            writer.write(self._data)
+            await writer.drain()
+            await reader.read()
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        client = MsgTCPClient(AppAddr('127.0.0.1', port), msgspec.app.client.SPEC_BY_ID,
+                              buffered_protocol=True)
+        receiver = _ClientReceiver(len(self._msgs))
+        client.set_msg_receiver(receiver)
+        res = await client.start()
+        self.assertTrue(res.success, res.text)
+        await asyncio.wait_for(receiver.done, 10)
+        client.stop()
+        server.close()
+        await server.wait_closed()
+        # The kept messages refer to the data, it's not overwritten
+        self.assertEqual([_values(m) for m in receiver.msgs],
+                         [list(m.get_values()) for m in self._msgs])
+
+    async def test_server(self):
+        receiver = _ServerReceiver(len(self._msgs))
+        server = TCPServer(AppAddr('127.0.0.1', get_free_port()),
+                           msgspec.app.client.SPEC_BY_ID, receiver, buffered_protocol=True)
+        res = await server.start()
+        self.assertTrue(res.success, res.text)
+        _reader, writer = await asyncio.open_connection('127.0.0.1', server.addr.port)
+        for i in range(0, len(self._data), 5000):
+            writer.write(self._data[i:i + 5000])
+            await writer.drain()
+        await asyncio.wait_for(receiver.done, 10)
+        writer.close()
+        await server.stop()
+        self.assertEqual([_values(m) for m in receiver.msgs],
+                         [list(m.get_values()) for m in self._msgs])
@@ -0,0 +1,79 @@
+"""Tests of the corked mode of MsgTCPClient (loopback)."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.net.client import MsgTCPClient
+
+from . import NetTestCase
+
+
+class CorkedClientTestCase(NetTestCase):
+
+    async def setUp(self):
+        super().setUp()
+        self._received = bytearray()
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            while data := await reader.read(65536):
+                self._received.extend(data)
+            writer.close()
+
+        self._server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self._addr = AppAddr('127.0.0.1', self._server.sockets[0].getsockname()[1])
+
+    async def tearDown(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _start(self, **kwargs) -> MsgTCPClient:
+        client = MsgTCPClient(self._addr, msgspec.app.client.SPEC_BY_ID, corked=True, **kwargs)
+        res = await client.start()
+        self.assertTrue(res.success)
+        self.addCleanup(client.stop)
+        # Считаем вызовы записи в транспорт
+        client._transport.write = MagicMock(wraps=client._transport.write)
+        return client
+
+    async def test_one_write_per_iteration(self):
+        client = await self._start()
+        values = range(10)
+        for value in values:
+            self.assertTrue(await client.send_msg(self._msg(value)))
+        self.assertEqual(client._transport.write.call_count, 0)
+
+        await asyncio.sleep(0)
+        self.assertEqual(client._transport.write.call_count, 1)
+        await self._wait_for(lambda: bytes(self._received) == self._data(values))
+
+    async def test_size_cap(self):
+        msg_size = len(self._data([0]))
+        client = await self._start(cork_size=msg_size * 3)
+        values = range(7)
+        for value in values:
+            await client.send_msg(self._msg(value))
+        # Две записи по достижении размера, остаток ждёт конца итерации
+        self.assertEqual(client._transport.write.call_count, 2)
+        await asyncio.sleep(0)
+        self.assertEqual(client._transport.write.call_count, 3)
+        await self._wait_for(lambda: bytes(self._received) == self._data(values))
+
+    async def test_delay(self):
+        client = await self._start(cork_delay=0.05)
+        values = range(3)
+        for value in values:
+            await client.send_msg(self._msg(value))
+            await asyncio.sleep(0)
+        self.assertEqual(client._transport.write.call_count, 0)
+        await self._wait_for(lambda: bytes(self._received) == self._data(values))
+        self.assertEqual(client._transport.write.call_count, 1)
+
+    async def test_stop_flushes(self):
+        client = await self._start(cork_delay=10)
+        values = range(2)
+        for value in values:
+            await client.send_msg(self._msg(value))
+        client.stop()
+        await self._wait_for(lambda: bytes(self._received) == self._data(values))
@@ -0,0 +1,156 @@
+"""Tests of the flow control of TCPClient (the overflow policies)."""
+
+import asyncio
+import socket
+from unittest.mock import MagicMock
+
+import asynctest
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.message import Message, MessageSerializer
+from enki.net.client import MsgTCPClient, OverflowPolicy
+
+
+class FlowControlTestCase(asynctest.TestCase):
+
+    def setUp(self):
+        self._serializer = MessageSerializer(msgspec.app.baseapp.SPEC_BY_ID)
+
+    def _client(self, policy: OverflowPolicy, **kwargs) -> MsgTCPClient:
+        client = MsgTCPClient(AppAddr('127.0.0.1', 0), msgspec.app.baseapp.SPEC_BY_ID,
+                              overflow_policy=policy, **kwargs)
+        # Транспорт без сокета, отправка останавливается вызовом on_pause_writing
+        transport = MagicMock()
+        transport.get_write_buffer_size.return_value = 0
+        transport.is_closing.return_value = False
+        client._transport = transport
+        return client
+
+    def _written(self, transport) -> list:
+        return [bytes(c.args[0]) for c in transport.write.call_args_list]
+
+    def _update(self, x: float) -> Message:
+        return Message(msgspec.app.baseapp.onUpdateDataFromClient,
+                       (x, 0.0, 0.0, 0.0, 0.0, 0.0, True, 1))
+
+    def _controlled_update(self, entity_id: int, x: float) -> Message:
+        return Message(msgspec.app.baseapp.onUpdateDataFromClientForControlledEntity,
+                       (entity_id, x, 0.0, 0.0, 0.0, 0.0, 0.0, True, 1))
+
+    async def test_block(self):
+        client = self._client(OverflowPolicy.BLOCK)
+        transport = client._transport
+        client.on_pause_writing()
+        self.assertTrue(client.is_paused)
+
+        task = asyncio.create_task(client.send(b'data'))
+        await asyncio.sleep(0.01)
+        self.assertFalse(task.done())
+        transport.write.assert_not_called()
+
+        client.on_resume_writing()
+        self.assertTrue(await task)
+        self.assertEqual(self._written(transport), [b'data'])
+        stats = client.write_stats
+        self.assertEqual(stats.pauses, 1)
+        self.assertGreater(stats.paused_seconds, 0)
+
+    async def test_block_connection_lost(self):
+        client = self._client(OverflowPolicy.BLOCK)
+        client.on_pause_writing()
+        task = asyncio.create_task(client.send(b'data'))
+        await asyncio.sleep(0)
+        client.stop()
+        self.assertFalse(await task)
+
+    async def test_drop_oldest_superseded(self):
+        client = self._client(OverflowPolicy.DROP_OLDEST)
+        transport = client._transport
+        client.on_pause_writing()
+
+        msgs = [self._update(1.0), self._controlled_update(1, 1.0),
+                self._controlled_update(2, 1.0), Message(msgspec.app.baseapp.hello, ('2.5.10', '0.1.0', b'')),
+                self._update(2.0), self._controlled_update(1, 2.0)]
+        for msg in msgs:
+            self.assertTrue(await client.send_msg(msg))
+        transport.write.assert_not_called()
+        self.assertEqual(client.write_stats.dropped, 2)
+
+        client.on_resume_writing()
+        expected = [msgs[i] for i in (2, 3, 4, 5)]
+        self.assertEqual(self._written(transport),
+                         [self._serializer.serialize(msg) for msg in expected])
+        self.assertEqual(client.write_stats.pending_bytes, 0)
+
+    async def test_drop_oldest_overflow(self):
+        client = self._client(OverflowPolicy.DROP_OLDEST, write_high_water=10)
+        transport = client._transport
+        client.on_pause_writing()
+        for data in (b'1' * 4, b'2' * 4, b'3' * 4):
+            await client.send(data)
+        stats = client.write_stats
+        self.assertEqual((stats.dropped, stats.dropped_bytes, stats.pending_bytes), (1, 4, 8))
+
+        client.on_resume_writing()
+        self.assertEqual(self._written(transport), [b'2' * 4, b'3' * 4])
+
+    async def test_disconnect(self):
+        client = self._client(OverflowPolicy.DISCONNECT)
+        transport = client._transport
+        client.on_pause_writing()
+        transport.close.assert_called_once()
+        self.assertFalse(client.is_alive)
+        self.assertFalse(await client.send(b'data'))
+
+
+class StalledServerTestCase(asynctest.TestCase):
+
+    async def setUp(self):
+        # Сервер не читает данные (и не принимает соединение), пока его не попросят
+        self._listener = socket.socket()
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 64 * 1024)
+        self._listener.bind(('127.0.0.1', 0))
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._addr = AppAddr('127.0.0.1', self._listener.getsockname()[1])
+
+    def tearDown(self):
+        self._listener.close()
+
+    async def _read_all(self, size: int):
+        loop = asyncio.get_running_loop()
+        conn, _ = await loop.sock_accept(self._listener)
+        with conn:
+            received = 0
+            while received < size:
+                data = await loop.sock_recv(conn, 1024 * 1024)
+                self.assertTrue(data)
+                received += len(data)
+        self.assertEqual(received, size)
+
+    async def test_block(self):
+        client = MsgTCPClient(self._addr, msgspec.app.baseapp.SPEC_BY_ID,
+                              overflow_policy=OverflowPolicy.BLOCK,
+                              write_high_water=64 * 1024, write_low_water=16 * 1024)
+        self.assertTrue((await client.start()).success)
+        self.addCleanup(client.stop)
+        sock = client._transport.get_extra_info('socket')
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 64 * 1024)
+
+        chunk = b'\x00' * 64 * 1024
+        sent = 0
+        while not client.is_paused:
+            self.assertLess(sent, 1024, 'The writing is not paused')
+            self.assertTrue(await client.send(chunk))
+            sent += 1
+        # Память клиента ограничена верхней границей
+        self.assertLessEqual(client.write_stats.buffered_bytes, 2 * len(chunk))
+
+        task = asyncio.create_task(client.send(chunk))
+        await asyncio.sleep(0.05)
+        self.assertFalse(task.done())
+
+        await asyncio.wait_for(asyncio.gather(self._read_all((sent + 1) * len(chunk)), task), 5)
+        self.assertTrue(task.result())
+        self.assertGreaterEqual(client.write_stats.pauses, 1)
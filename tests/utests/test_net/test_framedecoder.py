@@ -0,0 +1,73 @@
+"""Tests of the incremental frame decoder."""
+
+import random
+import unittest
+
+from enki.core import msgspec
+from enki.core.message import Message, MessageSerializer
+from enki.net.framedecoder import FrameDecoder
+
+
+class FrameDecoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+        spec = msgspec.app.client
+        self._msgs = [
+            Message(spec.onUpdateBasePos, (1.0, 2.0, 3.0)),
+            Message(spec.onImportClientEntityDef, (b'small', )),
+            Message(spec.onAppActiveTickCB, ()),
+            Message(spec.onImportClientEntityDef, (bytes(range(256)) * 300, )),
+            Message(spec.onUpdateBasePosXZ, (4.0, 5.0)),
+            Message(spec.onImportClientEntityDef, (b'\x07' * 70000, )),
+            Message(spec.onAppActiveTickCB, ()),
+        ]
+        self._data = b''.join(self._serializer.serialize(m) for m in self._msgs)
+
+    def _feed(self, decoder: FrameDecoder, chunk_sizes) -> list:
+        result, offset = [], 0
+        for size in chunk_sizes:
+            if offset >= len(self._data):
+                break
+            result.extend(decoder.feed(self._data[offset:offset + size]))
+            offset += size
+        result.extend(decoder.feed(self._data[offset:]))
+        return result
+
+    def _assert_msgs(self, msgs: list):
+        self.assertEqual([m.name for m in msgs], [m.name for m in self._msgs])
+        for msg, expected in zip(msgs, self._msgs):
+            values = [bytes(v) if isinstance(v, memoryview) else v
+                      for v in msg.get_values()]
+            self.assertEqual(values, list(expected.get_values()), msg.name)
+
+    def test_whole_data(self):
+        decoder = FrameDecoder(self._serializer)
+        self._assert_msgs(decoder.feed(self._data))
+        self.assertEqual(decoder.buffered, 0)
+
+    def test_fixed_chunks(self):
+        for chunk_size in (1, 2, 3, 7, 100, 4096, 65536 + 3):
+            with self.subTest(chunk_size=chunk_size):
+                decoder = FrameDecoder(self._serializer, capacity=64)
+                chunk_count = len(self._data) // chunk_size + 1
+                self._assert_msgs(self._feed(decoder, [chunk_size] * chunk_count))
+                self.assertEqual(decoder.buffered, 0)
+
+    def test_random_chunks(self):
+        rnd = random.Random(0)
+        for _ in range(20):
+            decoder = FrameDecoder(self._serializer, capacity=rnd.choice((16, 1024)))
+            sizes = [rnd.choice((1, 2, 5, rnd.randint(1, 20000))) for _ in range(2000)]
+            self._assert_msgs(self._feed(decoder, sizes))
+
+    def test_part_of_message(self):
+        decoder = FrameDecoder(self._serializer)
+        data = self._serializer.serialize(self._msgs[3])
+        self.assertEqual(decoder.feed(data[:5]), [])
+        self.assertEqual(decoder.feed(data[5:-1]), [])
+        self.assertEqual(decoder.buffered, len(data) - 1)
+        decoder.clear()
+        self.assertEqual(decoder.buffered, 0)
+        msgs = decoder.feed(data)
+        self.assertEqual(len(msgs), 1)
@@ -0,0 +1,99 @@
+"""Tests of the socket options of the transports."""
+
+import socket
+
+import asynctest
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.net import sockopt, udppool
+from enki.net.client import TCPClient
+from enki.net.server import TCPServer, UDPServer, get_free_port
+from enki.net.sockopt import SocketOptions
+
+_OPTIONS = SocketOptions(nodelay=False, rcvbuf=32 * 1024, sndbuf=32 * 1024,
+                         keepalive=True, keepidle=30, keepintvl=5, keepcnt=3)
+
+
+def _getsockopt(sock, level: int, name: str) -> int:
+    return sock.getsockopt(level, getattr(socket, name))
+
+
+class SocketOptionsTestCase(asynctest.TestCase):
+
+    def test_apply_tcp(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.addCleanup(sock.close)
+        _OPTIONS.apply(sock)
+        self.assertEqual(_getsockopt(sock, socket.IPPROTO_TCP, 'TCP_NODELAY'), 0)
+        self.assertEqual(_getsockopt(sock, socket.SOL_SOCKET, 'SO_KEEPALIVE'), 1)
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            self.assertEqual(_getsockopt(sock, socket.IPPROTO_TCP, 'TCP_KEEPIDLE'), 30)
+        self.assertEqual(_getsockopt(sock, socket.IPPROTO_TCP, 'TCP_KEEPINTVL'), 5)
+        self.assertEqual(_getsockopt(sock, socket.IPPROTO_TCP, 'TCP_KEEPCNT'), 3)
+        # Linux удваивает заданный размер буфера
+        self.assertGreaterEqual(_getsockopt(sock, socket.SOL_SOCKET, 'SO_RCVBUF'), 32 * 1024)
+        self.assertGreaterEqual(_getsockopt(sock, socket.SOL_SOCKET, 'SO_SNDBUF'), 32 * 1024)
+
+    def test_apply_udp(self):
+        """Параметры TCP у UDP сокета пропускаются."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(sock.close)
+        _OPTIONS.apply(sock)
+        self.assertEqual(_getsockopt(sock, socket.SOL_SOCKET, 'SO_KEEPALIVE'), 0)
+        self.assertGreaterEqual(_getsockopt(sock, socket.SOL_SOCKET, 'SO_RCVBUF'), 32 * 1024)
+
+    def test_options_from_settings(self):
+        with asynctest.patch('enki.settings.TCP_NODELAY', False), \
+                asynctest.patch('enki.settings.UDP_RCVBUF', 4 * 1024 * 1024):
+            self.assertFalse(sockopt.tcp_options().nodelay)
+            self.assertTrue(sockopt.tcp_options(reuse_port=True).reuse_port)
+            self.assertEqual(sockopt.udp_options().rcvbuf, 4 * 1024 * 1024)
+
+    async def test_tcp_transports(self):
+        server = TCPServer(AppAddr('127.0.0.1', get_free_port()),
+                           msgspec.app.client.SPEC_BY_ID, asynctest.MagicMock(),
+                           socket_options=_OPTIONS)
+        self.assertTrue((await server.start()).success)
+        self.addCleanup(server.stop)
+        listening = server._server.sockets[0]
+        self.assertEqual(_getsockopt(listening, socket.SOL_SOCKET, 'SO_KEEPALIVE'), 1)
+
+        client = TCPClient(server.addr, socket_options=_OPTIONS)
+        self.assertTrue((await client.start()).success)
+        self.addCleanup(client.stop)
+        sock = client._transport.get_extra_info('socket')
+        # asyncio включает TCP_NODELAY, параметры его выключают
+        self.assertEqual(_getsockopt(sock, socket.IPPROTO_TCP, 'TCP_NODELAY'), 0)
+        self.assertEqual(_getsockopt(sock, socket.IPPROTO_TCP, 'TCP_KEEPCNT'), 3)
+
+    async def test_udp_server(self):
+        server = UDPServer(AppAddr('127.0.0.1', get_free_port()),
+                           socket_options=SocketOptions(rcvbuf=1024 * 1024))
+        self.assertTrue((await server.start()).success)
+        self.addCleanup(server.stop)
+        sock = server._transport.get_extra_info('socket')
+        self.assertGreaterEqual(_getsockopt(sock, socket.SOL_SOCKET, 'SO_RCVBUF'),
+                                min(1024 * 1024, _rmem_max()))
+
+    async def test_udp_pool(self):
+        pool = udppool.UDPEndpointPool()
+        self.addCleanup(pool.close)
+        addr = AppAddr('127.0.0.1', get_free_port())
+        options = SocketOptions(sndbuf=16 * 1024)
+        self.assertTrue(await pool.sendto(b'data', addr))
+        self.assertTrue(await pool.sendto(b'data', addr, socket_options=options))
+        # Сокеты с разными параметрами не смешиваются
+        self.assertEqual(len(pool), 2)
+        endpoint = pool._endpoints[(addr.to_tuple(), False, options)]
+        sock = endpoint._transport.get_extra_info('socket')
+        self.assertGreaterEqual(_getsockopt(sock, socket.SOL_SOCKET, 'SO_SNDBUF'), 16 * 1024)
+
+
+def _rmem_max() -> int:
+    """Больше этого размера буфер приёма не задать без CAP_NET_ADMIN."""
+    try:
+        with open('/proc/sys/net/core/rmem_max') as f:
+            return int(f.read()) * 2
+    except OSError:
+        return 0
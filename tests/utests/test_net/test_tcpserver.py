@@ -0,0 +1,106 @@
+"""Tests of handling of the messages of a TCPServer connection (loopback)."""
+
+import asyncio
+
+from enki.core.message import Message
+from enki.net.inet import IServerMsgReceiver
+from enki.net.server import TCPServer
+
+from . import NetTestCase
+
+
+class _Receiver(IServerMsgReceiver):
+
+    def __init__(self):
+        self.values: list = []
+        self.running = 0
+        self.max_running = 0
+        self.release = asyncio.Event()
+        self.release.set()
+        self.received = asyncio.Event()
+
+    async def on_receive_msg(self, msg: Message, channel) -> bool:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await self.release.wait()
+            value = msg.get_values()[0]
+            if value < 0:
+                raise ValueError('Invalid value')
+            self.values.append(value)
+            self.received.set()
+        finally:
+            self.running -= 1
+        return True
+
+
+class TCPServerTestCase(NetTestCase):
+
+    async def _start(self, receiver, **kwargs) -> TCPServer:
+        return await self._start_server(TCPServer, receiver, **kwargs)
+
+    async def test_all_messages_of_chunk(self):
+        for buffered in (False, True):
+            with self.subTest(buffered=buffered):
+                receiver = _Receiver()
+                server = await self._start(receiver, buffered_protocol=buffered)
+                _reader, writer = await asyncio.open_connection('127.0.0.1', server.addr.port)
+                # The peer sends the messages by one write and waits
+                writer.write(self._data(range(3)))
+                await self._wait_for(lambda: len(receiver.values) == 3)
+                self.assertEqual(receiver.values, [0.0, 1.0, 2.0])
+                stats, = server.connection_stats
+                self.assertEqual(stats.received_msgs, 3)
+                self.assertEqual(stats.handled_msgs, 3)
+                self.assertEqual(stats.received_bytes, len(self._data(range(3))))
+                writer.close()
+                await self._wait_for(lambda: not server.connection_stats)
+                await server.stop()
+
+    async def test_backpressure(self):
+        for buffered in (False, True):
+            with self.subTest(buffered=buffered):
+                receiver = _Receiver()
+                receiver.release.clear()
+                server = await self._start(receiver, buffered_protocol=buffered,
+                                           queue_size=2)
+                _reader, writer = await asyncio.open_connection('127.0.0.1', server.addr.port)
+                writer.write(self._data(range(10)))
+                await self._wait_for(lambda: server.connection_stats
+                                     and server.connection_stats[0].backpressure_waits)
+                stats, = server.connection_stats
+                self.assertEqual(stats.queued_msgs, 2)
+                self.assertEqual(stats.handled_msgs, 0)
+                receiver.release.set()
+                await self._wait_for(lambda: len(receiver.values) == 10)
+                self.assertEqual(receiver.values, [float(v) for v in range(10)])
+                self.assertEqual(stats.max_queued_msgs, 2)
+                self.assertEqual(stats.queued_msgs, 0)
+                writer.close()
+                await server.stop()
+
+    async def test_concurrency(self):
+        receiver = _Receiver()
+        receiver.release.clear()
+        server = await self._start(receiver, concurrency=3)
+        _reader, writer = await asyncio.open_connection('127.0.0.1', server.addr.port)
+        writer.write(self._data(range(6)))
+        await self._wait_for(lambda: receiver.running == 3)
+        receiver.release.set()
+        await self._wait_for(lambda: len(receiver.values) == 6)
+        self.assertEqual(receiver.max_running, 3)
+        self.assertEqual(sorted(receiver.values), [float(v) for v in range(6)])
+        writer.close()
+        await server.stop()
+
+    async def test_failed_message(self):
+        receiver = _Receiver()
+        server = await self._start(receiver)
+        _reader, writer = await asyncio.open_connection('127.0.0.1', server.addr.port)
+        writer.write(self._data([1, -1, 2]))
+        await self._wait_for(lambda: len(receiver.values) == 2)
+        stats, = server.connection_stats
+        self.assertEqual(stats.failed_msgs, 1)
+        self.assertEqual(stats.handled_msgs, 2)
+        writer.close()
+        await server.stop()
@@ -0,0 +1,103 @@
+"""Tests of the pool of UDP endpoints (loopback)."""
+
+import asyncio
+
+from enki.core.enkitype import AppAddr
+from enki.net import udppool
+from enki.net.channel import UDPChannel
+from enki.net.inet import ChannelType, ConnectionInfo
+from enki.net.server import UDPServer, get_free_port
+
+from . import NetTestCase
+
+
+class _Server(UDPServer):
+
+    def __init__(self, addr: AppAddr):
+        super().__init__(addr)
+        self.received: list = []
+
+    async def on_receive_data(self, data: memoryview, addr: AppAddr):
+        self.received.append((data.tobytes(), addr))
+
+
+class UDPEndpointPoolTestCase(NetTestCase):
+
+    async def setUp(self):
+        super().setUp()
+        self._server = _Server(AppAddr('127.0.0.1', get_free_port()))
+        res = await self._server.start()
+        self.assertTrue(res.success)
+
+    def tearDown(self):
+        self._server.stop()
+
+    async def test_reuse(self):
+        pool = udppool.UDPEndpointPool()
+        self.addCleanup(pool.close)
+        for i in range(3):
+            self.assertTrue(await pool.sendto(bytes([i]), self._server.addr))
+        await self._wait_for(lambda: len(self._server.received) == 3)
+
+        self.assertEqual(sorted(d for d, _ in self._server.received), [b'\x00', b'\x01', b'\x02'])
+        # Все датаграммы отправлены с одного сокета
+        self.assertEqual(len({a.to_tuple() for _, a in self._server.received}), 1)
+        self.assertEqual(pool.stats.created, 1)
+        self.assertEqual(len(pool), 1)
+
+    async def test_batch(self):
+        pool = udppool.UDPEndpointPool()
+        self.addCleanup(pool.close)
+        await pool.sendto(b'\x00', self._server.addr)
+        results = await asyncio.gather(*[pool.sendto(bytes([i]), self._server.addr)
+                                         for i in range(1, 10)])
+        self.assertTrue(all(results))
+        await self._wait_for(lambda: len(self._server.received) == 10)
+        self.assertEqual(pool.stats.sent, 10)
+        self.assertEqual(pool.stats.batches, 2)
+
+    async def test_concurrent_create(self):
+        pool = udppool.UDPEndpointPool()
+        self.addCleanup(pool.close)
+        await asyncio.gather(*[pool.sendto(b'\x00', self._server.addr) for _ in range(5)])
+        self.assertEqual(pool.stats.created, 1)
+
+    async def test_ttl(self):
+        pool = udppool.UDPEndpointPool(ttl=0.05)
+        self.addCleanup(pool.close)
+        await pool.sendto(b'\x00', self._server.addr)
+        await self._wait_for(lambda: pool.stats.expired == 1)
+        self.assertEqual(len(pool), 0)
+
+        await pool.sendto(b'\x01', self._server.addr)
+        self.assertEqual(pool.stats.created, 2)
+        await self._wait_for(lambda: len(self._server.received) == 2)
+
+    async def test_process_pool(self):
+        pool = udppool.get_pool()
+        self.assertIs(udppool.get_pool(), pool)
+        self.addCleanup(pool.close)
+        channel = UDPChannel(ConnectionInfo(self._server.addr, self._server.addr))
+        for _ in range(2):
+            self.assertTrue(await channel.send_msg_content(
+                b'\x00', self._server.addr, ChannelType.UDP))
+        await self._wait_for(lambda: len(self._server.received) == 2)
+        self.assertEqual(pool.stats.created, 1)
+
+    async def test_other_loop(self):
+        """Сокеты пула закрытого цикла закрываются при смене цикла."""
+        async def send():
+            self.assertTrue(await udppool.sendto(b'\x00', self._server.addr))
+            return udppool.get_pool()
+
+        # asyncio.run в другом потоке создаёт и закрывает свой цикл
+        old_pool = await self.loop.run_in_executor(None, asyncio.run, send())
+        await self._wait_for(lambda: len(self._server.received) == 1)
+        sockets = [e._sock for e in old_pool._endpoints.values()]
+        self.assertEqual(len(sockets), 1)
+
+        pool = udppool.get_pool()
+        self.addCleanup(pool.close)
+        self.assertIsNot(pool, old_pool)
+        self.assertEqual(len(old_pool), 0)
+        self.assertEqual(sockets[0].fileno(), -1)
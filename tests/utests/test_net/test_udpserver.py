@@ -0,0 +1,95 @@
+"""Tests of handling of the datagrams of UDPMsgServer by the queue (loopback)."""
+
+import asyncio
+import socket
+
+from enki.core.message import Message
+from enki.net.inet import IServerMsgReceiver
+from enki.net.server import UDPMsgServer
+
+from . import NetTestCase
+
+
+class _Receiver(IServerMsgReceiver):
+
+    def __init__(self):
+        self.values: list = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def on_receive_msg(self, msg: Message, channel) -> bool:
+        await self.release.wait()
+        value = msg.get_values()[0]
+        if value < 0:
+            raise ValueError('Invalid value')
+        self.values.append((channel.connection_info.src_addr.port, value))
+        return True
+
+
+class UDPMsgServerTestCase(NetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._sockets: list[socket.socket] = []
+
+    def tearDown(self):
+        for sock in self._sockets:
+            sock.close()
+
+    async def _start(self, receiver, **kwargs) -> UDPMsgServer:
+        server = await self._start_server(UDPMsgServer, receiver, **kwargs)
+        self.addCleanup(server.stop)
+        return server
+
+    def _send(self, server: UDPMsgServer, values) -> int:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        self._sockets.append(sock)
+        for value in values:
+            sock.sendto(self._data([value]), ('127.0.0.1', server.addr.port))
+        return sock.getsockname()[1]
+
+    async def test_order_by_source(self):
+        receiver = _Receiver()
+        server = await self._start(receiver, workers=2, batch_size=4)
+        ports = [self._send(server, range(50)) for _ in range(3)]
+        await self._wait_for(lambda: server.stats.handled == 150)
+
+        for port in ports:
+            values = [v for p, v in receiver.values if p == port]
+            self.assertEqual(values, [float(v) for v in range(50)])
+        self.assertEqual(server.stats.dropped, 0)
+        self.assertEqual(server.stats.queued, 0)
+        self.assertGreater(server.stats.max_queued, 0)
+
+    async def test_overflow(self):
+        receiver = _Receiver()
+        receiver.release.clear()
+        server = await self._start(receiver, workers=1, queue_size=4)
+        self._send(server, range(20))
+        await self._wait_for(lambda: server.stats.received == 20)
+
+        self.assertGreater(server.stats.dropped, 0)
+        self.assertEqual(server.stats.overflows, 1)
+        receiver.release.set()
+        await self._wait_for(lambda: server.stats.handled + server.stats.dropped == 20)
+        self.assertEqual(len(receiver.values), server.stats.handled)
+        # Накопленные датаграммы обрабатываются пачкой
+        self.assertLess(server.stats.batches, server.stats.handled)
+        self.assertEqual(server.stats.queued, 0)
+
+    async def test_failed_datagram(self):
+        receiver = _Receiver()
+        server = await self._start(receiver, workers=1)
+        self._send(server, [1, -1, 2])
+        await self._wait_for(lambda: server.stats.handled == 2)
+
+        self.assertEqual([v for _, v in receiver.values], [1.0, 2.0])
+        self.assertEqual(server.stats.failed, 1)
+
+    async def test_task_per_datagram(self):
+        receiver = _Receiver()
+        server = await self._start(receiver, dispatch_queue=False)
+        self._send(server, [1, 2])
+        await self._wait_for(lambda: len(receiver.values) == 2)
+        self.assertIsNone(server.stats)
@@ -1,10 +1,19 @@
 """Тесты сообщений компонента Supervisor."""
 
+import asyncio
+import socket
 import unittest
+from unittest.mock import MagicMock
 
+import asynctest
+
+from enki.app.supervisor.cluster import ReplicaComponentStorage, SupervisorCluster
 from enki.app.supervisor.supervisorapp import ComponentStorage, Supervisor, ComponentInfo
+from enki.command.machine import OnQueryAllInterfaceInfosCommand
+from enki.core import msgspec
 from enki.core.enkitype import AppAddr
 from enki.core.kbeenum import ComponentType
+from enki.core.message import Message, MessageSerializer
 from enki.net import server
 
 
@@ -80,3 +89,122 @@ class ComponentStorageTestCase(unittest.TestCase):
         storage.deregister_single_component(ComponentType.LOGGER)
         assert len(storage.get_component_info(ComponentType.LOGGER)) == 0
         assert storage.get_comp_info_by_comp_id(logger_info.componentID) is None
+
+
+class ReplicaComponentStorageTestCase(unittest.TestCase):
+    """Копии хранилища у процессов кластера сходятся к порядку ведущего."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self._links = [MagicMock(), MagicMock()]
+        self._storages = [
+            ReplicaComponentStorage(MagicMock(), link) for link in self._links
+        ]
+
+    def _logger_info(self, comp_id: int) -> ComponentInfo:
+        info = ComponentInfo.get_empty()
+        info.componentType = ComponentType.LOGGER.value
+        info.componentID = comp_id
+        return info
+
+    def test_concurrent_registration(self):
+        """Два процесса одновременно регистрируют Логгер с разными id."""
+        first, second = self._storages
+        first.register_component(self._logger_info(10))
+        second.register_component(self._logger_info(11))
+        # Ведущий процесс получил изменения в таком порядке и разослал всем
+        changes = [self._links[0].send.call_args[0][0], self._links[1].send.call_args[0][0]]
+        for storage in self._storages:
+            for msg in changes:
+                storage.apply(msg)
+
+        for storage in self._storages:
+            infos = storage.get_component_info(ComponentType.LOGGER)
+            assert [info.componentID for info in infos] == [11]
+            assert storage.get_comp_info_by_comp_id(10) is None
+
+    def test_deregistration(self):
+        first, second = self._storages
+        first.register_component(self._logger_info(10))
+        second.apply(self._links[0].send.call_args[0][0])
+        first.deregister_single_component(ComponentType.LOGGER)
+        change = self._links[0].send.call_args[0][0]
+        for storage in self._storages:
+            storage.apply(change)
+            assert storage.get_component_info(ComponentType.LOGGER) == []
+        # Применённое изменение не пересылается снова
+        assert self._links[1].send.call_count == 0
+
+
+class SupervisorClusterSpawnTestCase(asynctest.TestCase):
+
+    async def test_spawn_in_running_loop(self):
+        """Обработчики не создаются из работающего цикла событий."""
+        cluster = SupervisorCluster(AppAddr('127.0.0.1', server.get_free_port()),
+                                    AppAddr('127.0.0.1', server.get_free_port()), workers=1)
+        with self.assertRaises(RuntimeError):
+            cluster.spawn()
+        self.assertEqual(cluster.processes, [])
+
+
+class SupervisorClusterTestCase(asynctest.TestCase):
+    """Supervisor из двух процессов на общих портах."""
+
+    def setUp(self):
+        self._udp_addr = AppAddr('127.0.0.1', server.get_free_port())
+        self._tcp_addr = AppAddr('127.0.0.1', server.get_free_port())
+        self._cluster = SupervisorCluster(self._udp_addr, self._tcp_addr, workers=2)
+        # Синхронный setUp: цикл событий теста ещё не запущен
+        self._cluster.spawn()
+        self.addCleanup(self._cluster.stop)
+        self._run_task = self.loop.create_task(self._cluster.run())
+
+    async def _query_infos(self) -> list[ComponentInfo]:
+        for _ in range(100):
+            res = await OnQueryAllInterfaceInfosCommand(self._tcp_addr).execute()
+            if res.success:
+                return res.result.infos
+            # Обработчики ещё не запустились
+            await asyncio.sleep(0.05)
+        self.fail('The cluster is unavailable')
+
+    async def test_registration_and_stop(self):
+        await self._query_infos()
+        serializer = MessageSerializer(msgspec.app.machine.SPEC_BY_ID)
+        comp_ids = list(range(1000, 1020))
+        socks = []
+        for comp_id in comp_ids:
+            info = ComponentInfo.get_empty()
+            info.componentType = ComponentType.BASEAPP.value
+            info.componentID = comp_id
+            # С разных портов, ядро распределит датаграммы по обработчикам
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            socks.append(sock)
+            sock.sendto(serializer.serialize(
+                Message(msgspec.app.machine.onBroadcastInterface, info.values())
+            ), self._udp_addr.to_tuple())
+
+        for _ in range(100):
+            # Каждый запрос может попасть в любой обработчик
+            infos = await self._query_infos()
+            registered = {info.componentID for info in infos
+                          if info.component_type == ComponentType.BASEAPP}
+            if registered == set(comp_ids):
+                break
+            await asyncio.sleep(0.05)
+        else:
+            self.fail(f'Not all components are registered ({registered})')
+        for sock in socks:
+            sock.close()
+
+        # Остановка Supervisor через один обработчик останавливает все
+        machine_info = [info for info in infos if info.component_type == ComponentType.MACHINE][0]
+        _, writer = await asyncio.open_connection(*self._tcp_addr.to_tuple())
+        writer.write(MessageSerializer(msgspec.app.supervisor.SPEC_BY_ID).serialize(
+            Message(msgspec.app.supervisor.onStopComponent, (machine_info.componentID, ))
+        ))
+        await writer.drain()
+        success = await asyncio.wait_for(self._run_task, timeout=10)
+        writer.close()
+        assert success
+        assert all(process.exitcode == 0 for process in self._cluster.processes)
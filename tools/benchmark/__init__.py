@@ -0,0 +1,6 @@
+"""Benchmarks of the Enki hot paths.
+
+Run a benchmark from the project root, for example:
+
+    python -m tools.benchmark.msgcodec
+"""
@@ -0,0 +1,104 @@
+"""Бенчмарк приёма больших сообщений (расширенная длина) через loopback.
+
+Сервер на 127.0.0.1 отправляет несколько многомегабайтных сообщений
+Client::onImportClientEntityDef, клиент MsgTCPClient собирает их из частей.
+Сравнивается старая сборка (склеивание частей через bytes) и сборка в
+заранее выделенный буфер.
+
+    python -m tools.benchmark.bigmsg [--size-mb N] [--count N]
+"""
+
+import argparse
+import asyncio
+import time
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.message import Message, MessageSerializer
+from enki.net.client import MsgTCPClient
+from enki.net.inet import IClientMsgReceiver
+
+from .utils import BenchResult, print_comparison
+
+
+class _ConcatMsgTCPClient(MsgTCPClient):
+    """Клиент со старой сборкой сообщения (склеивание частей)."""
+
+    def __init__(self, addr: AppAddr, msg_spec_by_id):
+        super().__init__(addr, msg_spec_by_id)
+        self._concat_buffer = b''
+
+    def on_receive_data(self, data: memoryview):
+        if self._concat_buffer:
+            data = memoryview(self._concat_buffer + data)
+        while data:
+            msg, data = self._serializer.deserialize(data)
+            if msg is None:
+                self._concat_buffer = data.tobytes()
+                return
+            self._msg_receiver.on_receive_msg(msg)
+            self._concat_buffer = b''
+
+
+class _Receiver(IClientMsgReceiver):
+
+    def __init__(self, count: int):
+        self._count = count
+        self.done = asyncio.get_running_loop().create_future()
+
+    def on_receive_msg(self, msg: Message) -> bool:
+        self._count -= 1
+        if self._count == 0:
+            self.done.set_result(None)
+        return True
+
+    def on_end_receive_msg(self):
+        pass
+
+
+async def _bench(client_cls, data: bytes, count: int) -> BenchResult:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        for _ in range(count):
+            writer.write(data)
+            await writer.drain()
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    client = client_cls(AppAddr('127.0.0.1', port), msgspec.app.client.SPEC_BY_ID)
+    receiver = _Receiver(count)
+    client.set_msg_receiver(receiver)
+
+    start = time.perf_counter()
+    await client.start()
+    await receiver.done
+    seconds = time.perf_counter() - start
+
+    client.stop()
+    server.close()
+    await server.wait_closed()
+    return BenchResult(client_cls.__name__, count, seconds)
+
+
+async def _main(size_mb: int, count: int):
+    spec = msgspec.app.client.onImportClientEntityDef
+    payload = b'\x01' * (size_mb * 1024 * 1024)
+    data = MessageSerializer(msgspec.app.client.SPEC_BY_ID).serialize(
+        Message(spec, (payload, )))
+
+    before = await _bench(_ConcatMsgTCPClient, data, count)
+    after = await _bench(MsgTCPClient, data, count)
+    print_comparison(f'{count} messages of {size_mb} MB (messages/sec)', before, after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=8)
+    parser.add_argument('--count', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(_main(args.size_mb, args.count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Бенчмарк отладочного форматирования аргументов (devonly.func_args_values).
+
+Уровень DEBUG выключен. Сравнивается прежняя реализация (inspect.stack()
+при каждом вызове) и ленивая (аргументы форматируются, только если запись
+журнала выводится):
+
+* одиночный вызов logger.debug('[%s] %s', self, devonly.func_args_values());
+* регистрация компонентов в Supervisor (Supervisor.on_receive_msg с
+  Machine::onBroadcastInterface) - несколько таких вызовов на сообщение.
+
+    python -m tools.benchmark.debugtrace [--count N]
+"""
+
+import argparse
+import asyncio
+import inspect
+import logging
+import time
+from unittest import mock
+
+from enki.app.supervisor.supervisorapp import Supervisor
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.kbeenum import ComponentType
+from enki.core.message import Message
+from enki.handler.serverhandler.machinehandler import OnBroadcastInterfaceParsedData
+from enki.misc import devonly
+from enki.net.server import get_free_port
+
+from .utils import BenchResult, measure, print_comparison
+
+logger = logging.getLogger(__name__)
+
+
+def _eager_func_args_values() -> str:
+    """The previous implementation (inspect.stack() on every call)."""
+    upper_function_frame = inspect.stack()[1][0]
+    args_values = []
+    for arg_name in upper_function_frame.f_code.co_varnames:
+        if arg_name not in upper_function_frame.f_locals:
+            continue
+        if arg_name in ('self', 'cls'):
+            continue
+        args_values.append((arg_name, upper_function_frame.f_locals[arg_name]))
+    return ', '.join('%s = %s' % (arg_name, value) for arg_name, value in args_values)
+
+
+class _Handler:
+
+    def handle(self, msg_id: int, data: bytes):
+        logger.debug('[%s] %s', self, devonly.func_args_values())
+
+
+async def _bench_supervisor(count: int) -> float:
+    app = Supervisor(AppAddr('127.0.0.1', get_free_port()),
+                     AppAddr('127.0.0.1', get_free_port()))
+    msgs = []
+    for comp_id in range(1000, 1000 + count):
+        info = OnBroadcastInterfaceParsedData.get_empty()
+        info.componentType = ComponentType.BASEAPP.value
+        info.componentID = comp_id
+        msgs.append(Message(msgspec.app.machine.onBroadcastInterface, info.values()))
+    channel = mock.MagicMock()
+    start = time.perf_counter()
+    for msg in msgs:
+        await app.on_receive_msg(msg, channel)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=20_000)
+    args = parser.parse_args()
+    # Регистрация компонента пишет в журнал на уровне INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    handler = _Handler()
+    with mock.patch('enki.misc.devonly.func_args_values', _eager_func_args_values):
+        before = measure('inspect.stack()', lambda: handler.handle(1, b''), args.count)
+    after = measure('lazy', lambda: handler.handle(1, b''), args.count)
+    print_comparison('logger.debug with the arguments, DEBUG is off (calls/sec)', before, after)
+
+    with mock.patch('enki.misc.devonly.func_args_values', _eager_func_args_values):
+        before_seconds = asyncio.run(_bench_supervisor(args.count))
+    after_seconds = asyncio.run(_bench_supervisor(args.count))
+    print_comparison('Supervisor: registration of components (messages/sec)',
+                     BenchResult('inspect.stack()', args.count, before_seconds),
+                     BenchResult('lazy', args.count, after_seconds))
+    print(f'  per message: {before_seconds / args.count * 1e6:.1f} us -> '
+          f'{after_seconds / args.count * 1e6:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Бенчмарк стандартного цикла событий asyncio и uvloop.
+
+Сравниваются:
+
+* регистрация компонентов в Supervisor - компоненты отправляют по UDP
+  Machine::onBroadcastInterface (окнами, чтобы ядро не отбрасывало датаграммы),
+  замеряется время до обработки всех сообщений;
+* приём и декодирование сообщений MsgTCPClient через loopback (см. tcprecv).
+
+    pip install uvloop
+    python -m tools.benchmark.evloop [--components N] [--count N]
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+from typing import Awaitable, Callable
+
+from enki.app.supervisor.supervisorapp import Supervisor
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.kbeenum import ComponentType
+from enki.core.message import Message, MessageSerializer
+from enki.handler.serverhandler.machinehandler import OnBroadcastInterfaceParsedData
+from enki.net.server import get_free_port
+
+from . import tcprecv
+from .utils import BenchResult, print_comparison
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Сколько датаграмм отправляется, не дожидаясь их обработки
+_WINDOW = 64
+
+
+async def _bench_supervisor(count: int) -> float:
+    app = Supervisor(AppAddr('127.0.0.1', get_free_port()),
+                     AppAddr('127.0.0.1', get_free_port()))
+    res = await app.start()
+    assert res.success, res.text
+    stats = app._udp_server.stats
+    assert stats is not None
+
+    serializer = MessageSerializer(msgspec.app.machine.SPEC_BY_ID)
+    datagrams = []
+    for comp_id in range(1000, 1000 + count):
+        info = OnBroadcastInterfaceParsedData.get_empty()
+        info.componentType = ComponentType.BASEAPP.value
+        info.componentID = comp_id
+        datagrams.append(serializer.serialize(
+            Message(msgspec.app.machine.onBroadcastInterface, info.values())))
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    addr = app.udp_addr.to_tuple()
+    start = time.perf_counter()
+    for i in range(0, count, _WINDOW):
+        for data in datagrams[i:i + _WINDOW]:
+            sock.sendto(data, addr)
+        sent = min(i + _WINDOW, count)
+        while stats.handled + stats.dropped < sent:
+            await asyncio.sleep(0)
+    seconds = time.perf_counter() - start
+    assert stats.dropped == 0, 'The datagrams are dropped'
+
+    sock.close()
+    await app.stop()
+    await app._internal_tcp_server.stop()
+    return seconds
+
+
+async def _bench_client(count: int, payload: int) -> float:
+    serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+    msg = Message(msgspec.app.client.onImportClientEntityDef, (b'\x01' * payload, ))
+    data = serializer.serialize(msg) * count
+    return await tcprecv._bench_client(False, data, count)
+
+
+def _run(loop_factory: Callable[[], asyncio.AbstractEventLoop],
+         bench: Callable[[], Awaitable[float]]) -> float:
+    loop = loop_factory()
+    try:
+        return min(loop.run_until_complete(bench()) for _ in range(3))
+    finally:
+        # Как asyncio.run: оставшиеся задачи (обработчики соединений) отменяются
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--components', type=int, default=20_000)
+    parser.add_argument('--count', type=int, default=200_000)
+    parser.add_argument('--payload', type=int, default=64)
+    args = parser.parse_args()
+    if uvloop is None:
+        print('uvloop is not installed, nothing to compare')
+        return
+
+    cases = [
+        (f'Supervisor: registration of {args.components:,} components (messages/sec)',
+         args.components, lambda: _bench_supervisor(args.components)),
+        (f'MsgTCPClient: {args.count:,} messages of {args.payload} bytes (messages/sec)',
+         args.count, lambda: _bench_client(args.count, args.payload)),
+    ]
+    for title, count, bench in cases:
+        before = _run(asyncio.new_event_loop, bench)
+        after = _run(uvloop.new_event_loop, bench)
+        print_comparison(title, BenchResult('asyncio', count, before),
+                         BenchResult('uvloop', count, after))
+
+
+if __name__ == '__main__':
+    main()
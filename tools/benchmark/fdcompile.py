@@ -0,0 +1,68 @@
+"""Бенчмарк декодирования FIXED_DICT / ARRAY: общий путь и скомпилированный.
+
+Типы берутся из тестовых описаний (tests/data/descr/deftype) и из вложенного
+типа, похожего на пользовательские типы игры.
+
+    python -m tools.benchmark.fdcompile [--count N] [--show-source]
+"""
+
+import argparse
+import collections
+
+from enki.core import kbetype
+from enki.core.kbetype import typecompiler
+
+from tests.data.descr import deftype
+
+from .utils import measure, print_comparison
+
+
+def _nested_type() -> kbetype.IKBEType:
+    item = kbetype.FIXED_DICT.build('BAG_ITEM', collections.OrderedDict([
+        ('id', kbetype.UINT64), ('count', kbetype.UINT16), ('slot', kbetype.INT8),
+        ('durability', kbetype.FLOAT), ('bound', kbetype.BOOL), ('name', kbetype.UNICODE),
+    ]))
+    return kbetype.FIXED_DICT.build('BAG_EX', collections.OrderedDict([
+        ('owner', kbetype.INT32),
+        ('items', kbetype.ARRAY.build('BAG_ITEMS', item)),
+        ('cooldowns', kbetype.ARRAY.build('COOLDOWNS', kbetype.FLOAT)),
+    ]))
+
+
+def _sample(kbe_type: kbetype.IKBEType) -> memoryview:
+    """Данные типа с несколькими элементами в каждом массиве."""
+    def value_of(t):
+        if type(t) is type(kbetype.ARRAY):
+            return kbetype.Array(of=type(t._of.default), type_name=t.name,
+                                 initial_data=[value_of(t._of) for _ in range(10)])
+        if type(t) is type(kbetype.FIXED_DICT):
+            return kbetype.FixedDict(t.name, collections.OrderedDict(
+                (k, value_of(child)) for k, child in t._pairs.items()))
+        return t.default
+    return memoryview(kbe_type.encode(value_of(kbe_type)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--show-source', action='store_true')
+    args = parser.parse_args()
+
+    types = [spec.kbetype for spec in deftype.TYPE_SPEC_BY_ID.values()
+             if typecompiler.can_compile(spec.kbetype)]
+    types.append(_nested_type())
+    for kbe_type in types:
+        data = _sample(kbe_type)
+        generic = type(kbe_type).decode_from
+        compiled = typecompiler.compile_decoder(kbe_type)
+        if args.show_source:
+            print(typecompiler.get_source(kbe_type))
+        print_comparison(
+            f'{kbe_type.name} decode, {len(data)} bytes (decodes/sec)',
+            measure('generic', lambda: generic(kbe_type, data, 0), args.count),
+            measure('compiled', lambda: compiled(data, 0), args.count),
+        )
+
+
+if __name__ == '__main__':
+    main()
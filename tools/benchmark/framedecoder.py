@@ -0,0 +1,104 @@
+"""Бенчмарк сборки сообщений из фрагментированного потока.
+
+Сравнивается старая сборка (склеивание накопленного начала сообщения с
+каждой новой частью через bytes, как было в TCPServer и MsgTCPClient) и
+FrameDecoder. Поток режется на части так, чтобы границы попадали внутрь
+заголовков и тел сообщений.
+
+    python -m tools.benchmark.framedecoder [--size-kb N]
+"""
+
+import argparse
+import itertools
+import random
+from typing import Iterable, Iterator, List
+
+from enki.core import msgspec
+from enki.core.message import Message, MessageSerializer
+from enki.net.framedecoder import FrameDecoder
+
+from .utils import BenchResult, measure, print_comparison
+
+
+class _ConcatDecoder:
+    """Сборка сообщений, как она была до FrameDecoder."""
+
+    def __init__(self, serializer: MessageSerializer):
+        self._serializer = serializer
+        self._buffer = b''
+
+    def feed(self, data: bytes) -> List[Message]:
+        if self._buffer:
+            data = self._buffer + data
+        messages = []
+        view = memoryview(data)
+        while view:
+            msg, view = self._serializer.deserialize(view)
+            if msg is None:
+                break
+            messages.append(msg)
+        self._buffer = view.tobytes()
+        return messages
+
+
+def _random_sizes(rnd: random.Random, low: int, high: int) -> Iterator[int]:
+    while True:
+        yield rnd.randint(low, high)
+
+
+def _split(data: bytes, sizes: Iterable[int]) -> List[bytes]:
+    chunks, offset = [], 0
+    for size in sizes:
+        if offset >= len(data):
+            break
+        chunks.append(data[offset:offset + size])
+        offset += size
+    return chunks
+
+
+def _bench(name: str, decoder_cls, serializer: MessageSerializer,
+           chunks: List[bytes], msg_count: int) -> BenchResult:
+    def run():
+        decoder = decoder_cls(serializer)
+        count = 0
+        for chunk in chunks:
+            count += len(decoder.feed(chunk))
+        assert count == msg_count, (count, msg_count)
+
+    result = measure(name, run, 1)
+    size = sum(len(c) for c in chunks)
+    # Скорость считается в килобайтах потока
+    return BenchResult(result.name, size // 1024, result.seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-kb', type=int, default=1024)
+    args = parser.parse_args()
+
+    serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+    spec = msgspec.app.client
+    rnd = random.Random(0)
+
+    small = [Message(spec.onUpdateBasePos, (1.0, 2.0, 3.0)),
+             Message(spec.onImportClientEntityDef, (b'\x01' * 40, ))]
+    small_data = b''.join(serializer.serialize(small[i % 2])
+                          for i in range(args.size_kb * 1024 // 40))
+    big = Message(spec.onImportClientEntityDef, (b'\x02' * (args.size_kb * 1024), ))
+    big_data = serializer.serialize(big)
+
+    cases = [
+        ('small messages, 1..7 bytes chunks', small_data, _random_sizes(rnd, 1, 7)),
+        ('one big message, 1400 bytes chunks', big_data, itertools.repeat(1400)),
+        ('one big message, 1..64 bytes chunks', big_data, _random_sizes(rnd, 1, 64)),
+    ]
+    for title, data, sizes in cases:
+        chunks = _split(data, sizes)
+        msg_count = len(_ConcatDecoder(serializer).feed(data))
+        before = _bench('bytes concatenation', _ConcatDecoder, serializer, chunks, msg_count)
+        after = _bench('FrameDecoder', FrameDecoder, serializer, chunks, msg_count)
+        print_comparison(f'{args.size_kb} KB, {title} (KB/sec)', before, after)
+
+
+if __name__ == '__main__':
+    main()
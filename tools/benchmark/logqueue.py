@@ -0,0 +1,62 @@
+"""Бенчмарк записи журнала в медленный вывод.
+
+Вывод (как драйвер логов docker или LogStash) тратит --delay-us
+микросекунд на каждую запись. Сравнивается, сколько записей в секунду
+успевает сделать логирующий поток при синхронной записи (StreamHandler)
+и через очередь (LOG_QUEUE_SIZE), и сколько записей при этом отброшено.
+
+    python -m tools.benchmark.logqueue [--count N] [--delay-us N] [--queue-size N]
+"""
+
+import argparse
+import io
+import logging
+import time
+from unittest import mock
+
+from enki.misc import log
+
+from .utils import BenchResult, print_comparison
+
+logger = logging.getLogger(__name__)
+
+
+class _SlowStream(io.StringIO):
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self._delay = delay
+
+    def write(self, s: str) -> int:
+        time.sleep(self._delay)
+        return super().write(s)
+
+
+def _bench(name: str, count: int, delay: float, queue_size: int) -> BenchResult:
+    with mock.patch('sys.stdout', _SlowStream(delay)):
+        log.setup_root_logger('INFO', queue_size=queue_size)
+    start = time.perf_counter()
+    for i in range(count):
+        logger.info('Message %s has been handled', i)
+    seconds = time.perf_counter() - start
+    log.stop_listener()
+    return BenchResult(name, count, seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=5_000)
+    parser.add_argument('--delay-us', type=int, default=200)
+    parser.add_argument('--queue-size', type=int, default=1_000)
+    args = parser.parse_args()
+    delay = args.delay_us / 1e6
+
+    before = _bench('StreamHandler', args.count, delay, 0)
+    after = _bench(f'queue of {args.queue_size:,}', args.count, delay, args.queue_size)
+    print_comparison(f'logger.info, {args.delay_us} us per written record '
+                     f'(records/sec of the logging thread)', before, after)
+    print(f'  dropped records: {log.dropped_records():,} of {args.count:,}')
+
+
+if __name__ == '__main__':
+    main()
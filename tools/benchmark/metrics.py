@@ -0,0 +1,106 @@
+"""Бенчмарк накладных расходов метрик сообщений (core.metrics).
+
+Поток сообщений Client::onUpdateBasePos частями по 1400 байт:
+
+* декодируется FrameDecoder и каждое сообщение кодируется обратно
+  (как при отправке, sampled_serialize_into);
+* принимается MsgTCPClient (получатель сообщений ничего не делает).
+
+Сравниваются выключенные и включённые метрики. Метрики пишутся для
+одной из METRICS_SAMPLE пачек (чанк, отправленное сообщение), остальные
+пачки декодируются без затрат на сообщение. Прогоны с метриками и без
+чередуются, берётся лучший.
+
+    python -m tools.benchmark.metrics [--count N]
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from enki.core import metrics, msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.message import Message, MessageSerializer
+from enki.net.client import MsgTCPClient
+from enki.net.framedecoder import FrameDecoder
+
+from .utils import BenchResult, print_comparison
+
+_CHUNK_SIZE = 1400
+
+
+class _Receiver:
+
+    def on_receive_msg(self, msg: Message) -> bool:
+        return True
+
+    def on_end_receive_msg(self):
+        pass
+
+
+def _chunks(data: memoryview) -> list[memoryview]:
+    return [data[i:i + _CHUNK_SIZE] for i in range(0, len(data), _CHUNK_SIZE)]
+
+
+def _codec(serializer: MessageSerializer, data: memoryview) -> Callable[[], None]:
+    chunks = _chunks(data)
+
+    def run():
+        decoder, buf = FrameDecoder(serializer), bytearray()
+        for chunk in chunks:
+            for msg in decoder.feed(chunk):
+                serializer.sampled_serialize_into()(msg, buf)
+    return run
+
+
+def _receive(data: memoryview) -> Callable[[], None]:
+    client = MsgTCPClient(AppAddr('127.0.0.1', 0), msgspec.app.client.SPEC_BY_ID)
+    client.set_msg_receiver(_Receiver())
+    chunks = _chunks(data)
+
+    def run():
+        for chunk in chunks:
+            client.on_receive_data(chunk)
+    return run
+
+
+def _compare(title: str, disabled: Callable[[], None], enabled: Callable[[], None],
+             count: int, repeat: int = 15):
+    best = [float('inf'), float('inf')]
+    for _ in range(repeat):
+        for index, func in enumerate((disabled, enabled)):
+            start = time.perf_counter()
+            func()
+            best[index] = min(best[index], time.perf_counter() - start)
+    print_comparison(title, BenchResult('disabled', count, best[0]),
+                     BenchResult('enabled', count, best[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=50_000)
+    args = parser.parse_args()
+
+    metrics.disable()
+    serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+    spec = msgspec.app.client.onUpdateBasePos
+    data = memoryview(b''.join(
+        serializer.serialize(Message(spec, (float(i), 1.0, 1.0))) for i in range(args.count)
+    ))
+    codec_disabled, receive_disabled = _codec(serializer, data), _receive(data)
+
+    registry = metrics.enable()
+    codec_enabled = _codec(MessageSerializer(msgspec.app.client.SPEC_BY_ID), data)
+    receive_enabled = _receive(data)
+
+    sample = registry.sample
+    _compare(f'Decode + encode, metrics of 1/{sample} messages (messages/sec)',
+             codec_disabled, codec_enabled, args.count)
+    _compare(f'MsgTCPClient receiving, metrics of 1/{sample} messages (messages/sec)',
+             receive_disabled, receive_enabled, args.count)
+    decode = registry.msg(spec.name).decode
+    print(f'  decode p50 <= {decode.quantile(0.5)} ns, p99 <= {decode.quantile(0.99)} ns')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Бенчмарк памяти, выделяемой при декодировании сообщений.
+
+Декодируются N сообщений Client::onUpdateData_xyz_ypr (все сообщения
+остаются живыми), считаются выделенные байты (tracemalloc) и созданные
+объекты (блоки аллокатора Python) на одно сообщение. Сравнивается старый
+Message (с __dict__) и Message со __slots__.
+
+    python -m tools.benchmark.msgalloc [--count N]
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from unittest import mock
+
+from enki.core import kbetype, message, msgspec
+from enki.core.message import Message, MessageSerializer
+
+
+class _DictMessage(Message):
+    """Сообщение, как оно было до __slots__ (у экземпляра есть __dict__)."""
+
+    def __init__(self, spec, fields):
+        super().__init__(spec, fields)
+        self.__dict__  # как и раньше, словарь атрибутов создаётся сразу
+
+
+def _get_data() -> bytes:
+    spec = msgspec.app.client.onUpdateData_xyz_ypr
+    payload = kbetype.INT32.encode(42) + b''.join(
+        kbetype.FLOAT.encode(v) for v in (1.0, 2.0, 3.0, 0.1, 0.2, 0.3))
+    return MessageSerializer(msgspec.app.client.SPEC_BY_ID).serialize(
+        Message(spec, (payload, )))
+
+
+def _measure(name: str, data: bytes, count: int) -> tuple[float, float]:
+    serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+    frames = [memoryview(data) for _ in range(count)]
+    deserialize = serializer.deserialize
+
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    bytes_before, _peak = tracemalloc.get_traced_memory()
+    messages = [deserialize(frame)[0] for frame in frames]
+    bytes_after, _peak = tracemalloc.get_traced_memory()
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+    gc.enable()
+
+    assert len(messages) == count
+    per_msg_bytes = (bytes_after - bytes_before) / count
+    per_msg_objects = (blocks_after - blocks_before) / count
+    print(f'  {name:<8} {per_msg_bytes:>8.1f} bytes/msg {per_msg_objects:>6.2f} objects/msg '
+          f'({bytes_after - bytes_before:,} bytes per {count:,} messages)')
+    return per_msg_bytes, per_msg_objects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100_000)
+    args = parser.parse_args()
+
+    data = _get_data()
+    print(f'*** Decoding of {args.count:,} onUpdateData_xyz_ypr messages (allocations) ***')
+    with mock.patch.object(message, 'Message', _DictMessage):
+        before, _ = _measure('before:', data, args.count)
+    after, _ = _measure('after:', data, args.count)
+    print(f'  memory: x{before / after:.2f} less')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Бенчмарк декодирования / кодирования сообщений.
+
+Сравнивает пополевое декодирование (каждое поле своим типом, как было раньше)
+и декодирование скомпилированным кодеком полей (FieldsCodec) для спецификаций
+msgspec.app.machine и msgspec.app.client . Также сравнивает сериализацию
+в новый bytes (serialize) и в переиспользуемый буфер (serialize_into).
+
+    python -m tools.benchmark.msgcodec [--count N]
+"""
+
+import argparse
+from types import ModuleType
+from typing import Any
+
+from enki.core import kbetype, msgspec
+from enki.core.message import Message, MessageSerializer, MsgDescr
+
+from .utils import measure, print_comparison
+
+_SAMPLE_VALUE_BY_TYPE: dict[Any, Any] = {
+    kbetype.STRING.name: 'kbengine',
+    kbetype.UNICODE.name: 'kbengine',
+    kbetype.BLOB.name: b'\x00' * 16,
+    kbetype.UINT8_ARRAY.name: b'\x00' * 16,
+}
+
+
+def _decode_per_field(spec: MsgDescr, data: memoryview) -> tuple:
+    """Декодирование полей так, как оно было до FieldsCodec."""
+    fields = []
+    for kbe_type in spec.field_types:
+        value, size = kbe_type.decode(data)
+        fields.append(value)
+        data = data[size:]
+    return tuple(fields)
+
+
+def _encode_per_field(spec: MsgDescr, values: tuple) -> bytes:
+    return b''.join(t.encode(v) for t, v in zip(spec.field_types, values))
+
+
+def _get_samples(module: ModuleType) -> list[tuple[MsgDescr, memoryview, tuple]]:
+    samples = []
+    for spec in module.SPEC_BY_ID.values():
+        if not spec.field_types:
+            continue
+        values = tuple(_SAMPLE_VALUE_BY_TYPE.get(t.name, t.default)
+                       for t in spec.field_types)
+        serializer = MessageSerializer(module.SPEC_BY_ID)
+        data = serializer.serialize(Message(spec, values), only_data=True)
+        samples.append((spec, memoryview(data), values))
+    return samples
+
+
+def bench_module(module: ModuleType, count: int):
+    samples = _get_samples(module)
+    name = module.__name__.split('.')[-1]
+
+    def decode_before():
+        for spec, data, _ in samples:
+            _decode_per_field(spec, data)
+
+    def decode_after():
+        for spec, data, _ in samples:
+            spec.fields_codec.decode(data)
+
+    def encode_before():
+        for spec, _, values in samples:
+            _encode_per_field(spec, values)
+
+    def encode_after():
+        for spec, _, values in samples:
+            spec.fields_codec.encode(values)
+
+    # Один вызов функции - это len(samples) сообщений
+    total = count * len(samples)
+    for title, before, after in (
+        ('decode', decode_before, decode_after),
+        ('encode', encode_before, encode_after),
+    ):
+        res_before = measure(f'{name} {title} per field', before, count)
+        res_after = measure(f'{name} {title} FieldsCodec', after, count)
+        res_before.count = res_after.count = total
+        print_comparison(
+            f'{name}: {title} of {len(samples)} specs (messages/sec)',
+            res_before, res_after
+        )
+
+    serializer = MessageSerializer(module.SPEC_BY_ID)
+    messages = [Message(spec, values) for spec, _, values in samples]
+    buf = bytearray()
+
+    def serialize():
+        for msg in messages:
+            serializer.serialize(msg)
+
+    def serialize_into():
+        for msg in messages:
+            buf.clear()
+            serializer.serialize_into(msg, buf)
+
+    res_before = measure(f'{name} serialize', serialize, count)
+    res_after = measure(f'{name} serialize_into', serialize_into, count)
+    res_before.count = res_after.count = total
+    print_comparison(
+        f'{name}: serialize of {len(samples)} specs to bytes / to the reused buffer (messages/sec)',
+        res_before, res_after
+    )
+
+    # Отдельно самое "толстое" сообщение Machine
+    if module is msgspec.app.machine:
+        spec = msgspec.app.machine.onBroadcastInterface
+        data = next(d for s, d, _ in samples if s is spec)
+        print_comparison(
+            f'{spec.name} decode (messages/sec)',
+            measure('per field', lambda: _decode_per_field(spec, data), count),
+            measure('FieldsCodec', lambda: spec.fields_codec.decode(data), count),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=10000)
+    args = parser.parse_args()
+
+    for module in (msgspec.app.machine, msgspec.app.client):
+        bench_module(module, args.count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Бенчмарк записей журнала на каждое принятое сообщение.
+
+Поток сообщений Client::onUpdateBasePos подаётся в MsgTCPClient частями
+по 1400 байт, уровень журнала INFO (вывод в /dev/null). Сравнивается
+прежняя запись сообщений (logger.info в App.on_receive_msg и поля
+сообщения через msg.get_values() в MsgTCPClient) и канал сообщений
+misc.log.msg_logger с настройками по умолчанию (LOG_MSG_SAMPLE=0).
+Кроме скорости выводится число отформатированных записей.
+
+    python -m tools.benchmark.msglog [--count N]
+"""
+
+import argparse
+import logging
+import os
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.message import Message, MessageSerializer
+from enki.misc import devonly, log
+from enki.net.client import MsgTCPClient
+
+from .utils import measure, print_comparison
+
+logger = logging.getLogger(__name__)
+msg_logger = log.msg_logger(__name__)
+
+_CHUNK_SIZE = 1400
+
+
+class _CountingFormatter(logging.Formatter):
+
+    def __init__(self):
+        super().__init__(log.INFO_FORMAT)
+        self.formatted = 0
+
+    def format(self, record: logging.LogRecord) -> str:
+        self.formatted += 1
+        return super().format(record)
+
+
+class _InfoReceiver:
+    """Receiver logging every message like App.on_receive_msg did."""
+
+    def on_receive_msg(self, msg: Message) -> bool:
+        logger.debug('[%s] Message "%s" fields: %s', self, msg.name, msg.get_values())
+        logger.info('[%s] %s', self, devonly.func_args_values())
+        return True
+
+    def on_end_receive_msg(self):
+        pass
+
+
+class _ChannelReceiver(_InfoReceiver):
+    """Receiver logging every message to the message channel."""
+
+    def on_receive_msg(self, msg: Message) -> bool:
+        msg_logger.debug('[%s] %s', self, log.Fields(msg=msg.name, values=msg.get_values))
+        msg_logger.debug('[%s] %s', self, devonly.func_args_values())
+        return True
+
+
+def _chunks(count: int) -> list[memoryview]:
+    serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+    spec = msgspec.app.client.onUpdateBasePos
+    data = b''.join(
+        serializer.serialize(Message(spec, (float(i), 1.0, 1.0)))
+        for i in range(count)
+    )
+    return [memoryview(data[i:i + _CHUNK_SIZE]) for i in range(0, len(data), _CHUNK_SIZE)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100_000)
+    args = parser.parse_args()
+
+    formatter = _CountingFormatter()
+    with open(os.devnull, 'w') as devnull:
+        handler = logging.StreamHandler(devnull)
+        handler.setFormatter(formatter)
+        root = logging.getLogger()
+        root.handlers = [handler]
+        root.setLevel(logging.INFO)
+
+        chunks = _chunks(args.count)
+        results, formatted = [], []
+        for name, receiver in (('logger.info', _InfoReceiver()),
+                               ('message channel', _ChannelReceiver())):
+            client = MsgTCPClient(AppAddr('127.0.0.1', 0), msgspec.app.client.SPEC_BY_ID)
+            client.set_msg_receiver(receiver)
+            formatter.formatted = 0
+
+            def feed():
+                for chunk in chunks:
+                    client.on_receive_data(chunk)
+
+            results.append(measure(name, feed, 1))
+            formatted.append(formatter.formatted)
+
+    before, after = results
+    before.count = after.count = args.count
+    print_comparison('Received messages, LOG_LEVEL=INFO (messages/sec)', before, after)
+    # measure повторяет прогон 3 раза
+    print(f'  formatted records per message: {formatted[0] / 3 / args.count:.2f} -> '
+          f'{formatted[1] / 3 / args.count:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Бенчмарк декодирования больших массивов чисел и векторов.
+
+Сравнивает поэлементное декодирование ARRAY и декодирование одним вызовом
+(NumericArray на numpy.frombuffer или на array.array без NumPy).
+
+    python -m tools.benchmark.numericarray [--count N] [--length N]
+"""
+
+import argparse
+
+from enki.core import kbetype
+from enki.core.kbetype import numarray
+
+from .utils import measure, print_comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--length', type=int, default=5000)
+    args = parser.parse_args()
+
+    backend = 'numpy' if numarray.np is not None else 'array.array'
+    for of in (kbetype.INT32, kbetype.FLOAT, kbetype.VECTOR3):
+        generic = kbetype.ARRAY.build(f'{of.name}_ARRAY', of)
+        numeric = kbetype.ARRAY.build(f'{of.name}_ARRAY', of)
+        numarray.install(numeric)
+        scalars = args.length * (3 if of is kbetype.VECTOR3 else 1)
+        scalar_type = kbetype.INT32 if of is kbetype.INT32 else kbetype.FLOAT
+        data = memoryview(kbetype.UINT32.encode(args.length)
+                          + scalar_type.encode(1) * scalars)
+        print_comparison(
+            f'ARRAY of {args.length} {of.name} decode (decodes/sec)',
+            measure('per item', lambda: generic.decode_from(data, 0), args.count),
+            measure(f'NumericArray ({backend})', lambda: numeric.decode_from(data, 0), args.count),
+        )
+
+
+if __name__ == '__main__':
+    main()
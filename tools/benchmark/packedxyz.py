@@ -0,0 +1,91 @@
+"""Бенчмарк чтения упакованных координат (onUpdateData_*_optimized).
+
+Сравнивает старое чтение XZ + Y (преобразования float / int через
+kbetype.FLOAT.encode / INT32.decode) с чтением по таблицам, а также
+чтение по одной тройке с пакетным чтением в numpy.ndarray.
+
+    python -m tools.benchmark.packedxyz [--count N]
+"""
+
+import argparse
+import random
+
+from enki.core import kbetype
+from enki.app.clientapp.clienthandler import ehandler
+from enki.app.clientapp.clienthandler.ehandler import _OptimizedXYZReader
+
+from .utils import BenchResult, measure, print_comparison
+
+
+def _int32_to_float32(value: int) -> float:
+    return kbetype.FLOAT.decode(memoryview(kbetype.INT32.encode(value)))[0]
+
+
+def _float32_to_int32(value: float) -> int:
+    return kbetype.INT32.decode(memoryview(kbetype.FLOAT.encode(value)))[0]
+
+
+def _legacy_read_packed_xz(data: memoryview, offset: int):
+    """Чтение XZ, как оно было до таблиц (только положительные значения)."""
+    value_1, offset = kbetype.UINT8.decode_from(data, offset)
+    value_2, offset = kbetype.UINT8.decode_from(data, offset)
+    value_3, offset = kbetype.UINT8.decode_from(data, offset)
+    data_ = (value_1 << 16) | (value_2 << 8) | value_3
+    x = 0x40000000 | (data_ & 0x7ff000) << 3
+    z = 0x40000000 | (data_ & 0x0007ff) << 15
+    x = _float32_to_int32(_int32_to_float32(x) - 2.0)
+    z = _float32_to_int32(_int32_to_float32(z) - 2.0)
+    return kbetype.Vector2(_int32_to_float32(x), _int32_to_float32(z)), offset
+
+
+def _legacy_read_packed_y(data: memoryview, offset: int):
+    data_, offset = kbetype.UINT16.decode_from(data, offset)
+    y = 0x40000000 | (data_ & 0x7fff) << 12
+    y = _float32_to_int32(_int32_to_float32(y) - 2.0)
+    return _int32_to_float32(y), offset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100_000)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    # Старое чтение падает на знаке, поэтому биты знака сброшены
+    data = memoryview(b''.join(
+        bytes([rnd.randrange(0x80), rnd.randrange(256) & 0xf7, rnd.randrange(256),
+               rnd.randrange(256), rnd.randrange(0x80)])
+        for _ in range(args.count)
+    ))
+
+    def read_all(read_xz, read_y):
+        def run():
+            offset = 0
+            for _ in range(args.count):
+                _xz, offset = read_xz(data, offset)
+                _y, offset = read_y(data, offset)
+        return run
+
+    def per_value(result: BenchResult) -> BenchResult:
+        # Одна операция читает все значения, скорость считается по значениям
+        return BenchResult(result.name, args.count, result.seconds)
+
+    before = per_value(measure('legacy read_packed_xz / read_packed_y',
+                               read_all(_legacy_read_packed_xz, _legacy_read_packed_y), 1))
+    after = per_value(measure('table read_packed_xz / read_packed_y',
+                              read_all(_OptimizedXYZReader.read_packed_xz,
+                                       _OptimizedXYZReader.read_packed_y), 1))
+    title = f'Reading of {args.count:,} packed XZ + Y values (values/sec)'
+    print_comparison(title, before, after)
+
+    if ehandler.np is None:
+        print('NumPy is not installed, the batch reading is skipped')
+        return
+    batch = per_value(measure(
+        'read_packed_xyz_batch',
+        lambda: _OptimizedXYZReader.read_packed_xyz_batch(data, 0, args.count), 1))
+    print_comparison(title, after, batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Бенчмарк задержки запрос-ответ TCP с алгоритмом Нейгла и без него.
+
+Клиент отправляет запрос двумя записями (например, два сообщения подряд,
+как onClientActiveTick вместе с другим сообщением кадра) и ждёт ответ
+сервера. С включённым алгоритмом Нейгла вторая запись ждёт подтверждения
+первой, а сервер откладывает подтверждение (delayed ACK). Сравниваются
+TCPClient с SocketOptions(nodelay=False) и с TCP_NODELAY (по умолчанию).
+
+    python -m tools.benchmark.sockopt [--count N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from enki.core.enkitype import AppAddr
+from enki.net.client import TCPClient
+from enki.net.sockopt import SocketOptions
+
+from .utils import BenchResult, print_comparison
+
+_PART = b'\x01' * 16
+_RESPONSE = b'\x02' * 16
+
+
+async def _bench(nodelay: bool, count: int) -> list[float]:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Ответ после получения обеих частей запроса
+        while True:
+            try:
+                await reader.readexactly(len(_PART) * 2)
+            except asyncio.IncompleteReadError:
+                break
+            writer.write(_RESPONSE)
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    addr = AppAddr('127.0.0.1', server.sockets[0].getsockname()[1])
+    loop = asyncio.get_running_loop()
+    response: asyncio.Future = loop.create_future()
+
+    def on_receive_data(data: bytes):
+        if not response.done():
+            response.set_result(None)
+
+    client = TCPClient(addr, on_receive_data, socket_options=SocketOptions(nodelay=nodelay))
+    await client.start()
+    latencies = []
+    for _ in range(count):
+        response = loop.create_future()
+        start = time.perf_counter()
+        await client.send(_PART)
+        await client.send(_PART)
+        await response
+        latencies.append(time.perf_counter() - start)
+
+    client.stop()
+    server.close()
+    await server.wait_closed()
+    return latencies
+
+
+def _percentile(latencies: list[float], percent: int) -> float:
+    return statistics.quantiles(latencies, n=100)[percent - 1] * 1000
+
+
+async def _main(count: int):
+    before = await _bench(False, count)
+    after = await _bench(True, count)
+    print_comparison(f'{count:,} request-response exchanges, request of two writes (exchanges/sec)',
+                     BenchResult('Nagle (nodelay=False)', count, sum(before)),
+                     BenchResult('TCP_NODELAY', count, sum(after)))
+    for percent in (50, 99):
+        print(f'  p{percent} latency: {_percentile(before, percent):.3f} ms -> '
+              f'{_percentile(after, percent):.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(_main(args.count))
+
+
+if __name__ == '__main__':
+    main()
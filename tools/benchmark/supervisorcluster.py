@@ -0,0 +1,107 @@
+"""Бенчмарк Supervisor из одного и из нескольких процессов (SO_REUSEPORT).
+
+Сначала регистрируются компоненты (Machine::onBroadcastInterface по UDP),
+затем параллельные клиенты проверяют Supervisor сообщением Machine::lookApp,
+каждый запрос через новое TCP соединение (как скрипты проверки здоровья).
+Замеряется число запросов в секунду. В обоих случаях Supervisor работает
+в отдельных процессах (SupervisorCluster с одним и с несколькими
+обработчиками), клиенты - в процессе бенчмарка. Выигрыш есть только при
+нескольких ядрах процессора.
+
+    python -m tools.benchmark.supervisorcluster [--workers N] [--count N] [--clients N]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import time
+
+from enki.app.supervisor.cluster import SupervisorCluster
+from enki.command import RequestCommand
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.kbeenum import ComponentType
+from enki.core.message import Message, MessageSerializer
+from enki.handler.serverhandler.machinehandler import OnBroadcastInterfaceParsedData
+from enki.net.server import get_free_port
+
+from .utils import BenchResult, print_comparison
+
+
+async def _register(udp_addr: AppAddr, components: int):
+    serializer = MessageSerializer(msgspec.app.machine.SPEC_BY_ID)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for comp_id in range(1000, 1000 + components):
+        info = OnBroadcastInterfaceParsedData.get_empty()
+        info.componentType = ComponentType.CELLAPP.value
+        info.componentID = comp_id
+        sock.sendto(serializer.serialize(
+            Message(msgspec.app.machine.onBroadcastInterface, info.values())), udp_addr.to_tuple())
+        # Чтобы ядро не отбрасывало датаграммы
+        await asyncio.sleep(0)
+    sock.close()
+
+
+def _lookApp(tcp_addr: AppAddr) -> RequestCommand:
+    return RequestCommand(
+        tcp_addr, Message(msgspec.app.machine.lookApp, tuple()),
+        msgspec.custom.onLookApp.change_component_owner(ComponentType.MACHINE),
+        stop_on_first_data_chunk=True
+    )
+
+
+def _bench(workers: int, components: int, count: int, clients: int) -> float:
+    udp_addr = AppAddr('127.0.0.1', get_free_port())
+    tcp_addr = AppAddr('127.0.0.1', get_free_port())
+    cluster = SupervisorCluster(udp_addr, tcp_addr, workers)
+    # Обработчики создаются до запуска цикла событий
+    cluster.spawn()
+    return asyncio.run(_measure(cluster, udp_addr, tcp_addr, components, count, clients))
+
+
+async def _measure(cluster: SupervisorCluster, udp_addr: AppAddr, tcp_addr: AppAddr,
+                   components: int, count: int, clients: int) -> float:
+    run_task = asyncio.create_task(cluster.run())
+    while not (await _lookApp(tcp_addr).execute()).success:
+        await asyncio.sleep(0.05)
+    await _register(udp_addr, components)
+
+    async def client(requests: int):
+        for _ in range(requests):
+            res = await _lookApp(tcp_addr).execute()
+            assert res.success, res.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(count // clients) for _ in range(clients)))
+    seconds = time.perf_counter() - start
+
+    cluster.stop()
+    await run_task
+    return seconds
+
+
+def _main(workers: int, components: int, count: int, clients: int):
+    count = count // clients * clients
+    before = _bench(1, components, count, clients)
+    after = _bench(workers, components, count, clients)
+    print_comparison(
+        f'lookApp by {clients} clients, {components:,} registered components, '
+        f'{os.cpu_count()} CPU (requests/sec)',
+        BenchResult('1 worker', count, before),
+        BenchResult(f'{workers} workers', count, after)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--components', type=int, default=500)
+    parser.add_argument('--count', type=int, default=5_000)
+    parser.add_argument('--clients', type=int, default=50)
+    args = parser.parse_args()
+    _main(args.workers, args.components, args.count, args.clients)
+
+
+if __name__ == '__main__':
+    main()
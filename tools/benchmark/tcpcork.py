@@ -0,0 +1,91 @@
+"""Бенчмарк отправки мелких сообщений MsgTCPClient через loopback.
+
+Сообщения отправляются пачками, как их отправляет App.send_message за один
+кадр игры (задача на каждое сообщение). Сравнивается запись каждого
+сообщения отдельно и режим corked (сообщения одной итерации цикла событий
+пишутся одним вызовом). Выводятся сообщения в секунду, число записей в
+транспорт (каждая запись в пустой буфер транспорта - системный вызов send)
+и число чтений на принимающей стороне.
+
+    python -m tools.benchmark.tcpcork [--count N] [--burst N]
+"""
+
+import argparse
+import asyncio
+import time
+from unittest import mock
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.message import Message, MessageSerializer
+from enki.net.client import MsgTCPClient
+
+from .utils import BenchResult, print_comparison
+
+
+async def _bench(corked: bool, msgs: list, burst: int, size: int) -> tuple[float, int, int]:
+    received = 0
+    reads = 0
+    done = asyncio.get_running_loop().create_future()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        nonlocal received, reads
+        while data := await reader.read(65536):
+            received += len(data)
+            reads += 1
+            if received == size:
+                done.set_result(None)
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    client = MsgTCPClient(AppAddr('127.0.0.1', port), msgspec.app.client.SPEC_BY_ID,
+                          corked=corked)
+    await client.start()
+    write = mock.MagicMock(wraps=client._transport.write)  # type: ignore
+    client._transport.write = write  # type: ignore
+
+    start = time.perf_counter()
+    for i in range(0, len(msgs), burst):
+        # Как App.send_message: задача на каждое сообщение кадра
+        for msg in msgs[i:i + burst]:
+            asyncio.create_task(client.send_msg(msg))
+        await asyncio.sleep(0)
+    await done
+    seconds = time.perf_counter() - start
+
+    client.stop()
+    server.close()
+    await server.wait_closed()
+    return seconds, write.call_count, reads
+
+
+async def _main(count: int, burst: int):
+    serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+    msgs = [Message(msgspec.app.client.onUpdateBasePos, (float(i), 0.0, 0.0))
+            for i in range(count)]
+    size = sum(len(serializer.serialize(msg)) for msg in msgs)
+
+    results = {}
+    for corked in (False, True):
+        results[corked] = min([await _bench(corked, msgs, burst, size) for _ in range(3)])
+    (before, before_writes, before_reads), (after, after_writes, after_reads) = \
+        results[False], results[True]
+
+    print_comparison(f'{count:,} messages by {burst} per iteration (messages/sec)',
+                     BenchResult('write per message', count, before),
+                     BenchResult('corked', count, after))
+    print(f'  transport writes: {before_writes:,} -> {after_writes:,}')
+    print(f'  server reads: {before_reads:,} -> {after_reads:,}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--burst', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(_main(args.count, args.burst))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Бенчмарк приёма сообщений по TCP через loopback.
+
+Сравнивается приём через asyncio.Protocol (MsgTCPClient) или StreamReader
+(TCPServer) и приём сразу в буфер соединения (asyncio.BufferedProtocol,
+параметр buffered_protocol). Выводятся мегабайты и сообщения в секунду.
+
+    python -m tools.benchmark.tcprecv [--count N] [--payload N]
+"""
+
+import argparse
+import asyncio
+import time
+
+from enki.core import msgspec
+from enki.core.enkitype import AppAddr
+from enki.core.message import Message, MessageSerializer
+from enki.net.client import MsgTCPClient
+from enki.net.inet import IClientMsgReceiver, IServerMsgReceiver
+from enki.net.server import TCPServer, get_free_port
+
+from .utils import BenchResult, print_comparison
+
+_WRITE_SIZE = 256 * 1024
+
+
+async def _write(writer: asyncio.StreamWriter, data: bytes):
+    # Частями, чтобы транспорт отправителя не копировал все данные в свой буфер
+    view = memoryview(data)
+    for i in range(0, len(view), _WRITE_SIZE):
+        writer.write(view[i:i + _WRITE_SIZE])
+        await writer.drain()
+
+
+class _Counter(IClientMsgReceiver, IServerMsgReceiver):
+
+    def __init__(self, count: int):
+        self._count = count
+        self.done = asyncio.get_running_loop().create_future()
+
+    def _on_msg(self):
+        self._count -= 1
+        if self._count == 0:
+            self.done.set_result(None)
+
+    def on_receive_msg(self, msg: Message, *args):  # type: ignore[override]
+        self._on_msg()
+        if args:
+            # TCPServer ждёт корутину
+            return asyncio.sleep(0, True)
+        return True
+
+    def on_end_receive_msg(self):
+        pass
+
+
+async def _bench_client(buffered: bool, data: bytes, count: int) -> float:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await _write(writer, data)
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    client = MsgTCPClient(AppAddr('127.0.0.1', port), msgspec.app.client.SPEC_BY_ID,
+                          buffered_protocol=buffered)
+    counter = _Counter(count)
+    client.set_msg_receiver(counter)
+
+    start = time.perf_counter()
+    await client.start()
+    await counter.done
+    seconds = time.perf_counter() - start
+
+    client.stop()
+    server.close()
+    await server.wait_closed()
+    return seconds
+
+
+async def _bench_server(buffered: bool, data: bytes, count: int) -> float:
+    counter = _Counter(count)
+    server = TCPServer(AppAddr('127.0.0.1', get_free_port()), msgspec.app.client.SPEC_BY_ID,
+                       counter, buffered_protocol=buffered)
+    await server.start()
+
+    start = time.perf_counter()
+    _reader, writer = await asyncio.open_connection('127.0.0.1', server.addr.port)
+    await _write(writer, data)
+    await counter.done
+    seconds = time.perf_counter() - start
+
+    writer.close()
+    await server.stop()
+    return seconds
+
+
+def _print(title: str, data: bytes, count: int, before: float, after: float):
+    mb = len(data) / 1024 / 1024
+    print_comparison(f'{title} (messages/sec)', BenchResult('Protocol / StreamReader', count, before),
+                     BenchResult('BufferedProtocol', count, after))
+    print(f'  MB/sec: {mb / before:,.1f} -> {mb / after:,.1f}')
+
+
+async def _main(count: int, payload: int):
+    serializer = MessageSerializer(msgspec.app.client.SPEC_BY_ID)
+    msg = Message(msgspec.app.client.onImportClientEntityDef, (b'\x01' * payload, ))
+    data = serializer.serialize(msg) * count
+
+    for name, bench in (('MsgTCPClient', _bench_client), ('TCPServer', _bench_server)):
+        before = min([await bench(False, data, count) for _ in range(3)])
+        after = min([await bench(True, data, count) for _ in range(3)])
+        _print(f'{name}: {count:,} messages of {payload} bytes', data, count, before, after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=200_000)
+    parser.add_argument('--payload', type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(_main(args.count, args.payload))
+
+
+if __name__ == '__main__':
+    main()
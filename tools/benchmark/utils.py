@@ -0,0 +1,39 @@
+"""Общие инструменты для бенчмарков."""
+
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class BenchResult:
+    name: str
+    count: int
+    seconds: float
+
+    @property
+    def per_second(self) -> float:
+        if self.seconds == 0:
+            return float('inf')
+        return self.count / self.seconds
+
+    def __str__(self) -> str:
+        return f'{self.name:<48} {self.per_second:>14,.0f} ops/sec'
+
+
+def measure(name: str, func: Callable[[], None], count: int, repeat: int = 3) -> BenchResult:
+    """Run the function "count" times and return the best of "repeat" rounds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return BenchResult(name, count, best)
+
+
+def print_comparison(title: str, before: BenchResult, after: BenchResult):
+    print(f'*** {title} ***')
+    print(f'  before: {before}')
+    print(f'  after:  {after}')
+    print(f'  speedup: x{after.per_second / before.per_second:.2f}')
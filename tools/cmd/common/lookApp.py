@@ -5,7 +5,6 @@
 подключений).
 """
 
-import asyncio
 import logging
 import sys
 from types import ModuleType
@@ -23,7 +22,7 @@ from enki.core.kbeenum import ComponentType
 from enki.core.message import Message
 from enki.command import RequestCommand
 from enki.handler.serverhandler.common import OnLookAppParsedData
-from enki.misc import devonly, log
+from enki.misc import devonly, evloop, log
 from enki.net import server
 
 from tools.cmd.common import utils
@@ -165,4 +164,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    evloop.run(main())
@@ -5,7 +5,6 @@
 подключений).
 """
 
-import asyncio
 import logging
 import sys
 import logging
@@ -16,7 +15,7 @@ import environs
 from enki import settings
 from enki.core.enkitype import AppAddr
 from enki.core.kbeenum import ComponentType
-from enki.misc import log
+from enki.misc import evloop, log
 from enki.net import server
 from enki.core import msgspec
 from enki.core.enkitype import AppAddr, Result
@@ -111,4 +110,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    evloop.run(main())
@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 import environs
@@ -9,7 +8,7 @@ from enki.core import msgspec
 from enki.net import server
 from enki.net.client import MsgTCPClient
 from enki.command.loginapp import HelloCommand
-from enki.misc import log
+from enki.misc import evloop, log
 
 logger = logging.getLogger(__name__)
 
@@ -53,4 +52,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    evloop.run(main())
@@ -9,7 +9,6 @@ component. Supervisor has the API of the component "Machine", but it doesn't
 have restriction for INTERNAL address, so the script will get response.
 """
 
-import asyncio
 import logging
 import sys
 
@@ -22,7 +21,7 @@ from enki.command import RequestCommand
 from enki.core.kbeenum import ComponentType
 from enki.core.message import Message
 from enki.handler.serverhandler.common import OnLookAppParsedData
-from enki.misc import log
+from enki.misc import evloop, log
 
 logger = logging.getLogger(__name__)
 
@@ -57,4 +56,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    evloop.run(main())
@@ -5,7 +5,6 @@
 контейнером должны быть открыты порты.
 """
 
-import asyncio
 import logging
 import sys
 from typing import Optional
@@ -14,7 +13,7 @@ import environs
 
 from enki import settings
 
-from enki.misc import log
+from enki.misc import evloop, log
 from enki.core.enkitype import AppAddr
 from enki.core.kbeenum import ComponentType
 from enki.command.machine import OnFindInterfaceAddrUDPCommand
@@ -79,4 +78,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    evloop.run(main())
@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import sys
 
@@ -9,7 +8,7 @@ from enki import settings
 from enki.core.enkitype import AppAddr
 from enki.core import msgspec
 from enki.command.machine import OnQueryAllInterfaceInfosCommand
-from enki.misc import log
+from enki.misc import evloop, log
 
 logger = logging.getLogger(__name__)
 
@@ -43,4 +42,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    evloop.run(main())
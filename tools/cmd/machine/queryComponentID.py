@@ -3,7 +3,6 @@
 KBE_MACHINE_HOST='0.0.0.0' KBE_MACHINE_UDP_PORT=20086
 """
 
-import asyncio
 import logging
 import pprint
 import sys
@@ -11,7 +10,7 @@ import sys
 import environs
 
 from enki import settings
-from enki.misc import log
+from enki.misc import evloop, log
 from enki.core.enkitype import AppAddr
 from enki.core.kbeenum import ComponentType
 from enki.core import msgspec
@@ -56,4 +55,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    evloop.run(main())
@@ -1,6 +1,5 @@
 """Уведомление Супервизора, что началась остановка компонента."""
 
-import asyncio
 import logging
 import pprint
 import sys
@@ -8,7 +7,7 @@ import sys
 import environs
 
 from enki import settings
-from enki.misc import log
+from enki.misc import evloop, log
 from enki.core.message import Message
 from enki.core.enkitype import AppAddr
 from enki.core.kbeenum import ComponentType
@@ -50,4 +49,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    evloop.run(main())
@@ -12,6 +12,7 @@ import pyperclip
 
 from enki.core import msgspec
 from enki.core import kbetype
+from enki.core.message import encode_message_length
 from enki.net.client import MessageSerializer
 from enki.handler import clienthandler, serverhandler
 
@@ -119,7 +120,7 @@ def main():
         msg_spec = msg_spec_by_name[namespace.msg_name]
         handler = serverhandler.SERVER_HANDLERS[component_name][msg_spec.id]
         data = kbetype.MESSAGE_ID.encode(msg_spec.id) \
-            + kbetype.MESSAGE_LENGTH.encode(len(data)) \
+            + encode_message_length(len(data)) \
             + data
         msg, tail = serializer.deserialize(memoryview(data))
         if tail: